@@ -0,0 +1,91 @@
+/**
+ * パズルデータのコーデック
+ * puzzle_generator/puzzle_codec.py と同じレイアウトを扱う
+ *
+ * - nested: puzzle / solution を 9x9 の数値配列で保持
+ * - compact: puzzle / solution を 1 セル 1 文字の文字列で保持
+ *   ('0' は空きセル、'1'-'9' の後に 'A'-'Z' が続く)
+ */
+import type {
+  Grid,
+  PuzzleData,
+  RawPuzzleData,
+  RawSolveTrace,
+  RawTraceStep,
+  SolveStep,
+  SolveTrace,
+} from '@/types/puzzle'
+
+const CELL_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+export function encodeGrid(grid: number[][]): string {
+  return grid.map((row) => row.map((v) => CELL_CHARS[v]).join('')).join('')
+}
+
+export function decodeGrid(value: Grid): number[][] {
+  if (typeof value !== 'string') return value
+
+  const size = Math.sqrt(value.length)
+  if (!Number.isInteger(size)) {
+    throw new Error(`Grid string length ${value.length} is not a square`)
+  }
+  const grid: number[][] = []
+  for (let r = 0; r < size; r++) {
+    const row: number[] = []
+    for (let c = 0; c < size; c++) {
+      row.push(CELL_CHARS.indexOf(value[r * size + c].toUpperCase()))
+    }
+    grid.push(row)
+  }
+  return grid
+}
+
+export function decodePuzzle(raw: RawPuzzleData): PuzzleData {
+  return {
+    ...raw,
+    puzzle: decodeGrid(raw.puzzle),
+    solution: decodeGrid(raw.solution),
+  }
+}
+
+/**
+ * ユニット番号（行 0..size-1、列、ブロックの順）のセルを返す
+ */
+function unitCells(unit: number, size: number): number[] {
+  const box = Math.sqrt(size)
+  const kind = Math.floor(unit / size)
+  const k = unit % size
+  const cells: number[] = []
+  for (let i = 0; i < size; i++) {
+    if (kind === 0) cells.push(k * size + i)
+    else if (kind === 1) cells.push(i * size + k)
+    else {
+      const row = Math.floor(k / box) * box + Math.floor(i / box)
+      const col = (k % box) * box + (i % box)
+      cells.push(row * size + col)
+    }
+  }
+  return cells
+}
+
+function decodeTraceStep(step: RawTraceStep, techniques: string[], size: number): SolveStep {
+  const [technique, placements, eliminations, cells] = step
+  const cellDigit = (v: number) => ({ cell: Math.floor(v / size), digit: (v % size) + 1 })
+  return {
+    technique: techniques[technique] ?? 'unknown',
+    placements: placements.map(cellDigit),
+    eliminations: eliminations.map(cellDigit),
+    cells: typeof cells === 'number' ? unitCells(cells, size) : cells,
+  }
+}
+
+/**
+ * 解き筋ファイルのレコードを展開する（puzzle_generator/solve_traces.py と同じ形式）
+ */
+export function decodeTrace(raw: RawSolveTrace, techniques: string[], size = 9): SolveTrace {
+  return {
+    id: raw.id,
+    solved: raw.solved,
+    steps: raw.steps.map((step) => decodeTraceStep(step, techniques, size)),
+  }
+}
@@ -1,21 +1,57 @@
 /**
  * パズル読み込みサービス
+ *
+ * puzzles.index.json（難易度ごとのシャードの目次）があれば、選ばれた難易度の
+ * 1問だけを HTTP Range リクエストで取得する。Range に対応していないサーバーでは
+ * その難易度のシャードだけを読み込んで使い回す。
+ * 目次が無い古いデータでは puzzles.json 全体を読み込む。
+ * シャードは 9x9 だけなので、puzzles.json の 16x16・25x25 のレコードも読み飛ばす。
+ *
+ * 解き筋（生成時に求めたヒント用の手順）はシャードと同じ並びの別ファイルにあり、
+ * getTrace で初めて必要になったときに1問分だけ取得する。
  */
-import type { PuzzleData } from '@/types/puzzle'
+import type {
+  PuzzleData,
+  PuzzleManifest,
+  PuzzleShardInfo,
+  RawPuzzleData,
+  RawSolveTrace,
+  SolveTrace,
+} from '@/types/puzzle'
+import { decodePuzzle, decodeTrace } from '@/services/puzzleCodec'
+
+type Difficulty = PuzzleData['difficulty']
+
+const PUZZLE_DIR = '/puzzles'
+const MANIFEST_FORMAT = 1
+const TRACE_FORMAT = 1
 
 class PuzzleService {
-  private puzzles: PuzzleData[] = []
+  // 目次が無いときの全パズル
+  private puzzles: RawPuzzleData[] = []
+  private manifest: PuzzleManifest | null = null
+  // 読み込み済みのシャード
+  private shards: Partial<Record<Difficulty, RawPuzzleData[]>> = {}
+  // 取得したパズルのシャード内の位置（解き筋の取得に使う）
+  private locations = new Map<string, { difficulty: Difficulty; index: number }>()
+  // 取得済みの解き筋（無いと分かったものは null）
+  private traces = new Map<string, SolveTrace | null>()
   private loaded = false
 
   async loadPuzzles(): Promise<void> {
     if (this.loaded) return
 
     try {
-      const response = await fetch('/puzzles/puzzles.json')
-      if (!response.ok) {
-        throw new Error('Failed to load puzzles')
+      this.manifest = await this.fetchManifest()
+      if (!this.manifest) {
+        const response = await fetch(`${PUZZLE_DIR}/puzzles.json`)
+        if (!response.ok) {
+          throw new Error('Failed to load puzzles')
+        }
+        // 盤面は選ばれたときに初めて展開する。遊べるのは 9x9 だけなので他のサイズは除く
+        const puzzles: RawPuzzleData[] = await response.json()
+        this.puzzles = puzzles.filter((p) => (p.size ?? 9) === 9)
       }
-      this.puzzles = await response.json()
       this.loaded = true
     } catch (error) {
       console.error('Error loading puzzles:', error)
@@ -23,19 +59,143 @@ class PuzzleService {
     }
   }
 
-  getPuzzlesByDifficulty(difficulty: 'easy' | 'medium' | 'hard' | 'expert'): PuzzleData[] {
-    return this.puzzles.filter((p) => p.difficulty === difficulty)
+  private async fetchManifest(): Promise<PuzzleManifest | null> {
+    try {
+      const response = await fetch(`${PUZZLE_DIR}/puzzles.index.json`)
+      if (!response.ok) return null
+      const manifest: PuzzleManifest = await response.json()
+      return manifest.format === MANIFEST_FORMAT ? manifest : null
+    } catch {
+      // 目次が無い（または JSON でない）ときは puzzles.json にフォールバック
+      return null
+    }
+  }
+
+  private async loadShard(difficulty: Difficulty): Promise<RawPuzzleData[]> {
+    const cached = this.shards[difficulty]
+    if (cached) return cached
+
+    const shard = this.manifest?.shards[difficulty]
+    if (!shard || shard.count === 0) return []
+    const response = await fetch(`${PUZZLE_DIR}/${shard.file}`)
+    if (!response.ok) {
+      throw new Error(`Failed to load ${shard.file}`)
+    }
+    const records = parseShard(await response.text())
+    this.cacheShard(difficulty, records)
+    return records
+  }
+
+  private cacheShard(difficulty: Difficulty, records: RawPuzzleData[]): void {
+    this.shards[difficulty] = records
+    records.forEach((record, index) => this.locations.set(record.id, { difficulty, index }))
+  }
+
+  private async fetchRecord(
+    difficulty: Difficulty,
+    shard: PuzzleShardInfo,
+    index: number,
+  ): Promise<RawPuzzleData> {
+    const start = shard.offset + index * shard.record_size
+    const response = await fetch(`${PUZZLE_DIR}/${shard.file}`, {
+      headers: { Range: `bytes=${start}-${start + shard.record_size - 1}` },
+    })
+    if (!response.ok) {
+      throw new Error(`Failed to load ${shard.file}`)
+    }
+    if (response.status === 206) {
+      // 末尾の空白と改行は JSON.parse が無視する
+      return JSON.parse(await response.text())
+    }
+    // Range 非対応のサーバーはシャード全体を返すので、そのまま取っておく
+    const records = parseShard(await response.text())
+    this.cacheShard(difficulty, records)
+    return records[index]
+  }
+
+  async getPuzzlesByDifficulty(difficulty: Difficulty): Promise<PuzzleData[]> {
+    await this.loadPuzzles()
+    if (!this.manifest) {
+      return this.puzzles.filter((p) => p.difficulty === difficulty).map(decodePuzzle)
+    }
+    return (await this.loadShard(difficulty)).map(decodePuzzle)
+  }
+
+  async getRandomPuzzle(difficulty: Difficulty): Promise<PuzzleData | null> {
+    await this.loadPuzzles()
+    if (!this.manifest) {
+      const puzzles = this.puzzles.filter((p) => p.difficulty === difficulty)
+      if (puzzles.length === 0) return null
+      return decodePuzzle(puzzles[Math.floor(Math.random() * puzzles.length)])
+    }
+
+    const shard = this.manifest.shards[difficulty]
+    if (!shard || shard.count === 0) return null
+    const index = Math.floor(Math.random() * shard.count)
+    const cached = this.shards[difficulty]
+    const record = cached ? cached[index] : await this.fetchRecord(difficulty, shard, index)
+    this.locations.set(record.id, { difficulty, index })
+    return decodePuzzle(record)
   }
 
-  getRandomPuzzle(difficulty: 'easy' | 'medium' | 'hard' | 'expert'): PuzzleData | null {
-    const puzzles = this.getPuzzlesByDifficulty(difficulty)
-    if (puzzles.length === 0) return null
-    return puzzles[Math.floor(Math.random() * puzzles.length)]
+  /**
+   * パズルの解き筋を取得する。目次や解き筋ファイルが無いデータでは null
+   */
+  async getTrace(puzzleId: string): Promise<SolveTrace | null> {
+    const cached = this.traces.get(puzzleId)
+    if (cached !== undefined) return cached
+
+    const location = this.locations.get(puzzleId)
+    const manifest = this.manifest
+    const info = location && manifest?.shards[location.difficulty]?.traces
+    if (!location || !manifest || !info || manifest.trace_format !== TRACE_FORMAT) {
+      return null
+    }
+
+    const techniques = manifest.techniques ?? []
+    const start = location.index * info.record_size
+    const response = await fetch(`${PUZZLE_DIR}/${info.file}`, {
+      headers: { Range: `bytes=${start}-${start + info.record_size - 1}` },
+    })
+    if (!response.ok) {
+      throw new Error(`Failed to load ${info.file}`)
+    }
+    if (response.status === 206) {
+      const raw: RawSolveTrace = JSON.parse(await response.text())
+      const trace = raw.id === puzzleId ? decodeTrace(raw, techniques) : null
+      this.traces.set(puzzleId, trace)
+      return trace
+    }
+    // Range 非対応のサーバーではファイル全体が返るので、全部取っておく
+    const lines = (await response.text()).split('\n').filter((line) => line.trim())
+    for (const line of lines) {
+      const raw: RawSolveTrace = JSON.parse(line)
+      this.traces.set(raw.id, decodeTrace(raw, techniques))
+    }
+    const trace = this.traces.get(puzzleId) ?? null
+    this.traces.set(puzzleId, trace)
+    return trace
   }
 
-  getAllPuzzles(): PuzzleData[] {
-    return this.puzzles
+  async getAllPuzzles(): Promise<PuzzleData[]> {
+    await this.loadPuzzles()
+    if (!this.manifest) {
+      return this.puzzles.map(decodePuzzle)
+    }
+    const difficulties = Object.keys(this.manifest.shards) as Difficulty[]
+    const shards = await Promise.all(difficulties.map((d) => this.loadShard(d)))
+    return shards.flat().map(decodePuzzle)
   }
 }
 
+/**
+ * シャード（1行1レコード、行末まで空白で埋めた NDJSON）を読む
+ */
+function parseShard(text: string): RawPuzzleData[] {
+  return text
+    .split('\n')
+    .filter((line) => line.trim())
+    .map((line) => JSON.parse(line))
+}
+
 export const puzzleService = new PuzzleService()
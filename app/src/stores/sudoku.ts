@@ -2,7 +2,7 @@ import { defineStore } from 'pinia'
 import { ref, computed } from 'vue'
 import { puzzleService } from '@/services/puzzleService'
 import type { PuzzleData } from '@/types/puzzle'
-import { ALL_SKILLS, getSkillById } from '@/types/skills'
+import { ALL_SKILLS, TECHNIQUE_LABELS, getSkillById } from '@/types/skills'
 import type { Skill } from '@/types/skills'
 import { useUserProfileStore } from './userProfile'
 
@@ -758,6 +758,19 @@ export const useSudokuStore = defineStore('sudoku', () => {
 
     message.value = `ヒント: ${correctAnswer}をメモしました`
     messageType.value = 'success'
+
+    // 生成時に求めた解き筋があれば、このセルが決まるテクニックを添える（解き筋は初回だけ取得）
+    const puzzleId = currentPuzzle.value.id
+    const cellIndex = selectedCell.value
+    puzzleService
+      .getTrace(puzzleId)
+      .then((trace) => {
+        const step = trace?.steps.find((s) => s.placements.some((p) => p.cell === cellIndex))
+        if (!step || currentPuzzle.value?.id !== puzzleId) return
+        const label = TECHNIQUE_LABELS[step.technique] ?? step.technique
+        message.value = `ヒント: ${correctAnswer}をメモしました（${label}で決まります）`
+      })
+      .catch((error) => console.error('Failed to load solve trace:', error))
   }
 
   const executeClear = (): void => {
@@ -965,7 +978,7 @@ export const useSudokuStore = defineStore('sudoku', () => {
   const startGameWithDifficulty = async (difficulty: Difficulty): Promise<void> => {
     try {
       await puzzleService.loadPuzzles()
-      const puzzle = puzzleService.getRandomPuzzle(difficulty)
+      const puzzle = await puzzleService.getRandomPuzzle(difficulty)
 
       if (!puzzle) {
         throw new Error(`No puzzles found for difficulty: ${difficulty}`)
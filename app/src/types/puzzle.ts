@@ -7,6 +7,101 @@ export interface PuzzleData {
   difficulty: 'easy' | 'medium' | 'hard' | 'expert'
   hints: number
   score: number
+  // テクニックによる難易度評価（古いデータには無い）。score は 81 - hints のまま
+  rating?: number
+  technique?: string
+  technique_score?: number
+  techniques?: Record<string, number>
+  // 生成時の乱数シード（seed_catalogue.py で同じパズルを再生成できる）
+  seed?: number
+  // 盤面の一辺（9 / 16 / 25）。古いデータには無く、その場合は 9
+  size?: number
   puzzle: number[][]
   solution: number[][]
 }
+
+/**
+ * 盤面の保存形式（数値配列、または 1 セル 1 文字の文字列）
+ */
+export type Grid = number[][] | string
+
+/**
+ * puzzles.json に保存されている形式（compact / nested のどちらか）
+ */
+export interface RawPuzzleData extends Omit<PuzzleData, 'puzzle' | 'solution'> {
+  puzzle: Grid
+  solution: Grid
+}
+
+/**
+ * シャードに対応する解き筋ファイルの情報
+ * i 番目のレコードの解き筋は i * record_size バイト目から record_size バイト
+ */
+export interface PuzzleTraceInfo {
+  file: string
+  record_size: number
+  bytes: number
+}
+
+/**
+ * 難易度ごとのシャードの情報（puzzle_generator/puzzle_shards.py が書き出す）
+ * i 番目のレコードは offset + i * record_size バイト目から record_size バイト
+ */
+export interface PuzzleShardInfo {
+  file: string
+  count: number
+  record_size: number
+  offset: number
+  bytes: number
+  // 解き筋ファイル（古いデータには無い）
+  traces?: PuzzleTraceInfo
+}
+
+/**
+ * puzzles.index.json の形式
+ */
+export interface PuzzleManifest {
+  format: number
+  layout: 'compact'
+  total: number
+  shards: Partial<Record<PuzzleData['difficulty'], PuzzleShardInfo>>
+  // 解き筋の形式と、各手のテクニック番号が指すテクニック名（解き筋があるときだけ）
+  trace_format?: number
+  techniques?: string[]
+}
+
+/**
+ * 解き筋ファイルの1手（puzzle_generator/solve_traces.py）
+ * [テクニック番号, 配置, 候補の除去, 根拠のセル]
+ * 配置・除去は cell * size + digit - 1、根拠のセルはユニット番号かセルの配列
+ */
+export type RawTraceStep = [number, number[], number[], number | number[]]
+
+/**
+ * 解き筋ファイルのレコード
+ */
+export interface RawSolveTrace {
+  id: string
+  solved: boolean
+  steps: RawTraceStep[]
+}
+
+/**
+ * 展開した1手。セルは 0 から始まる通し番号（row * size + col）
+ */
+export interface SolveStep {
+  technique: string
+  placements: { cell: number; digit: number }[]
+  eliminations: { cell: number; digit: number }[]
+  // 根拠のセル。ネイキッドシングルでは空（置いたセルの周り全体が根拠）
+  cells: number[]
+}
+
+/**
+ * 展開した解き筋。solved が false なら論理だけで解ける所までの手順
+ */
+export interface SolveTrace {
+  id: string
+  solved: boolean
+  steps: SolveStep[]
+}
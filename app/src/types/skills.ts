@@ -112,6 +112,20 @@ export const ALL_SKILLS: Skill[] = [
   },
 ]
 
+// 解き筋（puzzle_generator/solve_traces.py）のテクニック名の表示名
+export const TECHNIQUE_LABELS: Record<string, string> = {
+  hidden_single: 'ヒドゥンシングル',
+  naked_single: 'ネイキッドシングル',
+  locked_candidates: 'ロックド・キャンディデート',
+  naked_pair: 'ネイキッドペア',
+  hidden_pair: 'ヒドゥンペア',
+  naked_triple: 'ネイキッドトリプル',
+  hidden_triple: 'ヒドゥントリプル',
+  x_wing: 'X-Wing',
+  xy_wing: 'XY-Wing',
+  swordfish: 'ソードフィッシュ',
+}
+
 // Get skill by ID
 export const getSkillById = (id: string): Skill | undefined => {
   return ALL_SKILLS.find((skill) => skill.id === id)
@@ -0,0 +1,173 @@
+"""Vectorized verification stage for verify_puzzles.py.
+
+The whole corpus is loaded into (N, cells) uint8 arrays. Solution validity
+and clue/solution consistency are checked for all puzzles at once, then
+naked/hidden single propagation is run in bulk on candidate bitmasks.
+Singles are forced deductions, so a puzzle that propagation fills into a
+valid grid has exactly one solution; only the leftovers need a search.
+"""
+import numpy as np
+
+from puzzle_codec import CELL_CHARS
+
+# bump when the checks change; invalidates verify caches
+BATCH_VERSION = 1
+
+# byte value -> cell value for the compact layout
+_CHAR_TABLE = np.zeros(256, dtype=np.uint8)
+for _value, _ch in enumerate(CELL_CHARS):
+    _CHAR_TABLE[ord(_ch)] = _value
+    _CHAR_TABLE[ord(_ch.lower())] = _value
+
+
+def grids_to_array(values: list, box_size: int = 3) -> np.ndarray:
+    """Stack grids (compact strings or nested lists) into an (N, cells) uint8 array."""
+    cells = (box_size * box_size) ** 2
+    if not values:
+        return np.zeros((0, cells), dtype=np.uint8)
+    if all(isinstance(v, str) for v in values):
+        raw = np.frombuffer(''.join(values).encode('ascii'), dtype=np.uint8)
+        return _CHAR_TABLE[raw].reshape(len(values), cells)
+    return np.stack([
+        _CHAR_TABLE[np.frombuffer(v.encode('ascii'), dtype=np.uint8)] if isinstance(v, str)
+        else np.asarray(v, dtype=np.uint8).reshape(cells)
+        for v in values
+    ])
+
+
+def _mask_dtype(size: int):
+    return np.uint16 if size <= 16 else np.uint32
+
+
+# single-bit mask -> digit, for masks up to 16 bits
+_DIGIT_TABLE = np.zeros(1 << 16, dtype=np.uint8)
+for _d in range(16):
+    _DIGIT_TABLE[1 << _d] = _d + 1
+
+
+def _bits_to_digits(masks: np.ndarray, size: int) -> np.ndarray:
+    """Convert single-bit masks to digits (0 stays 0)."""
+    if size <= 16:
+        return _DIGIT_TABLE[masks]
+    return np.where(masks != 0, np.frexp(masks.astype(np.float64))[1], 0).astype(np.uint8)
+
+
+def _unit_masks(grid: np.ndarray, box_size: int) -> tuple:
+    """OR of the digit bits placed in each row, column and box.
+
+    grid is (N, size, size); returns (N, size), (N, size), (N, box, box).
+    """
+    size = box_size * box_size
+    bit_table = np.array([0] + [1 << d for d in range(size)], dtype=_mask_dtype(size))
+    bits = bit_table[np.minimum(grid, size)]
+    n = grid.shape[0]
+    # explicit OR loops are much faster than ufunc.reduce over short axes
+    rows = bits[:, :, 0].copy()
+    cols = bits[:, 0, :].copy()
+    for k in range(1, size):
+        rows |= bits[:, :, k]
+        cols |= bits[:, k, :]
+    bits_box = bits.reshape(n, box_size, box_size, box_size, box_size)
+    boxes = bits_box[:, :, 0, :, 0].copy()
+    for k in range(1, size):
+        boxes |= bits_box[:, :, k // box_size, :, k % box_size]
+    return rows, cols, boxes
+
+
+def check_solutions(solutions: np.ndarray, box_size: int = 3) -> np.ndarray:
+    """True where the solution is a complete grid with every unit a permutation."""
+    size = box_size * box_size
+    in_range = ((solutions >= 1) & (solutions <= size)).all(axis=1)
+    full = (1 << size) - 1
+    rows, cols, boxes = _unit_masks(solutions.reshape(-1, size, size), box_size)
+    return (in_range & (rows == full).all(axis=1) & (cols == full).all(axis=1)
+            & (boxes == full).all(axis=(1, 2)))
+
+
+def check_consistency(puzzles: np.ndarray, solutions: np.ndarray) -> np.ndarray:
+    """True where every clue of the puzzle agrees with the stored solution."""
+    return ((puzzles == 0) | (puzzles == solutions)).all(axis=1)
+
+
+def propagate_singles(puzzles: np.ndarray, box_size: int = 3, max_rounds: int = 200) -> np.ndarray:
+    """Apply naked and hidden singles to all puzzles until nothing changes.
+
+    Returns the propagated grids. Puzzles that hit a contradiction simply
+    stop making progress and are left for the search-based checker.
+    """
+    size = box_size * box_size
+    full = (1 << size) - 1
+    b = box_size
+
+    grid = puzzles.reshape(-1, size, size).copy()
+    active = np.flatnonzero((grid == 0).any(axis=(1, 2)))
+    for _ in range(max_rounds):
+        if active.size == 0:
+            break
+        g = grid[active]
+        n = g.shape[0]
+        rows, cols, boxes = _unit_masks(g, box_size)
+        box_used = np.repeat(np.repeat(boxes, b, axis=1), b, axis=2)
+        cand = np.where(g == 0, ~(rows[:, :, None] | cols[:, None, :] | box_used) & full, 0)
+        cand = cand.astype(rows.dtype)
+
+        # naked singles
+        placed = np.where((cand & (cand - 1)) == 0, cand, 0)
+
+        # hidden singles: digits seen exactly once among a unit's candidates.
+        # Each unit type is walked position by position on a view of cand.
+        cand_box = cand.reshape(n, b, b, b, b)
+        placed_box = placed.reshape(n, b, b, b, b)
+        unit_views = (
+            (lambda k: cand[:, :, k], lambda k: placed[:, :, k], rows),
+            (lambda k: cand[:, k, :], lambda k: placed[:, k, :], cols),
+            (lambda k: cand_box[:, :, k // b, :, k % b], lambda k: placed_box[:, :, k // b, :, k % b], boxes),
+        )
+        for cand_at, placed_at, used in unit_views:
+            once = np.zeros_like(used)
+            twice = np.zeros_like(used)
+            for k in range(size):
+                m = cand_at(k)
+                twice |= once & m
+                once |= m
+            hidden = once & ~twice & ~used
+            if not hidden.any():
+                continue
+            for k in range(size):
+                hit = cand_at(k) & hidden
+                target = placed_at(k)
+                # keep the lowest hidden digit of the cell
+                np.copyto(target, hit & (~hit + 1), where=hit != 0)
+
+        placed = _bits_to_digits(placed, size)
+        progress = (placed != 0).any(axis=(1, 2))
+        g = np.where(placed != 0, placed, g)
+        grid[active] = g
+        active = active[progress & (g == 0).any(axis=(1, 2))]
+    return grid.reshape(puzzles.shape)
+
+
+def batch_verify(puzzle_values: list, solution_values: list, box_size: int = 3) -> dict:
+    """Run the vectorized stage over a corpus.
+
+    Returns boolean arrays keyed by solution_valid, consistent, settled
+    (solved uniquely by singles) and matches_solution (settled grid equals
+    the stored solution).
+    """
+    puzzles = grids_to_array(puzzle_values, box_size)
+    solutions = grids_to_array(solution_values, box_size)
+
+    solution_valid = check_solutions(solutions, box_size)
+    consistent = check_consistency(puzzles, solutions)
+
+    propagated = propagate_singles(puzzles, box_size)
+    settled = (propagated != 0).all(axis=1) & check_solutions(propagated, box_size) \
+        & check_consistency(puzzles, propagated)
+    matches = settled & (propagated == solutions).all(axis=1)
+
+    return {
+        'solution_valid': solution_valid,
+        'consistent': consistent,
+        'settled': settled,
+        'matches_solution': matches,
+    }
@@ -0,0 +1,335 @@
+"""Reproducible benchmarks for the puzzle generators and solver backends.
+
+Usage: python benchmark.py corpus [--per-difficulty N] [--seed S]
+       python benchmark.py run [--out results.json] [--quick] [--solvers ...]
+       python benchmark.py compare <baseline.json> <current.json> [--threshold 0.2]
+
+The corpus (benchmarks/corpus.json) holds fixed-seed puzzles for every
+difficulty plus well-known pathological low-clue grids, so solver numbers
+stay comparable even when the generators change. `run` measures:
+
+  generate/<generator>/<difficulty>  puzzles/sec of generate_puzzle
+  solve/<solver>/<group>             solve() latency percentiles
+  unique/<solver>/<group>            count_solutions(limit=2) latency percentiles
+
+with the tracemalloc peak of each case, and writes machine-readable JSON.
+`compare` flags slowdowns beyond --threshold against a stored baseline and
+exits with status 1 when any are found.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import signal
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from generate_fast import FastSudokuGenerator
+from generate_puzzles import SudokuGenerator
+from puzzle_codec import decode_grid, encode_grid
+from solvers import SOLVERS, get_solver
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'corpus.json')
+
+# Hard or adversarial published grids, all with a unique solution.
+# anti_backtrack is built against naive left-to-right search.
+PATHOLOGICAL = {
+    'ai_escargot': '100007090030020008009600500005300900010080002600004000300000010040000007007000300',
+    'easter_monster': '100000002090400050006000700050903000000070000000850040700000600030009080002000001',
+    'golden_nugget': '000000039000001005003050800008090006070002000100400000009080050020000600400700000',
+    'platinum_blonde': '000000012000000003002300400001800005060070800000009000008500000900040500470006000',
+    'seventeen_clue': '000000010400000000020000000000050407008000300001090000300400200050100000000806000',
+    'anti_backtrack': '000000000000003085001020000000507000004000100090000000500000073002010000000040009',
+}
+
+# generator name -> (class, solver backend)
+GENERATORS = {
+    'fast-bitmask': (FastSudokuGenerator, 'bitmask'),
+    'fast-dlx': (FastSudokuGenerator, 'dlx'),
+    'classic-backtrack': (SudokuGenerator, 'backtrack'),
+}
+
+# compared metrics: name -> True when higher is worse
+METRICS = {
+    'p50_ms': True,
+    'p90_ms': True,
+    'p99_ms': True,
+    'puzzles_per_sec': False,
+    'peak_kb': True,
+    'timeouts': True,
+}
+# latencies below this are dominated by timer noise and never flagged
+NOISE_FLOOR_MS = 0.05
+
+
+class BenchmarkTimeout(Exception):
+    pass
+
+
+@contextmanager
+def time_limit(seconds: float):
+    """Raise BenchmarkTimeout after seconds (no-op where SIGALRM is unavailable)."""
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+
+    def handler(signum, frame):
+        raise BenchmarkTimeout()
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def build_corpus(per_difficulty: int = 10, seed: int = 2024) -> dict:
+    """Dig a fixed-seed corpus with the bitmask generator and add the pathological grids."""
+    generator = FastSudokuGenerator('bitmask')
+    random.seed(seed)
+    puzzles = []
+    for difficulty in DIFFICULTIES:
+        for i in range(per_difficulty):
+            puzzle, _ = generator.generate_puzzle(difficulty)
+            puzzles.append({'id': f"{difficulty}_{i + 1:03d}", 'group': difficulty,
+                            'puzzle': encode_grid(puzzle)})
+    for name, grid in PATHOLOGICAL.items():
+        puzzles.append({'id': name, 'group': 'pathological', 'puzzle': grid})
+    return {'seed': seed, 'per_difficulty': per_difficulty, 'puzzles': puzzles}
+
+
+def load_corpus(path: str) -> dict:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Corpus not found: {path} (create it with `benchmark.py corpus`)")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def measure_peak_kb(fn, items: list) -> float:
+    """tracemalloc peak (KiB) while running fn over items; timed runs stay untraced."""
+    tracemalloc.start()
+    try:
+        for item in items:
+            fn(item)
+    except BenchmarkTimeout:
+        pass
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def bench_latency(fn, grids: list, repeat: int, timeout: float) -> dict:
+    """Best-of-repeat latency per grid, summarized as percentiles in milliseconds."""
+    samples = []
+    timeouts = 0
+    for grid in grids:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                with time_limit(timeout):
+                    fn(grid)
+            except BenchmarkTimeout:
+                timeouts += 1
+                best = None
+                break
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        if best is not None:
+            samples.append(best * 1000)
+    samples.sort()
+
+    def guarded(grid):
+        with time_limit(timeout):
+            fn(grid)
+
+    return {
+        'kind': 'latency',
+        'count': len(samples),
+        'timeouts': timeouts,
+        'p50_ms': round(percentile(samples, 50), 4),
+        'p90_ms': round(percentile(samples, 90), 4),
+        'p99_ms': round(percentile(samples, 99), 4),
+        'max_ms': round(samples[-1], 4) if samples else 0.0,
+        'mean_ms': round(sum(samples) / len(samples), 4) if samples else 0.0,
+        'peak_kb': measure_peak_kb(guarded, grids[:3]),
+    }
+
+
+def bench_generation(name: str, difficulty: str, count: int, seed: int, timeout: float) -> dict:
+    cls, solver = GENERATORS[name]
+    generator = cls(solver)
+    random.seed(seed)
+    produced = 0
+    timed_out = False
+    start = time.perf_counter()
+    try:
+        with time_limit(timeout):
+            for _ in range(count):
+                generator.generate_puzzle(difficulty)
+                produced += 1
+    except BenchmarkTimeout:
+        timed_out = True
+    elapsed = time.perf_counter() - start
+
+    random.seed(seed)
+    peak_kb = measure_peak_kb(lambda _: generator.generate_puzzle(difficulty), [None])
+    return {
+        'kind': 'throughput',
+        'count': produced,
+        'timeouts': int(timed_out),
+        'seconds': round(elapsed, 4),
+        'puzzles_per_sec': round(produced / elapsed, 3) if elapsed > 0 else 0.0,
+        'peak_kb': peak_kb,
+    }
+
+
+def run_benchmarks(corpus_path: str, solvers: list, generators: list, gen_count: int,
+                   repeat: int, timeout: float, seed: int) -> dict:
+    corpus = load_corpus(corpus_path)
+    groups: dict[str, list] = {}
+    for p in corpus['puzzles']:
+        groups.setdefault(p['group'], []).append(decode_grid(p['puzzle']))
+
+    results = {}
+    for solver_name in solvers:
+        engine = get_solver(solver_name)
+        for group, grids in groups.items():
+            key = f"solve/{solver_name}/{group}"
+            results[key] = bench_latency(engine.solve, grids, repeat, timeout)
+            print(f"  {key}: p50 {results[key]['p50_ms']} ms, p99 {results[key]['p99_ms']} ms"
+                  f", timeouts {results[key]['timeouts']}")
+            key = f"unique/{solver_name}/{group}"
+            results[key] = bench_latency(lambda g: engine.count_solutions(g, 2), grids, repeat, timeout)
+            print(f"  {key}: p50 {results[key]['p50_ms']} ms, p99 {results[key]['p99_ms']} ms"
+                  f", timeouts {results[key]['timeouts']}")
+
+    for name in generators:
+        for difficulty in DIFFICULTIES:
+            key = f"generate/{name}/{difficulty}"
+            results[key] = bench_generation(name, difficulty, gen_count, seed, timeout * gen_count)
+            print(f"  {key}: {results[key]['puzzles_per_sec']} puzzles/sec")
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'corpus': os.path.relpath(corpus_path),
+            'corpus_seed': corpus.get('seed'),
+            'generation_seed': seed,
+            'generation_count': gen_count,
+            'repeat': repeat,
+            'timeout_sec': timeout,
+        },
+        'benchmarks': results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.2) -> list:
+    """Return (key, metric, baseline, current, ratio) for every regression beyond threshold."""
+    regressions = []
+    for key, base in baseline['benchmarks'].items():
+        cur = current['benchmarks'].get(key)
+        if cur is None:
+            continue
+        for metric, higher_is_worse in METRICS.items():
+            if metric not in base or metric not in cur:
+                continue
+            b, c = base[metric], cur[metric]
+            if metric == 'timeouts':
+                if c > b:
+                    regressions.append((key, metric, b, c, float('inf')))
+                continue
+            if metric.endswith('_ms') and max(b, c) < NOISE_FLOOR_MS:
+                continue
+            if higher_is_worse:
+                ratio = c / b if b else (float('inf') if c else 1.0)
+            else:
+                ratio = b / c if c else (float('inf') if b else 1.0)
+            if ratio > 1 + threshold:
+                regressions.append((key, metric, b, c, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark puzzle generators and solver backends')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_corpus = sub.add_parser('corpus', help='Create the fixed-seed benchmark corpus')
+    p_corpus.add_argument('--out', default=DEFAULT_CORPUS, help='Corpus path')
+    p_corpus.add_argument('--per-difficulty', type=int, default=10, help='Puzzles per difficulty')
+    p_corpus.add_argument('--seed', type=int, default=2024, help='Corpus seed')
+
+    p_run = sub.add_parser('run', help='Run the benchmarks and write JSON results')
+    p_run.add_argument('--corpus', default=DEFAULT_CORPUS, help='Corpus path')
+    p_run.add_argument('--out', '-o', default='benchmark_results.json', help='Results path')
+    p_run.add_argument('--solvers', nargs='+', choices=sorted(SOLVERS), default=sorted(SOLVERS),
+                       help='Solver backends to measure')
+    p_run.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS),
+                       help='Generators to measure')
+    p_run.add_argument('--gen-count', type=int, default=10, help='Puzzles generated per difficulty')
+    p_run.add_argument('--repeat', type=int, default=3, help='Timed runs per puzzle (best is kept)')
+    p_run.add_argument('--timeout', type=float, default=10.0, help='Seconds allowed per measured call')
+    p_run.add_argument('--seed', type=int, default=7, help='Generation seed')
+    p_run.add_argument('--quick', action='store_true', help='Small run for CI (2 puzzles, 1 repeat)')
+
+    p_cmp = sub.add_parser('compare', help='Compare results against a baseline')
+    p_cmp.add_argument('baseline', help='Baseline results JSON')
+    p_cmp.add_argument('current', help='Current results JSON')
+    p_cmp.add_argument('--threshold', type=float, default=0.2,
+                       help='Allowed relative slowdown before a metric is flagged (0.2 = 20%%)')
+
+    args = parser.parse_args()
+
+    if args.command == 'corpus':
+        corpus = build_corpus(args.per_difficulty, args.seed)
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(corpus, f, ensure_ascii=False, indent=2)
+        print(f"Wrote {len(corpus['puzzles'])} puzzles to {args.out}")
+
+    elif args.command == 'run':
+        if args.quick:
+            args.gen_count, args.repeat = 2, 1
+        print(f"Running benchmarks on {args.corpus}...")
+        results = run_benchmarks(args.corpus, args.solvers, args.generators, args.gen_count,
+                                 args.repeat, args.timeout, args.seed)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results written to: {args.out}")
+
+    else:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        for key, metric, b, c, ratio in regressions:
+            print(f"REGRESSION {key} {metric}: {b} -> {c} ({ratio:.2f}x)")
+        missing = sorted(set(baseline['benchmarks']) - set(current['benchmarks']))
+        for key in missing:
+            print(f"missing in current: {key}")
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
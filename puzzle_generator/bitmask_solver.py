@@ -0,0 +1,329 @@
+"""
+ビットマスク候補エンジン
+行・列・ブロックの使用済み数字を整数ビットマスクで保持し、
+配置・取り消しのたびに差分更新する。分岐の前に naked single /
+hidden single の制約伝播を行うことで探索木を小さくする。
+cache に TranspositionTable（transposition.py）を設定すると、
+解の数え上げで伝播後の部分盤面の結果を使い回す。
+"""
+import random
+import time
+
+from transposition import AT_LEAST_ONE, MANY, NONE, ONE
+
+# random_grid の1試行あたりの探索ノード数の上限（25x25 でも 99% の試行が収まる）
+RANDOM_GRID_NODES = 2000
+
+
+class BitmaskSolver:
+    """ビットマスクによる解の数え上げクラス
+
+    数字 d はビット (d - 1) で表す。盤面は内部的に長さ size*size の
+    一次元リストとして扱う。
+    """
+
+    # 探索の実装を変えたら上げる（検証キャッシュが無効になる）
+    VERSION = 1
+
+    def __init__(self, box_size: int = 3):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        self.num_cells = self.size * self.size
+        self.full_mask = (1 << self.size) - 1
+        # SearchStats を設定すると探索コストを計測する（search_stats.py）
+        self.stats = None
+        # TranspositionTable を設定すると数え上げの部分木の結果を覚える
+        self.cache = None
+        # 探索ノード数の上限。超えたら打ち切り、解が limit 個あったものとして返す
+        # （一意性チェックでは「一意と言い切れない」側に倒れる）
+        self.node_limit = None
+        # node_limit で打ち切った探索の回数
+        self.capped = 0
+
+        size = self.size
+        self.row_of = [c // size for c in range(self.num_cells)]
+        self.col_of = [c % size for c in range(self.num_cells)]
+        self.box_of = [
+            (r // box_size) * box_size + (c // box_size)
+            for r, c in zip(self.row_of, self.col_of)
+        ]
+
+        # 行・列・ブロックの順に全ユニットを並べる
+        rows = [[r * size + c for c in range(size)] for r in range(size)]
+        cols = [[r * size + c for r in range(size)] for c in range(size)]
+        boxes = [[] for _ in range(size)]
+        for cell in range(self.num_cells):
+            boxes[self.box_of[cell]].append(cell)
+        self.units = rows + cols + boxes
+
+    def count_solutions(self, board: list[list[int]], limit: int = 2) -> int:
+        """解の数を数える（limit 個見つけたら打ち切り）"""
+        count, _ = self._search(board, limit, cache=self.cache)
+        return count
+
+    def solve(self, board: list[list[int]], rng: random.Random | None = None) -> list[list[int]] | None:
+        """解を1つ求めて新しい盤面として返す（解なしなら None）
+
+        rng を渡すと分岐時の候補順をシャッフルし、ランダムな解を返す。
+        """
+        count, solution = self._search(board, 1, rng)
+        return solution if count else None
+
+    def random_grid(self, rng: random.Random, restart_nodes: int | None = RANDOM_GRID_NODES) -> list[list[int]]:
+        """空の盤面を乱択付きで解き、ランダムな完成盤を返す
+
+        乱択の求解はまれに行き詰まって桁違いに長引く（25x25 で数分）。
+        restart_nodes ノードで打ち切った試行は捨て、rng の続きで解き直す。
+        打ち切りは capped には数えない。
+        """
+        empty = [[0] * self.size for _ in range(self.size)]
+        node_limit, capped = self.node_limit, self.capped
+        self.node_limit = restart_nodes
+        try:
+            while True:
+                grid = self.solve(empty, rng)
+                if grid is not None:
+                    return grid
+        finally:
+            self.node_limit, self.capped = node_limit, capped
+
+    def has_other_solution(self, board: list[list[int]], row: int, col: int, value: int) -> bool:
+        """(row, col) が value 以外になる解が存在するか
+
+        既知の解があるときの一意性チェック用。2つ目の解を探し回る代わりに
+        「このセルだけ value を禁止した盤面」を1回探索するだけで済む。
+        singles で value が強制されるセルは伝播の段階で即座に矛盾する。
+        """
+        banned = {row * self.size + col: 1 << (value - 1)}
+        count, _ = self._search(board, 1, banned=banned, cache=self.cache)
+        return count > 0
+
+    def _search(self, board: list[list[int]], limit: int,
+                rng: random.Random | None = None,
+                banned: dict[int, int] | None = None,
+                cache=None) -> tuple[int, list[list[int]] | None]:
+        """探索本体。(見つかった解の数, 最初の解) を返す
+
+        banned: {セル番号: 禁止する数字のビット} で候補から除外する
+        cache: 置換表。使うと最初の解は返らない（解の数だけ必要なとき用）
+        """
+        stats = self.stats
+        start = time.perf_counter() if stats is not None else 0.0
+        node_limit = self.node_limit
+        size = self.size
+        full = self.full_mask
+        allowed = [full] * self.num_cells
+        if banned:
+            for cell, bit in banned.items():
+                allowed[cell] &= ~bit
+        row_of, col_of, box_of = self.row_of, self.col_of, self.box_of
+        units = self.units
+        cell_range = range(self.num_cells)
+
+        grid = [0] * self.num_cells
+        rows = [0] * size
+        cols = [0] * size
+        boxes = [0] * size
+        cand = [0] * self.num_cells
+        trail: list[int] = []
+
+        # 初期盤面のマスクを構築（矛盾していれば解なし）
+        for r in range(size):
+            for c in range(size):
+                v = board[r][c]
+                if not v:
+                    continue
+                if v < 0 or v > size:
+                    return 0, None
+                bit = 1 << (v - 1)
+                b = box_of[r * size + c]
+                if (rows[r] | cols[c] | boxes[b]) & bit:
+                    return 0, None
+                grid[r * size + c] = bit
+                rows[r] |= bit
+                cols[c] |= bit
+                boxes[b] |= bit
+
+        count = 0
+        first: list[int] | None = None
+        nodes = backtracks = propagations = 0
+
+        def place(cell: int, bit: int) -> None:
+            grid[cell] = bit
+            rows[row_of[cell]] |= bit
+            cols[col_of[cell]] |= bit
+            boxes[box_of[cell]] |= bit
+            trail.append(cell)
+
+        def undo(mark: int) -> None:
+            while len(trail) > mark:
+                cell = trail.pop()
+                bit = grid[cell]
+                grid[cell] = 0
+                rows[row_of[cell]] ^= bit
+                cols[col_of[cell]] ^= bit
+                boxes[box_of[cell]] ^= bit
+
+        def propagate() -> bool:
+            """naked / hidden single を不動点まで適用。矛盾なら False"""
+            while True:
+                placed = False
+                # naked single: 候補が1つしかないセル
+                for cell in cell_range:
+                    if grid[cell]:
+                        cand[cell] = 0
+                        continue
+                    m = allowed[cell] & ~(rows[row_of[cell]] | cols[col_of[cell]] | boxes[box_of[cell]])
+                    if not m:
+                        return False
+                    if not m & (m - 1):
+                        place(cell, m)
+                        placed = True
+                        m = 0
+                    cand[cell] = m
+                if placed:
+                    continue
+
+                # hidden single: ユニット内で置ける場所が1つしかない数字
+                for unit in units:
+                    once = twice = used = 0
+                    for cell in unit:
+                        m = cand[cell]
+                        twice |= once & m
+                        once |= m
+                        used |= grid[cell]
+                    need = full & ~used
+                    if need & ~once:
+                        return False
+                    hidden = need & ~twice
+                    while hidden:
+                        bit = hidden & -hidden
+                        hidden ^= bit
+                        for cell in unit:
+                            if cand[cell] & bit:
+                                break
+                        # 同じパス内で先に置いた数字と衝突していないか再確認
+                        if grid[cell] or (rows[row_of[cell]] | cols[col_of[cell]] | boxes[box_of[cell]]) & bit:
+                            return False
+                        place(cell, bit)
+                        placed = True
+                if not placed:
+                    return True
+
+        if cache is not None:
+            # 置換表のキーを配置・取り消しのたびに差分更新する
+            zobrist, zobrist_banned = cache.keys_for(self.num_cells, size)
+            key = 0
+            for cell in cell_range:
+                if grid[cell]:
+                    key ^= zobrist[cell][grid[cell]]
+            banned_keys = [(cell, zobrist_banned[cell][bit]) for cell, bit in (banned or {}).items()]
+
+            def place(cell: int, bit: int) -> None:
+                nonlocal key
+                grid[cell] = bit
+                rows[row_of[cell]] |= bit
+                cols[col_of[cell]] |= bit
+                boxes[box_of[cell]] |= bit
+                trail.append(cell)
+                key ^= zobrist[cell][bit]
+
+            def undo(mark: int) -> None:
+                nonlocal key
+                while len(trail) > mark:
+                    cell = trail.pop()
+                    bit = grid[cell]
+                    grid[cell] = 0
+                    rows[row_of[cell]] ^= bit
+                    cols[col_of[cell]] ^= bit
+                    boxes[box_of[cell]] ^= bit
+                    key ^= zobrist[cell][bit]
+
+        def search() -> None:
+            nonlocal count, first, nodes, backtracks, propagations
+            nodes += 1
+            if node_limit is not None and nodes > node_limit:
+                raise _NodeLimit()
+            mark = len(trail)
+            if not propagate():
+                backtracks += 1
+                undo(mark)
+                return
+            propagations += len(trail) - mark
+
+            if cache is not None:
+                # 禁止された候補は、そのセルが埋まっていれば部分木に関係しない
+                node_key = key
+                for cell, k in banned_keys:
+                    if not grid[cell]:
+                        node_key ^= k
+                known = cache.get(node_key)
+                if known is not None:
+                    # 1以上 / 2以上 は残りの必要数がそれ以下のときだけ使える
+                    need = limit - count
+                    if known == NONE or known == ONE or need <= abs(known):
+                        count += min(abs(known), need)
+                        undo(mark)
+                        return
+                before = count
+
+            # MRV: 候補が最も少ない空きセルで分岐
+            best = -1
+            best_n = size + 1
+            for cell in cell_range:
+                m = cand[cell]
+                if m:
+                    n = m.bit_count()
+                    if n < best_n:
+                        best, best_n = cell, n
+                        if n == 2:
+                            break
+
+            if best < 0:
+                count += 1
+                if first is None:
+                    first = [bit.bit_length() for bit in grid]
+                undo(mark)
+                return
+
+            m = cand[best]
+            bits = []
+            while m:
+                bit = m & -m
+                m ^= bit
+                bits.append(bit)
+            if rng is not None:
+                rng.shuffle(bits)
+
+            for bit in bits:
+                pos = len(trail)
+                place(best, bit)
+                search()
+                undo(pos)
+                if count >= limit:
+                    break
+            if cache is not None:
+                found = count - before
+                if count < limit:
+                    # 探索しきったので解の数が確定している
+                    cache.put(node_key, min(found, MANY))
+                else:
+                    cache.put(node_key, MANY if found >= 2 else AT_LEAST_ONE)
+            undo(mark)
+
+        try:
+            search()
+        except _NodeLimit:
+            count, first = limit, None
+            self.capped += 1
+        if stats is not None:
+            stats.record(nodes, backtracks, propagations, time.perf_counter() - start)
+
+        solution = None
+        if first is not None:
+            solution = [first[r * size:(r + 1) * size] for r in range(size)]
+        return count, solution
+
+
+class _NodeLimit(Exception):
+    pass
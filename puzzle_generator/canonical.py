@@ -0,0 +1,277 @@
+"""
+数独パズルの標準形（canonical form）と重複インデックス
+転置・バンド／スタックの入れ替え・バンド内の行／スタック内の列の入れ替え・
+数字の置換で互いに移り合うパズルを同一視し、その中で辞書順最小の
+表現を標準形とする。数字は出現順に 1, 2, 3, ... と振り直す。
+
+全対称（約 33 億通り × 数字の置換）を総当たりせず、1行ずつ確定させる
+ビーム探索で求める。列の並びは最初から列挙せず、区別の付かない列をまとめて
+持ち、行を置くたびに細かくする。
+  - 状態は（行の並び, 列の並び, 数字の対応）。列の並びは「グループ」の列で、
+    グループはそれまでの行がすべて 0 で入れ替え自由なスタックの組、または
+    1つのスタック。スタックは「ブロック」（それまで 0 だけの入れ替え自由な列の組、
+    または1列）の列。
+  - 次の行は各ブロックの中で 0、番号付きの数字（小さい順）、まだ番号の無い数字の
+    順に並べ、グループの中ではスタックをその並びの小さい順に並べたときに最小になる。
+    枝分かれするのは、新しく番号を振る数字の並び（同じブロック内、または並びが
+    同じスタックの間）だけ。
+  - 各行で出力が最小になる状態だけを残す（同点はすべて残す）。出力の途中で
+    それまでの最小より大きいと分かった行は、列の並べ方を展開する前に捨てる。
+  - 1行目の出力は 0 の並びだけで決まるので、それが最小になる行だけから始める。
+    列の並びが確定した状態は枝分かれしないので、数字を振り直すだけで済ませる。
+1行目の 0 の並びで列を全部並べ替えてから絞る方法より、0 の多い疎な盤面ほど
+状態が少なくて済む。25x25 は同点の状態が多すぎるので扱わない
+（MAX_CANONICAL_BOX_SIZE）。
+"""
+import hashlib
+import os
+from itertools import permutations, product
+
+from puzzle_codec import CELL_CHARS
+
+# 標準形の定義を変えたら上げる（重複インデックス・検証キャッシュのキーが変わる）
+CANONICAL_VERSION = 1
+# 標準形を求められるブロックの一辺の上限
+MAX_CANONICAL_BOX_SIZE = 4
+
+
+def _arrange_row(row: tuple, groups: tuple, labels: list[int], label: int, best: tuple | None):
+    """列の並び groups の中で row の出力を最小にする
+
+    (出力, 区間ごとの並べ替え) を返す。出力が best より大きいと分かった時点で None。
+    区間の並べ替えは _segment_options で並べ方の候補に展開する。
+    """
+    fresh_token = len(labels)
+    out = []
+    segments = []
+    for group in groups:
+        # スタックごとの最小の並び。新しい番号は fresh_token からの仮の番号で比べる
+        keyed = []
+        for stack in group:
+            key = []
+            parts = []
+            fresh_count = 0
+            for block in stack:
+                if len(block) == 1:
+                    # 確定した列（大半のブロック）は振り分けだけ
+                    c = block[0]
+                    v = row[c]
+                    if not v:
+                        key.append(0)
+                        parts.append((block, [], []))
+                    elif labels[v]:
+                        key.append(labels[v])
+                        parts.append(((), [block], []))
+                    else:
+                        key.append(fresh_token + fresh_count)
+                        fresh_count += 1
+                        parts.append(((), [], [c]))
+                    continue
+                zeros, known, fresh = [], [], []
+                for c in block:
+                    v = row[c]
+                    if not v:
+                        zeros.append(c)
+                    elif labels[v]:
+                        known.append((labels[v], c))
+                    else:
+                        fresh.append(c)
+                if known:
+                    known.sort()
+                key.extend([0] * len(zeros))
+                key.extend(k for k, _ in known)
+                key.extend(range(fresh_token + fresh_count, fresh_token + fresh_count + len(fresh)))
+                fresh_count += len(fresh)
+                parts.append((tuple(zeros), [(c,) for _, c in known], fresh))
+            keyed.append((key, fresh_count, stack, parts))
+        if len(keyed) > 1:
+            keyed.sort(key=lambda item: item[0])
+
+        i = 0
+        while i < len(keyed):
+            key, fresh_count = keyed[i][0], keyed[i][1]
+            j = i + 1
+            while j < len(keyed) and keyed[j][0] == key:
+                j += 1
+            if fresh_count:
+                for _ in range(j - i):
+                    out.extend(v if v < fresh_token else label + v - fresh_token for v in key)
+                    label += fresh_count
+            else:
+                out.extend(key * (j - i))
+            segments.append((not any(key), keyed[i:j]))
+            i = j
+        # 現在の最小より大きいと分かれば残りのグループは見ない
+        if best is not None:
+            n = len(out)
+            if tuple(out) > best[:n]:
+                return None
+    return tuple(out), segments
+
+
+def _segment_options(all_zero: bool, tied: list) -> list:
+    """同点のスタックの区間を並べる候補 [(区間のグループ, 新しく番号を振る列の順)]"""
+    if all_zero:
+        # 0 だけのスタックは入れ替え自由なまま1つのグループに残す
+        return [((tuple(stack for _, _, stack, _ in tied),), ())]
+    # 同点のスタックの順と、ブロック内の新しい数字の順で枝分かれする
+    options = []
+    for order in permutations(tied):
+        for inner in product(*(_stack_options(parts) for _, _, _, parts in order)):
+            options.append((tuple((stack,) for stack, _ in inner), sum((fresh for _, fresh in inner), ())))
+    return options
+
+
+def _stack_options(parts: list) -> list:
+    """スタックの細分化の候補 [(ブロックの並び, 新しく番号を振る列の順)]"""
+    if not any(fresh for _, _, fresh in parts):
+        blocks = []
+        for zeros, known, _ in parts:
+            if zeros:
+                blocks.append(zeros)
+            blocks.extend(known)
+        return [(tuple(blocks), ())]
+    options = []
+    for fresh_orders in product(*(permutations(fresh) for _, _, fresh in parts)):
+        blocks = []
+        for (zeros, known, _), fresh in zip(parts, fresh_orders):
+            if zeros:
+                blocks.append(zeros)
+            blocks.extend(known)
+            blocks.extend((c,) for c in fresh)
+        options.append((tuple(blocks), sum(fresh_orders, ())))
+    return options
+
+
+def _zero_profile(row: tuple, box_size: int) -> tuple:
+    """スタックごとの 0 の数（降順）。大きいほど1行目として辞書順で小さくなる"""
+    b = box_size
+    return tuple(sorted((row[s:s + b].count(0) for s in range(0, b * b, b)), reverse=True))
+
+
+def canonical_form(grid: list[list[int]], box_size: int = 3) -> str:
+    """パズルの標準形を encode_grid と同じ文字列形式で返す"""
+    if box_size > MAX_CANONICAL_BOX_SIZE:
+        raise ValueError(f"Canonical forms are limited to box size {MAX_CANONICAL_BOX_SIZE}")
+    size = box_size * box_size
+    b = box_size
+    variants = [tuple(tuple(r) for r in grid)]
+    variants.append(tuple(zip(*variants[0])))
+
+    # 1行目の出力は 0 の並びだけで決まるので、それが最小の行だけを候補にする
+    profiles = [[_zero_profile(row, b) for row in g] for g in variants]
+    best_profile = max(max(p) for p in profiles)
+    firsts = {id(g): [r for r in range(size) if p[r] == best_profile] for g, p in zip(variants, profiles)}
+
+    # 状態: (盤面, 使った行, 列の並び, 数字の対応, 次に振る番号)
+    # 最初は全スタックが入れ替え自由な1グループで、各スタックは1ブロック
+    stacks = tuple((tuple(range(s * b, (s + 1) * b)),) for s in range(b))
+    states = [(g, (), (stacks,), [0] * (size + 1), 1) for g in variants]
+    result = []
+
+    for k in range(size):
+        best = None
+        next_states = []
+        for g, used, groups, labels, label in states:
+            if not k:
+                rows = firsts[id(g)]
+            elif k % b:
+                band = used[-1] // b
+                rows = [r for r in range(band * b, (band + 1) * b) if r not in used]
+            else:
+                done = {r // b for r in used}
+                rows = [r for r in range(size) if r // b not in done]
+            if all(len(group) == 1 and all(len(block) == 1 for block in group[0]) for group in groups):
+                # 列の並びが確定した状態は枝分かれしないので、そのまま並べる
+                order = [block[0] for group in groups for block in group[0]]
+                for r in rows:
+                    row = g[r]
+                    new_labels = labels
+                    new_label = label
+                    out = []
+                    for c in order:
+                        v = row[c]
+                        if v and not new_labels[v]:
+                            if new_labels is labels:
+                                new_labels = labels[:]
+                            new_labels[v] = new_label
+                            new_label += 1
+                        out.append(new_labels[v])
+                    out = tuple(out)
+                    if best is not None and out > best:
+                        continue
+                    if best is None or out < best:
+                        best, next_states = out, []
+                    next_states.append((g, used + (r,), groups, new_labels, new_label))
+                continue
+            for r in rows:
+                row = g[r]
+                arranged = _arrange_row(row, groups, labels, label, best)
+                if arranged is None:
+                    continue
+                out, segments = arranged
+                if best is None or out < best:
+                    best, next_states = out, []
+                for choice in product(*(_segment_options(*segment) for segment in segments)):
+                    new_labels = labels[:]
+                    new_label = label
+                    new_groups = []
+                    for part, fresh in choice:
+                        new_groups.extend(part)
+                        for c in fresh:
+                            new_labels[row[c]] = new_label
+                            new_label += 1
+                    next_states.append((g, used + (r,), tuple(new_groups), new_labels, new_label))
+        states = next_states
+        result.extend(best)
+
+    return ''.join(CELL_CHARS[v] for v in result)
+
+
+def canonical_key(grid: list[list[int]], box_size: int = 3) -> str:
+    """標準形の 64 ビットハッシュ（16 桁の16進文字列）"""
+    form = canonical_form(grid, box_size)
+    return hashlib.blake2b(form.encode('ascii'), digest_size=8).hexdigest()
+
+
+class CanonicalIndex:
+    """標準形ハッシュのディスク上インデックス
+
+    1行に1キーの追記専用テキストファイル。読み込み時にメモリ上の集合に
+    展開し、add したキーは save() でまとめて追記する。
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.keys: set[str] = set()
+        self._pending: list[str] = []
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='ascii') as f:
+                self.keys.update(line.strip() for line in f if line.strip())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str) -> bool:
+        """キーを追加する。既に存在すれば False"""
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        self._pending.append(key)
+        return True
+
+    def save(self) -> int:
+        """未保存のキーをファイルに追記し、その数を返す"""
+        if not self.path or not self._pending:
+            return 0
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='ascii') as f:
+            f.write(''.join(key + '\n' for key in self._pending))
+            f.flush()
+            os.fsync(f.fileno())
+        saved = len(self._pending)
+        self._pending = []
+        return saved
@@ -0,0 +1,37 @@
+"""Convert a puzzles.json between the nested and compact layouts.
+
+Usage: python convert_puzzles.py <input> [output] [--to compact|nested] [--no-compress]
+If output is omitted, the input file is rewritten in place.
+"""
+import argparse
+import json
+import os
+
+from puzzle_codec import LAYOUTS, write_puzzles
+
+
+def convert_puzzles(input_path: str, output_path: str, layout: str = 'compact', compress: bool = True):
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    with open(input_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    before = os.path.getsize(input_path)
+    count = write_puzzles(output_path, records, layout, compress)
+    after = os.path.getsize(output_path)
+    print(f"Converted {count} puzzles to {layout} layout: {before} -> {after} bytes")
+    for ext in ('.gz', '.br'):
+        if compress and os.path.exists(output_path + ext):
+            print(f"  {output_path + ext}: {os.path.getsize(output_path + ext)} bytes")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert puzzles.json between nested and compact layouts')
+    parser.add_argument('input', help='Path to puzzles.json')
+    parser.add_argument('output', nargs='?', default=None, help='Output path (defaults to input)')
+    parser.add_argument('--to', choices=LAYOUTS, default='compact', help='Target layout')
+    parser.add_argument('--compress', action=argparse.BooleanOptionalAction, default=True,
+                        help='Also write precompressed .gz/.br files')
+    args = parser.parse_args()
+    convert_puzzles(args.input, args.output or args.input, args.to, args.compress)
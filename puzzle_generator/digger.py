@@ -0,0 +1,286 @@
+"""
+時間予算付きの適応的な穴掘り
+完成盤から1セルずつ消して一意解を保つ「穴掘り」を、次の工夫で
+目標の削除数帯に確実に届かせる。
+  - 早期打ち切り: 残りの未試行セルを全部消せても帯の下限に届かない、
+    または貪欲な1周が下限から max_gap 以上足りない盤面はすぐ捨てる。
+  - 削除のやり直し: 行き詰まったら消したセルを1つ戻し、その代わりに
+    消せるようになったセルを探す（1つ戻して2つ消せれば前進、1つなら
+    同数のまま別の局面へ移る）。
+  - 予算: 一意性チェックの回数（max_checks、再現性あり）と
+    経過時間（deadline 秒、再現性なし）の両方で打ち切れる。
+  - 置換表: cache（transposition.py）を渡すと、1パズル分の一意性チェックの
+    間で部分盤面の解の数を使い回す。engine に付けるのはチェックの間だけで、
+    dig の終わりに空にする（完成盤の求解や後の検証には使わない）。ノード上限が無ければ
+    結果は変わらない（上限があると、置換表で済んだ部分木はノード数に入らない）。
+  - ノード上限: max_nodes を渡すと一意性チェック1回の探索をそのノード数で
+    打ち切り、そのセルは消さずに残す（一意解は崩れない）。16x16 以上では
+    一部のチェックだけが桁違いに重くなるので、これで1問の時間を抑える。
+諦めたときは理由を DigResult.reason に残し、最良の盤面を返す。
+"""
+import random
+import time
+
+# 諦めた理由
+REASON_BUDGET = 'check_budget'
+REASON_DEADLINE = 'deadline'
+# 1パズルあたりの一意性チェック回数の上限（bitmask で数秒）
+DEFAULT_MAX_CHECKS = 5000
+
+# 難易度ごとの削除数の帯（ブロックの一辺ごと）。16x16 / 25x25 は一意性チェックが
+# 急に重くなる手前（全セルの約 59% / 49%）までに収めている
+DIG_BANDS = {
+    3: {
+        'easy': (41, 45),
+        'medium': (46, 51),
+        'hard': (52, 56),
+        'expert': (57, 60),
+    },
+    4: {
+        'easy': (115, 127),
+        'medium': (128, 137),
+        'hard': (138, 145),
+        'expert': (146, 151),
+    },
+    5: {
+        'easy': (250, 270),
+        'medium': (271, 284),
+        'hard': (285, 297),
+        'expert': (298, 306),
+    },
+}
+# 一意性チェック1回あたりの探索ノード数の上限（None は無制限）
+CHECK_NODE_LIMITS = {3: None, 4: 50, 5: 30}
+# ノード上限のある盤面を掘れるソルバー（node_limit を持つのは bitmask だけ）
+LARGE_BOARD_SOLVER = 'bitmask'
+
+
+class DigResult:
+    """穴掘りの結果"""
+
+    __slots__ = ('puzzle', 'solution', 'removed', 'target', 'minimum', 'boards', 'swaps',
+                 'checks', 'seconds', 'reason', 'abandoned', 'cache', 'capped')
+
+    def __init__(self, puzzle, solution, removed: int, target: int, minimum: int):
+        self.puzzle = puzzle
+        self.solution = solution
+        self.removed = removed
+        self.target = target
+        self.minimum = minimum
+        self.boards = 0
+        self.swaps = 0
+        self.checks = 0
+        self.seconds = 0.0
+        # None なら帯に届いた。届かなかったときは REASON_*
+        self.reason = None
+        # 途中で捨てた盤面の数（理由別）
+        self.abandoned: dict[str, int] = {}
+        # 置換表を使ったときのこの穴掘り中のヒット・ミス数
+        self.cache: dict[str, int] | None = None
+        # ノード上限で打ち切ったチェックの数（上限なしなら None）
+        self.capped: int | None = None
+
+    @property
+    def in_band(self) -> bool:
+        return self.removed >= self.minimum
+
+    def to_record(self) -> dict:
+        """出力レコードに埋め込む形式"""
+        record = {
+            'removed': self.removed,
+            'target': self.target,
+            'boards': self.boards,
+            'swaps': self.swaps,
+            'checks': self.checks,
+            'ms': round(self.seconds * 1000, 3),
+            'gave_up': self.reason,
+            'abandoned': self.abandoned,
+        }
+        if self.cache is not None:
+            record['cache'] = self.cache
+        if self.capped is not None:
+            record['capped'] = self.capped
+        return record
+
+
+class _OutOfBudget(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+class AdaptiveDigger:
+    """予算付きで目標の削除数帯まで掘るクラス
+
+    engine は has_other_solution を持つソルバー（solvers.py）。
+    cache と max_nodes は engine が対応している（cache / node_limit 属性を持つ）
+    ときだけ使う。
+    """
+
+    def __init__(self, engine, size: int = 9, max_checks: int | None = DEFAULT_MAX_CHECKS,
+                 deadline: float | None = None, max_gap: int = 4, swap_tries: int = 30,
+                 cache=None, max_nodes: int | None = None):
+        self.engine = engine
+        self.cache = cache if hasattr(engine, 'cache') else None
+        self.max_nodes = max_nodes if hasattr(engine, 'node_limit') else None
+        # 上限が要るのに engine が打ち切れないときは、掘り始めたところで止める
+        self._unbounded = max_nodes is not None and self.max_nodes is None
+        self.size = size
+        self.max_checks = max_checks
+        self.deadline = deadline
+        self.max_gap = max_gap
+        self.swap_tries = swap_tries
+
+    def dig(self, new_solution, target: int, minimum: int, rng=None) -> DigResult:
+        """new_solution() で得た完成盤を掘り、removed >= minimum を目指す
+
+        target までは掘り進め、帯（minimum 以上）に届いた時点で予算が尽きても成功とする。
+        """
+        if self._unbounded:
+            raise ValueError(f"Digging {self.size}x{self.size} puzzles needs the {LARGE_BOARD_SOLVER} solver "
+                             f"({type(self.engine).__name__} has no node limit)")
+        rng = rng or random
+        started = time.perf_counter()
+        self._checks = 0
+        self._expires = started + self.deadline if self.deadline is not None else None
+        cache = self.cache
+        if cache is not None:
+            hits, misses = cache.hits, cache.misses
+        if self.max_nodes is not None:
+            capped = self.engine.capped
+        best = None
+        boards = swaps = 0
+        abandoned: dict[str, int] = {}
+        reason = None
+        try:
+            while True:
+                boards += 1
+                state = _Board(self, new_solution(), rng)
+                state.greedy(target, minimum)
+                if state.removed_count >= minimum - self.max_gap and state.removed_count < target:
+                    state.improve(target)
+                swaps += state.swaps
+                if best is None or state.removed_count > best.removed_count:
+                    best = state
+                if state.removed_count >= minimum:
+                    break
+                why = state.abandoned or 'stuck'
+                abandoned[why] = abandoned.get(why, 0) + 1
+        except _OutOfBudget as e:
+            reason = e.reason
+            swaps += state.swaps
+            if best is None or state.removed_count > best.removed_count:
+                best = state
+            if best.removed_count >= minimum:
+                reason = None
+        finally:
+            if cache is not None:
+                # 別のパズルの部分盤面はまず当たらないので持ち越さない
+                cache.clear()
+
+        result = DigResult(best.puzzle, best.solution, best.removed_count, target, minimum)
+        result.boards = boards
+        result.swaps = swaps
+        result.checks = self._checks
+        result.seconds = time.perf_counter() - started
+        result.reason = reason
+        result.abandoned = abandoned
+        if cache is not None:
+            result.cache = {'hits': cache.hits - hits, 'misses': cache.misses - misses}
+        if self.max_nodes is not None:
+            result.capped = self.engine.capped - capped
+        return result
+
+    def _removable(self, puzzle, row: int, col: int, value: int) -> bool:
+        """(row, col) を消しても一意解のままか（予算を1回分消費する）"""
+        if self.max_checks is not None and self._checks >= self.max_checks:
+            raise _OutOfBudget(REASON_BUDGET)
+        if self._expires is not None and time.perf_counter() >= self._expires:
+            raise _OutOfBudget(REASON_DEADLINE)
+        self._checks += 1
+        puzzle[row][col] = 0
+        engine = self.engine
+        # 置換表と上限はチェックの間だけ掛ける（完成盤の求解や検証には使わない）
+        if self.cache is not None:
+            engine.cache = self.cache
+        if self.max_nodes is not None:
+            engine.node_limit = self.max_nodes
+        try:
+            other = engine.has_other_solution(puzzle, row, col, value)
+        finally:
+            if self.cache is not None:
+                engine.cache = None
+            if self.max_nodes is not None:
+                engine.node_limit = None
+        if other:
+            puzzle[row][col] = value
+            return False
+        return True
+
+
+class _Board:
+    """1つの完成盤に対する掘り途中の状態"""
+
+    def __init__(self, digger: AdaptiveDigger, solution, rng):
+        self.digger = digger
+        self.solution = solution
+        self.rng = rng
+        self.size = digger.size
+        self.puzzle = [row[:] for row in solution]
+        self.removed: list[tuple[int, int]] = []
+        self.swaps = 0
+        self.abandoned = None
+
+    @property
+    def removed_count(self) -> int:
+        return len(self.removed)
+
+    def greedy(self, target: int, minimum: int):
+        """ランダムな順に1周掘る。下限に届かないと分かった時点で打ち切る"""
+        cells = [(r, c) for r in range(self.size) for c in range(self.size)]
+        self.rng.shuffle(cells)
+        for idx, (r, c) in enumerate(cells):
+            if len(self.removed) >= target:
+                return
+            # 残りを全部消せても下限に届かない
+            if len(self.removed) + len(cells) - idx < minimum - self.digger.max_gap:
+                self.abandoned = 'unreachable'
+                return
+            if self.digger._removable(self.puzzle, r, c, self.solution[r][c]):
+                self.removed.append((r, c))
+        if len(self.removed) < minimum - self.digger.max_gap:
+            self.abandoned = 'too_far'
+
+    def improve(self, target: int):
+        """消したセルを1つ戻して代わりに消せるセルを探す局所探索"""
+        puzzle, solution = self.puzzle, self.solution
+        tries = 0
+        while len(self.removed) < target and tries < self.digger.swap_tries:
+            tries += 1
+            i = self.rng.randrange(len(self.removed))
+            r0, c0 = self.removed[i]
+            puzzle[r0][c0] = solution[r0][c0]
+
+            present = [(r, c) for r in range(self.size) for c in range(self.size)
+                       if puzzle[r][c] and (r, c) != (r0, c0)]
+            self.rng.shuffle(present)
+            gained = []
+            try:
+                for r, c in present:
+                    if self.digger._removable(puzzle, r, c, solution[r][c]):
+                        gained.append((r, c))
+                        if len(self.removed) - 1 + len(gained) >= target:
+                            break
+            finally:
+                # 予算切れで抜けるときも removed と盤面を一致させておく
+                self._settle(i, r0, c0, gained)
+
+    def _settle(self, i: int, r0: int, c0: int, gained: list):
+        """(r0, c0) を戻した試行の結果を確定する"""
+        if gained:
+            # 1つ戻して1つ以上消せた: 同数でも別の局面に移って続ける
+            self.removed.pop(i)
+            self.removed.extend(gained)
+            self.swaps += 1
+        else:
+            # 何も消せない: 元に戻す（戻したセルは消せることが分かっている）
+            self.puzzle[r0][c0] = 0
@@ -0,0 +1,219 @@
+"""
+Dancing Links (Algorithm X) による数独ソルバー
+数独を 4 * size^2 個の制約（セル・行・列・ブロック）に対する
+完全被覆問題として解く。低ヒント盤面でも探索量が安定する。
+"""
+import random
+import time
+
+
+class DLXSolver:
+    """Dancing Links による完全被覆ソルバー
+
+    ノードは配列（L, R, U, D, C）で表現する。0 番がルート、
+    1..列数 が列ヘッダ、それ以降が各候補 (行, 列, 数字) の4ノード。
+    """
+
+    # 探索の実装を変えたら上げる（検証キャッシュが無効になる）
+    VERSION = 1
+
+    def __init__(self, box_size: int = 3):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        n = self.size
+        ncols = 4 * n * n
+        self.num_cols = ncols
+
+        L = list(range(-1, ncols))
+        R = list(range(1, ncols + 2))
+        L[0] = ncols
+        R[ncols] = 0
+        U = list(range(ncols + 1))
+        D = list(range(ncols + 1))
+        C = list(range(ncols + 1))
+        S = [0] * (ncols + 1)
+        option_of = [-1] * (ncols + 1)
+        option_start = [0] * (n * n * n)
+
+        for r in range(n):
+            for c in range(n):
+                b = (r // box_size) * box_size + (c // box_size)
+                for d in range(n):
+                    option = (r * n + c) * n + d
+                    cols = (
+                        1 + r * n + c,
+                        1 + n * n + r * n + d,
+                        1 + 2 * n * n + c * n + d,
+                        1 + 3 * n * n + b * n + d,
+                    )
+                    first = len(L)
+                    option_start[option] = first
+                    for k, col in enumerate(cols):
+                        node = first + k
+                        # 列の末尾に挿入
+                        U.append(U[col])
+                        D.append(col)
+                        D[U[col]] = node
+                        U[col] = node
+                        # 行内は循環リスト
+                        L.append(first + (k - 1) % 4)
+                        R.append(first + (k + 1) % 4)
+                        C.append(col)
+                        S[col] += 1
+                        option_of.append(option)
+
+        self._template = (L, R, U, D, C, S)
+        self.option_of = option_of
+        self.option_start = option_start
+        # SearchStats を設定すると探索コストを計測する（search_stats.py）
+        self.stats = None
+
+    def count_solutions(self, board: list[list[int]], limit: int = 2) -> int:
+        """解の数を数える（limit 個見つけたら打ち切り）"""
+        count, _ = self._search(board, limit, None)
+        return count
+
+    def solve(self, board: list[list[int]], rng: random.Random | None = None) -> list[list[int]] | None:
+        """解を1つ求めて新しい盤面として返す（解なしなら None）
+
+        rng を渡すと候補の試行順をシャッフルし、ランダムな解を返す。
+        """
+        count, solution = self._search(board, 1, rng)
+        return solution if count else None
+
+    def has_other_solution(self, board: list[list[int]], row: int, col: int, value: int) -> bool:
+        """(row, col) が value 以外になる解が存在するか（該当する候補行を使わずに探索）"""
+        banned = (row * self.size + col) * self.size + value - 1
+        count, _ = self._search(board, 1, None, banned)
+        return count > 0
+
+    def _search(self, board: list[list[int]], limit: int,
+                rng: random.Random | None, banned: int = -1) -> tuple[int, list[list[int]] | None]:
+        """探索本体。(見つかった解の数, 最初の解) を返す
+
+        banned に候補番号を渡すと、その候補行は選ばない。
+        """
+        stats = self.stats
+        start = time.perf_counter() if stats is not None else 0.0
+        n = self.size
+        L, R, U, D, C, S = (list(a) for a in self._template)
+        option_of = self.option_of
+
+        def cover(col: int) -> None:
+            L[R[col]] = L[col]
+            R[L[col]] = R[col]
+            i = D[col]
+            while i != col:
+                j = R[i]
+                while j != i:
+                    U[D[j]] = U[j]
+                    D[U[j]] = D[j]
+                    S[C[j]] -= 1
+                    j = R[j]
+                i = D[i]
+
+        def uncover(col: int) -> None:
+            i = U[col]
+            while i != col:
+                j = L[i]
+                while j != i:
+                    S[C[j]] += 1
+                    U[D[j]] = j
+                    D[U[j]] = j
+                    j = L[j]
+                i = U[i]
+            L[R[col]] = col
+            R[L[col]] = col
+
+        # ヒントに対応する候補を先に選択しておく
+        chosen: list[int] = []
+        covered = [False] * (self.num_cols + 1)
+        for r in range(n):
+            for c in range(n):
+                v = board[r][c]
+                if not v:
+                    continue
+                if v < 0 or v > n:
+                    return 0, None
+                node = self.option_start[(r * n + c) * n + v - 1]
+                j = node
+                while True:
+                    if covered[C[j]]:
+                        return 0, None
+                    j = R[j]
+                    if j == node:
+                        break
+                while True:
+                    covered[C[j]] = True
+                    cover(C[j])
+                    j = R[j]
+                    if j == node:
+                        break
+                chosen.append(node)
+
+        count = 0
+        first: list[int] | None = None
+        # 候補が1つしかない列の選択を「伝播」として数える
+        nodes = backtracks = propagations = 0
+
+        def search() -> None:
+            nonlocal count, first, nodes, backtracks, propagations
+            nodes += 1
+            if R[0] == 0:
+                count += 1
+                if first is None:
+                    first = list(chosen)
+                return
+
+            # 最も候補の少ない列を選ぶ
+            col = R[0]
+            best = col
+            best_size = S[col]
+            while col and best_size > 1:
+                if S[col] < best_size:
+                    best, best_size = col, S[col]
+                col = R[col]
+            if best_size == 0:
+                backtracks += 1
+                return
+            if best_size == 1:
+                propagations += 1
+
+            cover(best)
+            rows = []
+            i = D[best]
+            while i != best:
+                if option_of[i] != banned:
+                    rows.append(i)
+                i = D[i]
+            if rng is not None:
+                rng.shuffle(rows)
+
+            for i in rows:
+                chosen.append(i)
+                j = R[i]
+                while j != i:
+                    cover(C[j])
+                    j = R[j]
+                search()
+                j = L[i]
+                while j != i:
+                    uncover(C[j])
+                    j = L[j]
+                chosen.pop()
+                if count >= limit:
+                    break
+            uncover(best)
+
+        search()
+        if stats is not None:
+            stats.record(nodes, backtracks, propagations, time.perf_counter() - start)
+
+        solution = None
+        if first is not None:
+            solution = [[0] * n for _ in range(n)]
+            for node in first:
+                option = option_of[node]
+                cell, d = divmod(option, n)
+                solution[cell // n][cell % n] = d + 1
+        return count, solution
@@ -1,19 +1,73 @@
 """
 高速な数独パズル生成器
 事前生成されたテンプレートと変換を使用
+box_size で 16x16（4）・25x25（5）の盤面も作れる（帯とチェックの上限は digger.py）。
 """
+import argparse
 import json
 import random
 import os
 from copy import deepcopy
 
+from digger import CHECK_NODE_LIMITS, DEFAULT_MAX_CHECKS, DIG_BANDS, LARGE_BOARD_SOLVER, AdaptiveDigger
+from grid_bank import SolutionBank
+from puzzle_codec import LAYOUTS, id_prefix, write_puzzles
+from puzzle_shards import write_shards
+from rater import TechniqueRater
+from search_stats import SearchStats
+from solvers import SOLVERS, get_solver
+from transposition import DEFAULT_MAX_ENTRIES, TranspositionTable
+
+
+# シードからの再生成に効く部分（完成盤の作り方・穴掘り・帯・予算）を変えたら上げる
+GENERATOR_VERSION = 2
+
 
 class FastSudokuGenerator:
     """高速数独パズル生成クラス"""
     
-    def __init__(self):
-        self.size = 9
-        self.box_size = 3
+    def __init__(self, solver: str = 'bitmask', stats: SearchStats | None = None,
+                 max_checks: int | None = DEFAULT_MAX_CHECKS, deadline: float | None = None,
+                 bank: SolutionBank | None = None, cache_size: int = DEFAULT_MAX_ENTRIES,
+                 box_size: int = 3):
+        if box_size not in DIG_BANDS:
+            raise ValueError(f"Unsupported box size: {box_size} (choose from {sorted(DIG_BANDS)})")
+        if bank is not None and bank.box_size != box_size:
+            raise ValueError(f"Solution bank holds {bank.size}x{bank.size} grids")
+        self.size = box_size * box_size
+        self.box_size = box_size
+        self.solver_name = solver
+        self.engine = get_solver(solver, self.box_size)
+        # stats を渡すと解の数え上げ・求解・掘り試行の探索コストを加算する
+        self.engine.stats = stats
+        # bank を渡すと完成盤を解かずにバンクから受け取る（grid_bank.py）
+        self.bank = bank
+        self.cache_size = cache_size
+        # deadline（秒）は経過時間で打ち切るので、同じ乱数でも結果が変わりうる
+        # cache_size 件の置換表で1パズル分の一意性チェックの結果を使い回す（bitmask のみ、0 で無効）
+        cache = TranspositionTable(cache_size) if cache_size else None
+        self.digger = AdaptiveDigger(self.engine, self.size, max_checks, deadline, cache=cache,
+                                     max_nodes=CHECK_NODE_LIMITS[box_size])
+        # 直前の generate_puzzle の DigResult
+        self.last_dig = None
+
+    @property
+    def version(self) -> str | None:
+        """同じシードから同じパズルを再生成できる生成器の版
+
+        バンク・deadline・既定外の予算を使うと結果がシードだけで決まらないので None。
+        ノード上限のある盤面（16x16 以上）では、置換表に当たった部分木はノード数に
+        数えないので、打ち切られるチェックが置換表の大きさで変わる。既定外の
+        cache_size でも None にする（9x9 は上限が無く、置換表は結果を変えない）。
+        完成盤の求解はソルバーごとに結果が違うのでソルバー名を含める。
+        9x9 以外は盤面の一辺も付ける（例: 2:bitmask:16）。
+        """
+        if (self.bank is not None or self.digger.deadline is not None
+                or self.digger.max_checks != DEFAULT_MAX_CHECKS
+                or (self.digger.max_nodes is not None and self.cache_size != DEFAULT_MAX_ENTRIES)):
+            return None
+        version = f"{GENERATOR_VERSION}:{self.solver_name}"
+        return version if self.box_size == 3 else f"{version}:{self.size}"
     
     def is_valid(self, board: list[list[int]], row: int, col: int, num: int) -> bool:
         """指定位置に数字を配置できるかチェック"""
@@ -36,27 +90,31 @@ class FastSudokuGenerator:
         return True
     
     def solve(self, board: list[list[int]]) -> bool:
-        """バックトラッキングでパズルを解く"""
+        """ソルバーバックエンドでパズルを解き、盤面をその場で埋める"""
+        solution = self.engine.solve(board)
+        if solution is None:
+            return False
         for i in range(self.size):
-            for j in range(self.size):
-                if board[i][j] == 0:
-                    for num in range(1, 10):
-                        if self.is_valid(board, i, j, num):
-                            board[i][j] = num
-                            if self.solve(board):
-                                return True
-                            board[i][j] = 0
-                    return False
+            board[i][:] = solution[i]
         return True
     
-    def generate_complete_board(self) -> list[list[int]]:
-        """完成した数独盤面を生成"""
+    def generate_complete_board(self, rng=None) -> list[list[int]]:
+        """完成した数独盤面を生成（rng を省略するとグローバルな random を使う）"""
+        rng = rng or random
+        if self.bank is not None:
+            return self.bank.take(rng)
+
         board = [[0] * self.size for _ in range(self.size)]
+        if self.box_size != 3:
+            # 16x16 以上は対角ブロックを埋めてから乱択なしで解くと探索が行き詰まりやすい。
+            # 空の盤面を乱択付きで解く（grid_bank.py と同じ作り方）。大きい盤面は
+            # bitmask でしか掘らないので、行き詰まった試行はやり直せる
+            return self.engine.random_grid(rng)
         
         # 対角線上の3x3ブロックを埋める
-        for box in range(3):
-            nums = list(range(1, 10))
-            random.shuffle(nums)
+        for box in range(self.box_size):
+            nums = list(range(1, self.size + 1))
+            rng.shuffle(nums)
             for i in range(self.box_size):
                 for j in range(self.box_size):
                     board[box * self.box_size + i][box * self.box_size + j] = nums[i * self.box_size + j]
@@ -65,110 +123,31 @@ class FastSudokuGenerator:
         self.solve(board)
         return board
     
-    def remove_numbers(self, board: list[list[int]], count: int) -> list[list[int]]:
-        """指定された数のセルを削除"""
-        # 深いコピーを作る（元の解を壊さない）
-        puzzle = [row[:] for row in board]
-        cells = [(i, j) for i in range(self.size) for j in range(self.size)]
-        random.shuffle(cells)
-
-        removed = 0
-
-        for (row, col) in cells:
-            if removed >= count:
-                break
-
-            # 一時的に消して一意解かを確認する
-            backup = puzzle[row][col]
-            puzzle[row][col] = 0
-
-            sols = self.count_solutions(puzzle, limit=2)
-            if sols == 1:
-                removed += 1
-            else:
-                # 多解が発生するなら戻す
-                puzzle[row][col] = backup
-
-        if removed < count:
-            print(f"警告: 要求された{count}個の削除に対して、実際に削除できたのは{removed}個でした。")
-
-        return puzzle
-
     def count_solutions(self, board: list[list[int]], limit: int = 2) -> int:
         """与えられた盤面の解の数を数える（上限を指定して早期終了）"""
-        # Use a copy to avoid mutating the original
-        work = [row[:] for row in board]
-        count = 0
-
-        def find_least_candidates():
-            """Find empty cell with the fewest candidates (MRV heuristic).
-            Returns (i, j, candidates) or (None, None, None) if no empty cells.
-            """
-            best_i = best_j = None
-            best_cands = None
-
-            for i in range(self.size):
-                for j in range(self.size):
-                    if work[i][j] == 0:
-                        cands = []
-                        for num in range(1, 10):
-                            if self.is_valid(work, i, j, num):
-                                cands.append(num)
-                        if not cands:
-                            return i, j, []  # dead end
-                        if best_cands is None or len(cands) < len(best_cands):
-                            best_i, best_j, best_cands = i, j, cands
-                            if len(best_cands) == 1:
-                                return best_i, best_j, best_cands
-
-            return best_i, best_j, best_cands
-
-        def backtrack():
-            nonlocal count
-            if count >= limit:
-                return
-
-            i, j, cands = find_least_candidates()
-            if i is None:
-                # no empty cells -> found a solution
-                count += 1
-                return
-
-            if not cands:
-                # dead end
-                return
-
-            for num in cands:
-                work[i][j] = num
-                backtrack()
-                work[i][j] = 0
-                if count >= limit:
-                    return
-
-        backtrack()
-        return count
+        return self.engine.count_solutions(board, limit)
     
-    def generate_puzzle(self, difficulty: str = 'medium') -> tuple[list[list[int]], list[list[int]]]:
+    def generate_puzzle(self, difficulty: str = 'medium', rng=None) -> tuple[list[list[int]], list[list[int]]]:
         """
         指定難易度のパズルを生成
+        帯に届かない盤面は早めに捨てて次の完成盤に移り、予算が尽きたら
+        それまでの最良の盤面を返す（self.last_dig.in_band が False になり、
+        reason に理由が残る。警告するかどうかは呼び出し側が決める）。
+        乱数はすべて rng から引くので、self.version が None でなければ
+        random.Random(seed) を渡すと seed だけでパズルが決まる。
         """
-        # 難易度ごとの削除数
-        remove_count = {
-            'easy': random.randint(41, 45),
-            'medium': random.randint(46, 51),
-            'hard': random.randint(52, 56),
-            'expert': random.randint(57, 60)
-        }
-        
-        solution = self.generate_complete_board()
-        puzzle = self.remove_numbers(solution, remove_count.get(difficulty, 48))
-        
-        return puzzle, solution
-
-
-def generate_puzzle_database(output_dir: str = '/output'):
-    """パズルデータベースを生成"""
-    generator = FastSudokuGenerator()
+        rng = rng or random
+        bands = DIG_BANDS[self.box_size]
+        minimum, maximum = bands.get(difficulty, bands['medium'])
+        result = self.digger.dig(lambda: self.generate_complete_board(rng),
+                                 rng.randint(minimum, maximum), minimum, rng)
+        self.last_dig = result
+        return result.puzzle, result.solution
+
+
+def generate_puzzle_database(output_dir: str = '/output', solver: str = 'bitmask', layout: str = 'compact',
+                             box_sizes: tuple[int, ...] = (3,)):
+    """パズルデータベースを生成（box_sizes の盤面を1つのファイルにまとめる）"""
     
     # 各難易度のパズル数
     puzzle_counts = {
@@ -182,49 +161,70 @@ def generate_puzzle_database(output_dir: str = '/output'):
     
     print("パズル生成開始...")
     
-    for difficulty, count in puzzle_counts.items():
-        print(f"\n{difficulty.upper()} レベルのパズルを{count}個生成中...")
-        
-        for i in range(count):
-            puzzle, solution = generator.generate_puzzle(difficulty)
-            
-            # ヒント数を計算
-            hints = sum(1 for row in puzzle for cell in row if cell != 0)
-            score = 81 - hints
-            
-            puzzle_data = {
-                'id': f"{difficulty}_{i+1:03d}",
-                'difficulty': difficulty,
-                'hints': hints,
-                'score': score,
-                'puzzle': puzzle,
-                'solution': solution
-            }
-            
-            all_puzzles.append(puzzle_data)
-            
-            if (i + 1) % 5 == 0:
-                print(f"  {i+1}/{count} 完了")
+    for box_size in box_sizes:
+        # 16x16 以上はノード上限のあるソルバーでないと一部のチェックが終わらない
+        box_solver = solver if box_size == 3 else LARGE_BOARD_SOLVER
+        if box_solver != solver:
+            print(f"{box_size ** 2}x{box_size ** 2} は {box_solver} ソルバーで生成します（{solver} にはノード上限がありません）")
+        generator = FastSudokuGenerator(box_solver, box_size=box_size)
+        rater = TechniqueRater(box_size)
+        size = generator.size
+        for difficulty, count in puzzle_counts.items():
+            print(f"\n{size}x{size} {difficulty.upper()} レベルのパズルを{count}個生成中...")
+
+            for i in range(count):
+                puzzle, solution = generator.generate_puzzle(difficulty)
+                dig = generator.last_dig
+                if not dig.in_band:
+                    print(f"  警告: {difficulty} の帯に届かず{dig.removed}個で打ち切りました（{dig.reason}）。")
+
+                # ヒント数とテクニックによる難易度評価
+                hints = sum(1 for row in puzzle for cell in row if cell != 0)
+
+                puzzle_data = {
+                    'id': f"{id_prefix(difficulty, size)}_{i+1:03d}",
+                    'difficulty': difficulty,
+                    'size': size,
+                    'hints': hints,
+                    'score': size * size - hints,
+                    **rater.rate(puzzle).to_record(),
+                    'puzzle': puzzle,
+                    'solution': solution
+                }
+
+                all_puzzles.append(puzzle_data)
+
+                if (i + 1) % 5 == 0:
+                    print(f"  {i+1}/{count} 完了")
     
     # 出力ディレクトリを作成
     os.makedirs(output_dir, exist_ok=True)
     
     # 全パズルを保存
     output_path = os.path.join(output_dir, 'puzzles.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_puzzles, f, ensure_ascii=False, indent=2)
+    write_puzzles(output_path, all_puzzles, layout)
+    # 難易度ごとのシャードと目次（アプリは必要な1問だけを取りに行く。9x9 のみ）
+    write_shards(output_path, output_dir)
     
     print(f"\n✅ 合計 {len(all_puzzles)} 個のパズルを生成しました")
     print(f"📁 保存先: {output_path}")
     
     # 統計情報を表示
     print("\n=== 統計情報 ===")
-    for difficulty in ['easy', 'medium', 'hard', 'expert']:
-        puzzles = [p for p in all_puzzles if p['difficulty'] == difficulty]
-        if puzzles:
-            avg_hints = sum(p['hints'] for p in puzzles) / len(puzzles)
-            print(f"{difficulty.upper()}: {len(puzzles)}個, 平均ヒント数: {avg_hints:.1f}")
+    for size in sorted({p['size'] for p in all_puzzles}):
+        for difficulty in ['easy', 'medium', 'hard', 'expert']:
+            puzzles = [p for p in all_puzzles if p['difficulty'] == difficulty and p['size'] == size]
+            if puzzles:
+                avg_hints = sum(p['hints'] for p in puzzles) / len(puzzles)
+                print(f"{size}x{size} {difficulty.upper()}: {len(puzzles)}個, 平均ヒント数: {avg_hints:.1f}")
 
 
 if __name__ == '__main__':
-    generate_puzzle_database()
+    parser = argparse.ArgumentParser(description='Generate a small puzzle database')
+    parser.add_argument('output_dir', nargs='?', default='/output', help='Directory to write puzzles.json')
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='bitmask', help='Solver backend')
+    parser.add_argument('--format', choices=LAYOUTS, default='compact', help='Layout of puzzles.json')
+    parser.add_argument('--box-sizes', type=int, nargs='+', choices=sorted(DIG_BANDS), default=[3],
+                        help='Box sizes to generate (3: 9x9, 4: 16x16, 5: 25x25; 4 and 5 always use the bitmask solver)')
+    args = parser.parse_args()
+    generate_puzzle_database(args.output_dir, args.solver, args.format, tuple(args.box_sizes))
@@ -1,18 +1,370 @@
+import argparse
+import hashlib
 import json
+import multiprocessing
 import os
 import random
+import time
+from canonical import MAX_CANONICAL_BOX_SIZE, CanonicalIndex, canonical_key
+from digger import DIG_BANDS, LARGE_BOARD_SOLVER
 from generate_fast import FastSudokuGenerator
-import sys
+from grid_bank import SolutionBank
+from rater import TechniqueRater
+from puzzle_codec import LAYOUTS, decode_grid, id_prefix
+from puzzle_shards import MANIFEST_NAME, write_shards
+from puzzle_io import NDJSONWriter, compact_ndjson, iter_ndjson, read_progress, repair_ndjson
+from seed_catalogue import SeedCatalogue, puzzle_seed
+from solve_traces import TRACE_FIELD, TraceEncoder
+from search_stats import SearchStats, SearchSummary, log2_histogram_of_counts, profile_call
+from solvers import SOLVERS
+from transforms import mint_puzzles
+from transposition import DEFAULT_MAX_ENTRIES
 
 """
 Generate many puzzles and save to the given output directory as puzzles.json.
-Usage: python generate_many.py <output_dir> [total_count]
+Usage: python generate_many.py <output_dir> [total_count] [--solver dlx|backtrack|bitmask]
+                               [--workers N] [--seed S] [--resume] [--keep-ndjson]
+                               [--format compact|nested] [--no-compress]
+                               [--mode dig|transform] [--seed-pool N] [--bucket removal|rating]
+                               [--stats] [--profile PATH] [--no-dedupe] [--index PATH]
+                               [--bank PATH] [--bank-size N] [--no-shards] [--catalogue PATH]
+                               [--cache-size N] [--box-size 3|4|5] [--no-traces]
+                               [--max-attempts N]
 If total_count is omitted, defaults to 4000.
 This script distributes puzzles evenly across difficulties: easy, medium, hard, expert.
+
+Each difficulty quota is split into shards of SHARD_SIZE puzzles that run in
+parallel. Every dig attempt runs on its own RNG seeded from the master
+--seed, the puzzle id and the attempt number, so a given seed produces
+byte-identical output for any --workers value. Each dug record stores the
+seed of its accepted attempt in `seed`. --catalogue PATH also writes a seed
+catalogue of (id, seed, generator_version) entries, from which every puzzle
+can be regenerated exactly (see seed_catalogue.py).
+
+Puzzles are streamed to puzzles.ndjson as they are produced and compacted
+into puzzles.json at the end. --resume continues an interrupted run from the
+last completed id per difficulty; pass the same --seed to get the same output
+as an uninterrupted run.
+
+puzzles.json uses the compact layout by default (see puzzle_codec.py), with
+precompressed .gz/.br siblings for static hosting. Next to it, one
+fixed-record shard per difficulty and the puzzles.index.json manifest are
+written for random access by the app (see puzzle_shards.py; --no-shards
+skips them).
+
+With --mode transform, each difficulty first digs a small verified seed pool
+(--seed-pool puzzles) and fills the rest of its quota by applying random
+validity-preserving transforms (see transforms.py), without re-solving.
+
+Every record carries a technique rating from rater.py (rating, technique,
+technique_score, techniques) next to the removal score (cells - hints). --bucket rating assigns difficulties by that rating
+instead of by the number of removed cells.
+
+--stats instruments the solver (see search_stats.py): every dug record gets
+a `search` field (nodes, backtracks, propagations, search ms, dig attempts,
+largest single search, wall ms) and a `dig` field from digger.py (boards
+started and abandoned, swaps, uniqueness checks, give-up reason), and
+generate_report.json is written next to puzzles.json with per-difficulty
+totals and histograms. --profile dumps cProfile output for the run (worker
+processes are not profiled; use -j 1).
+
+Dug puzzles are deduplicated by canonical form (see canonical.py) against
+an on-disk index (--index, default <output_dir>/canonical.idx) and against
+each other. Isomorphic repeats are re-dug with the id's next attempt seeds,
+and the new keys are appended to the index once the run completes.
+The default index holds the keys of the puzzles in the output directory,
+so a run without --resume clears it along with the puzzles it replaces,
+and the same --seed gives the same output again. Pass --index to dedupe
+across runs or output directories.
+Transform mode skips the dedupe, since its minted puzzles are isomorphic to
+their seeds by design.
+
+--bank PATH draws solution grids from a saved solution-grid bank (see
+grid_bank.py) under a random symmetry transform instead of solving a fresh
+grid for every board. Grids are picked with the shard's RNG and never
+consumed, so a given seed and bank file still give byte-identical output
+for any --workers value; the bank is a fixed pool that is not refilled
+during the run. Before the run it is built, or topped up, to at least
+--bank-size grids and one grid per BANK_PUZZLES_PER_GRID puzzles, seeded
+from the master seed and the bank's current size.
+
+--box-size 4 or 5 generates 16x16 or 25x25 puzzles with that size's
+removal bands (see digger.py). Records carry their grid `size`, and ids of
+sizes other than 9x9 are tagged, e.g. expert_16x16_0042. Use a separate
+output directory per size; shards are written for 9x9 only, since the app
+plays 9x9. 25x25 puzzles are too large to canonicalize, so they skip the
+dedupe.
+
+Uniqueness checks share a transposition table of --cache-size entries
+across the dig steps of each puzzle (see transposition.py; 0 disables it).
+It never changes 9x9 output. On 16x16 and 25x25, subtrees answered from
+the table do not count toward the per-check node limit, so which checks
+get capped (and so the output) can depend on --cache-size; --catalogue
+there needs the default size. With --stats, each `dig` field and the report
+carry its hits and misses.
+
+Every shard also gets a solve-trace file for the app's hints (see
+solve_traces.py; --no-traces skips them). The workers rate each puzzle
+with record_steps=True anyway, so the trace costs little more than
+encoding the steps the rating already took. It travels in the checkpoint's
+`trace` field and is moved out of puzzles.json into the trace files.
+
+A puzzle id gets at most --max-attempts dig attempts (default
+MAX_DIG_ATTEMPTS). Attempts that miss the removal band, miss the rating
+band with --bucket rating, or dig a duplicate all count. When they run
+out, generation stops with an error naming the id, and the checkpoint
+can be resumed like any other interrupted run.
 """
 
-def generate_many(output_dir: str, total_count: int = 4000):
-    generator = FastSudokuGenerator()
+SHARD_SIZE = 25
+# dig attempts per puzzle id before giving up. The rating buckets need the
+# most: up to 27 attempts for one id in a sample of 15 hard ids
+MAX_DIG_ATTEMPTS = 200
+# a --bank grid backs at most about this many puzzles (it is reused, not consumed)
+BANK_PUZZLES_PER_GRID = 2
+MODES = ('dig', 'transform')
+BUCKETS = ('removal', 'rating')
+# removal profile dug for each rating bucket; harder buckets dig deeper
+# so that enough candidates land in the band
+RATING_DIG_PROFILE = {'easy': 'easy', 'medium': 'hard', 'hard': 'expert', 'expert': 'expert'}
+
+# per-process state, created by _init_worker
+_generator = None
+_rater = None
+_mode = 'dig'
+_bucket = 'removal'
+_pool_size = 20
+_master_seed = 0
+_seed_pools = {}
+_stats = None
+_index = None
+_bank = None
+_tracer = None
+_max_attempts = MAX_DIG_ATTEMPTS
+
+
+class _AttemptsExhausted(Exception):
+    pass
+
+
+def derive_seed(master_seed: int, difficulty: str, start: int) -> int:
+    """Derive a shard seed from the master seed, difficulty and first index."""
+    digest = hashlib.sha256(f"{master_seed}:{difficulty}:{start}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def plan_shards(puzzle_counts: dict, master_seed: int, shard_size: int = SHARD_SIZE) -> list:
+    """Split per-difficulty quotas into (difficulty, start, count, seed) shards in id order."""
+    shards = []
+    for difficulty, count in puzzle_counts.items():
+        for start in range(0, count, shard_size):
+            n = min(shard_size, count - start)
+            shards.append((difficulty, start, n, derive_seed(master_seed, difficulty, start)))
+    return shards
+
+
+def _init_worker(solver: str, mode: str = 'dig', pool_size: int = 20, master_seed: int = 0,
+                 bucket: str = 'removal', stats: bool = False, index_path: str | None = None,
+                 bank_path: str | None = None, cache_size: int = DEFAULT_MAX_ENTRIES, box_size: int = 3,
+                 traces: bool = False, max_attempts: int = MAX_DIG_ATTEMPTS):
+    global _generator, _rater, _mode, _bucket, _pool_size, _master_seed, _stats, _index, _bank, _tracer
+    global _max_attempts
+    _stats = SearchStats() if stats else None
+    # read-only snapshot of the canonical index as it was when the run started
+    _index = CanonicalIndex(index_path).keys if index_path else None
+    # every process loads the same grids and never consumes them
+    _bank = SolutionBank(box_size, path=bank_path, reuse=True) if bank_path else None
+    _generator = FastSudokuGenerator(solver, _stats, bank=_bank, cache_size=cache_size, box_size=box_size)
+    _rater = TechniqueRater(_generator.box_size)
+    _tracer = TraceEncoder(_rater) if traces else None
+    _mode = mode
+    _bucket = bucket
+    _pool_size = pool_size
+    _master_seed = master_seed
+    _max_attempts = max_attempts
+    _seed_pools.clear()
+
+
+def _seed_pool(difficulty: str) -> list:
+    """Dig (once per process) the verified seed pool for a difficulty.
+
+    The pool is seeded from the master seed only, so every worker builds
+    the same pool.
+    """
+    if difficulty not in _seed_pools:
+        pool = []
+        k = 0
+        while len(pool) < _pool_size:
+            k += 1
+            pool_id = f"{id_prefix(difficulty, _generator.size)}_pool{k}"
+            puzzle, solution, _, _ = next(_candidates(difficulty, pool_id))
+            if _generator.count_solutions(puzzle, limit=2) == 1:
+                pool.append((puzzle, solution))
+        _seed_pools[difficulty] = pool
+    return _seed_pools[difficulty]
+
+
+def _candidates(difficulty: str, puzzle_id: str):
+    """Yield acceptable puzzles for an id as (puzzle, solution, rating, seed).
+
+    Dig attempt n runs on its own RNG seeded with
+    puzzle_seed(master seed, id, n), so the accepted puzzle can be
+    regenerated from its seed alone (see seed_catalogue.py).
+    With --bucket rating, puzzles are dug with the bucket's removal profile
+    and rejected until the technique rating falls into the bucket's band.
+    Otherwise a puzzle whose dig ran out of check budget short of the
+    difficulty's removal band is dropped and dug again. Raises
+    _AttemptsExhausted after _max_attempts attempts, counting the
+    candidates the caller turned down.
+    """
+    profile = RATING_DIG_PROFILE[difficulty] if _bucket == 'rating' else difficulty
+    short = off_rating = 0
+    for attempt in range(_max_attempts):
+        seed = puzzle_seed(_master_seed, puzzle_id, attempt)
+        puzzle, solution = _generator.generate_puzzle(profile, random.Random(seed))
+        if _bucket != 'rating' and not _generator.last_dig.in_band:
+            short += 1
+            continue
+        rating = _rater.rate(puzzle, record_steps=_tracer is not None)
+        if _bucket != 'rating' or rating.difficulty() == difficulty:
+            yield puzzle, solution, rating, seed
+        else:
+            off_rating += 1
+    missed = f"{off_rating} rated outside {difficulty}" if _bucket == 'rating' else \
+        f"{short} short of the {profile} removal band"
+    raise _AttemptsExhausted(f"Gave up on {puzzle_id} after {_max_attempts} dig attempts ({missed}, "
+                             f"{_max_attempts - short - off_rating} duplicates); "
+                             f"raise --max-attempts to keep trying.")
+
+
+def _puzzle_id(difficulty: str, i: int) -> str:
+    return f"{id_prefix(difficulty, _generator.size)}_{i+1:04d}"
+
+
+def _make_record(difficulty: str, i: int, puzzle, solution, rating, started=None, seed=None) -> dict:
+    hints = sum(1 for row in puzzle for cell in row if cell != 0)
+    record = {
+        'id': _puzzle_id(difficulty, i),
+        'difficulty': difficulty,
+        'size': _generator.size,
+        'hints': hints,
+        'score': _generator.size ** 2 - hints,
+        **rating.to_record(),
+        'puzzle': puzzle,
+        'solution': solution
+    }
+    if seed is not None:
+        record['seed'] = seed
+    if _tracer is not None:
+        record[TRACE_FIELD] = _tracer.from_rating(rating)
+    if started is not None:
+        record['search'] = {**_stats.to_record(),
+                            'wall_ms': round((time.perf_counter() - started) * 1000, 3)}
+        record['dig'] = _generator.last_dig.to_record()
+    return record
+
+
+def _dig_checked(difficulty: str, i: int, taken) -> tuple:
+    """Dig a puzzle whose canonical form is not in taken.
+
+    Returns (record, canonical key or None, error message or None).
+    """
+    started = None
+    if _stats is not None:
+        _stats.reset()
+        started = time.perf_counter()
+    try:
+        for puzzle, solution, rating, seed in _candidates(difficulty, _puzzle_id(difficulty, i)):
+            if taken is None:
+                key = None
+                break
+            key = canonical_key(puzzle, _generator.box_size)
+            if key not in taken:
+                break
+    except _AttemptsExhausted as e:
+        return None, None, str(e)
+
+    # verify uniqueness just in case; stop if any puzzle is not unique
+    sols = _generator.count_solutions(puzzle, limit=2)
+    if sols != 1:
+        return None, key, f"Generated puzzle {_puzzle_id(difficulty, i)} has {sols} solutions."
+    return _make_record(difficulty, i, puzzle, solution, rating, started, seed), key, None
+
+
+def _generate_shard(shard: tuple) -> tuple:
+    """Generate one shard. Returns (difficulty, records, canonical keys, error message or None).
+
+    With dedupe on, dug puzzles isomorphic to one in the index snapshot taken
+    at start-up or earlier in the same shard are re-dug.
+    """
+    difficulty, start, count, seed = shard
+
+    if _mode == 'transform':
+        # uniqueness and clue count are invariant under the transforms,
+        # so minted puzzles need no further check
+        try:
+            pool = _seed_pool(difficulty)
+        except _AttemptsExhausted as e:
+            return difficulty, [], [], str(e)
+        minted = mint_puzzles(pool, count, random.Random(seed), _generator.box_size)
+    else:
+        minted = None
+
+    taken = None
+    if _index is not None and minted is None:
+        taken = _ShardKeys(_index)
+
+    records = []
+    keys = []
+    for i in range(start, start + count):
+        if minted is not None:
+            # technique ratings are invariant under the transforms too
+            puzzle, solution = next(minted)
+            rating = _rater.rate(puzzle, record_steps=_tracer is not None)
+            record, key = _make_record(difficulty, i, puzzle, solution, rating), None
+        else:
+            record, key, error = _dig_checked(difficulty, i, taken)
+            if error:
+                return difficulty, records, keys, error
+            if taken is not None:
+                taken.add(key)
+        records.append(record)
+        keys.append(key)
+    return difficulty, records, keys, None
+
+
+class _ShardKeys:
+    """Keys of the index snapshot plus the keys dug so far in one shard."""
+
+    def __init__(self, base):
+        self.base = base
+        self.local = set()
+
+    def __contains__(self, key):
+        return key in self.local or key in self.base
+
+    def add(self, key):
+        self.local.add(key)
+
+
+def _replace_duplicate(difficulty: str, i: int, index: CanonicalIndex) -> tuple:
+    """Re-dig record i after it collided with a puzzle from another shard or run.
+
+    The attempts are seeded from the master seed and the id and the parent
+    handles collisions in id order, so the output stays independent of
+    --workers.
+    """
+    return _dig_checked(difficulty, i, index)
+
+
+def generate_many(output_dir: str, total_count: int = 4000, solver: str = 'bitmask',
+                  workers: int = 1, seed: int | None = None, resume: bool = False,
+                  keep_ndjson: bool = False, layout: str = 'compact', compress: bool = True,
+                  mode: str = 'dig', seed_pool: int = 20, bucket: str = 'removal',
+                  stats: bool = False, dedupe: bool = True, index_path: str | None = None,
+                  bank_path: str | None = None, bank_size: int = 2000, shards: bool = True,
+                  catalogue_path: str | None = None, cache_size: int = DEFAULT_MAX_ENTRIES,
+                  box_size: int = 3, traces: bool = True, max_attempts: int = MAX_DIG_ATTEMPTS):
     difficulties = ['easy', 'medium', 'hard', 'expert']
     per = total_count // len(difficulties)
     remainder = total_count % len(difficulties)
@@ -22,48 +374,284 @@ def generate_many(output_dir: str, total_count: int = 4000):
     for i in range(remainder):
         puzzle_counts[difficulties[i]] += 1
 
-    all_puzzles = []
+    os.makedirs(output_dir, exist_ok=True)
+    ndjson_path = os.path.join(output_dir, 'puzzles.ndjson')
+    output_path = os.path.join(output_dir, 'puzzles.json')
+
+    done = {d: 0 for d in difficulties}
+    if resume and os.path.exists(ndjson_path):
+        dropped = repair_ndjson(ndjson_path)
+        if dropped:
+            print(f"Dropped {dropped} bytes of a partially written record from {ndjson_path}")
+        first = next(iter_ndjson(ndjson_path), None)
+        if first is not None and first.get('size', 9) != box_size * box_size:
+            print(f"Error: {ndjson_path} holds {first['size']}x{first['size']} puzzles, not --box-size {box_size}")
+            return
+        done.update(read_progress(ndjson_path))
+        print(f"Resuming from {ndjson_path}: {done}")
+
+    if mode == 'transform' and dedupe:
+        # minted puzzles are isomorphic to their seed puzzle by construction
+        print("Canonical dedupe is skipped in transform mode")
+        dedupe = False
+    if box_size != 3 and solver != LARGE_BOARD_SOLVER:
+        # only the bitmask backend honours the per-check node limit of larger grids
+        print(f"{box_size * box_size}x{box_size * box_size} puzzles are dug with the {LARGE_BOARD_SOLVER} solver, "
+              f"not {solver}")
+        solver = LARGE_BOARD_SOLVER
+    if box_size > MAX_CANONICAL_BOX_SIZE and dedupe:
+        print(f"Canonical dedupe is skipped for {box_size * box_size}x{box_size * box_size} puzzles")
+        dedupe = False
+    index = None
+    if dedupe:
+        if index_path is None:
+            index_path = os.path.join(output_dir, 'canonical.idx')
+            if not resume and os.path.exists(index_path):
+                # the default index describes this directory's puzzles, which a fresh run replaces
+                os.remove(index_path)
+                print(f"Cleared {index_path}: a fresh run replaces the puzzles it indexed")
+        index = CanonicalIndex(index_path)
+        print(f"Canonical index {index_path}: {len(index)} known puzzles")
+    else:
+        index_path = None
+
+    # traces are only kept in the shards, which hold 9x9 puzzles only
+    traces = traces and shards and box_size == 3
+
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    # skip shards that are already complete; partial shards are regenerated
+    # from their seed and the already written records are dropped below
+    pending = [s for s in plan_shards(puzzle_counts, seed) if s[1] + s[2] > done[s[0]]]
+
+    if catalogue_path and (mode == 'transform' or bank_path):
+        # minted puzzles and banked grids are not determined by a seed alone
+        print("Error: --catalogue needs --mode dig without --bank")
+        return
+    version = FastSudokuGenerator(solver, cache_size=cache_size, box_size=box_size).version
+    if catalogue_path and version is None:
+        # node-capped checks of larger grids depend on the table size
+        print(f"Error: --catalogue of {box_size * box_size}x{box_size * box_size} puzzles needs the default "
+              f"--cache-size {DEFAULT_MAX_ENTRIES}")
+        return
+
+    if bank_path:
+        bank = SolutionBank(box_size, path=bank_path)
+        needed = max(bank_size, -(-total_count // BANK_PUZZLES_PER_GRID))
+        if len(bank) < needed:
+            print(f"Filling solution bank {bank_path} from {len(bank)} to {needed} grids...")
+            # seeded by the current size, so a top-up does not repeat the grids already there
+            extra = SolutionBank(box_size, seed=derive_seed(seed, 'bank', len(bank)))
+            extra.fill(needed - len(bank))
+            bank.grids.extend(extra.grids)
+            bank.save()
+        print(f"Solution bank {bank_path}: {len(bank)} grids")
+
     print(f"Generating total {total_count} puzzles -> distribution: {puzzle_counts}")
+    print(f"Seed {seed}, {len(pending)} shards on {workers} worker(s), mode {mode}, bucket by {bucket}")
 
-    for difficulty, count in puzzle_counts.items():
-        print(f"Generating {count} puzzles for difficulty {difficulty}...")
-        for i in range(count):
-            puzzle, solution = generator.generate_puzzle(difficulty)
-
-            # verify uniqueness just in case; stop if any puzzle is not unique
-            sols = generator.count_solutions(puzzle, limit=2)
-            if sols != 1:
-                print(f"Error: Generated puzzle {difficulty}_{i+1:04d} has {sols} solutions. Stopping generation.")
-                # write partial file so far
-                os.makedirs(output_dir, exist_ok=True)
-                output_path = os.path.join(output_dir, 'puzzles.json')
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(all_puzzles, f, ensure_ascii=False, indent=2)
-                print(f"Partial output written to {output_path}")
-                return
-            hints = sum(1 for row in puzzle for cell in row if cell != 0)
-            score = 81 - hints
-            puzzle_data = {
-                'id': f"{difficulty}_{i+1:04d}",
-                'difficulty': difficulty,
-                'hints': hints,
-                'score': score,
-                'puzzle': puzzle,
-                'solution': solution
-            }
-            all_puzzles.append(puzzle_data)
-            if (i+1) % 100 == 0:
-                print(f"  {i+1}/{count} done for {difficulty}")
+    if index is not None and resume and any(done.values()):
+        # records checkpointed by the interrupted run are not in the index file yet
+        for record in iter_ndjson(ndjson_path):
+            index.add(canonical_key(decode_grid(record['puzzle']), box_size))
 
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, 'puzzles.json')
-    print(f"Writing {len(all_puzzles)} puzzles to {output_path}...")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_puzzles, f, ensure_ascii=False, indent=2)
+    def run(results, writer):
+        for difficulty, records, keys, error in results:
+            for record, key in zip(records, keys):
+                n = int(record['id'].rsplit('_', 1)[1])
+                if n <= done[difficulty]:
+                    continue
+                if index is not None and key in index:
+                    record, key, replace_error = _replace_duplicate(difficulty, n - 1, index)
+                    if replace_error:
+                        return replace_error
+                    print(f"  Replaced {record['id']}: isomorphic to an indexed puzzle")
+                if index is not None:
+                    index.add(key)
+                writer.write(record)
+                done[difficulty] = n
+            if error:
+                return error
+            print(f"  {done[difficulty]}/{puzzle_counts[difficulty]} done for {difficulty}")
+        return None
+
+    with NDJSONWriter(ndjson_path, append=resume) as writer:
+        if workers > 1:
+            with multiprocessing.Pool(workers, initializer=_init_worker,
+                                      initargs=(solver, mode, seed_pool, seed, bucket, stats,
+                                                index_path, bank_path, cache_size, box_size, traces,
+                                                max_attempts)) as pool:
+                # the parent re-digs cross-shard duplicates itself
+                _init_worker(solver, mode, seed_pool, seed, bucket, stats, index_path, bank_path, cache_size,
+                             box_size, traces, max_attempts)
+                # imap keeps shard order, so records are streamed in id order
+                error = run(pool.imap(_generate_shard, pending), writer)
+        else:
+            _init_worker(solver, mode, seed_pool, seed, bucket, stats, index_path, bank_path, cache_size,
+                         box_size, traces, max_attempts)
+            error = run(map(_generate_shard, pending), writer)
+
+    if error:
+        print(f"Error: {error} Stopping generation.")
+        print(f"Completed puzzles are checkpointed in {ndjson_path}; rerun with --resume to continue")
+        return
+
+    if stats:
+        # built from the checkpoint so that resumed runs are fully covered
+        report_path = os.path.join(output_dir, 'generate_report.json')
+        write_search_report(ndjson_path, report_path)
+        print(f"Search report written to: {report_path}")
+
+    print(f"Compacting {ndjson_path} into {output_path}...")
+    written = compact_ndjson(ndjson_path, output_path, layout, compress)
+    if shards and box_size == 3:
+        manifest = write_shards(ndjson_path, output_dir, traces)
+        print(f"Wrote {len(manifest['shards'])} difficulty shards{' with traces' if traces else ''} and {MANIFEST_NAME}")
+    if index is not None:
+        print(f"Added {index.save()} canonical keys to {index_path}")
+    if catalogue_path:
+        write_catalogue(ndjson_path, catalogue_path, version, bucket)
+        print(f"Seed catalogue written to: {catalogue_path}")
+    if not keep_ndjson:
+        os.remove(ndjson_path)
+    print(f"Wrote {written} puzzles to {output_path} ({layout} layout)")
     print("Done")
 
 
+def write_catalogue(ndjson_path: str, catalogue_path: str, version: str, bucket: str = 'removal'):
+    """Write the (id, seed, generator_version) entries of the checkpointed records."""
+    catalogue = SeedCatalogue()
+    missing = 0
+    for record in iter_ndjson(ndjson_path):
+        if 'seed' not in record:
+            # checkpointed by a version that did not record seeds
+            missing += 1
+            continue
+        profile = RATING_DIG_PROFILE[record['difficulty']] if bucket == 'rating' else None
+        catalogue.add(record['id'], record['seed'], version, profile)
+    catalogue.save(catalogue_path)
+    if missing:
+        print(f"  {missing} records have no seed and are not in the catalogue")
+
+
+class _SearchReport:
+    """Running per-difficulty totals of the instrumented records, folded in one at a time."""
+
+    def __init__(self):
+        self.searched = SearchSummary()
+        self.wall_ms = {}
+        self.digs = {}
+
+    def add(self, record: dict):
+        difficulty = record['difficulty']
+        self.searched.add(difficulty, record['search'])
+        self.wall_ms[difficulty] = self.wall_ms.get(difficulty, 0) + record['search']['wall_ms']
+        dig = record.get('dig')
+        if not dig:
+            return
+        if difficulty not in self.digs:
+            self.digs[difficulty] = {'boards': 0, 'abandoned': {}, 'swaps': 0, 'checks': {}, 'removed': {},
+                                     'cached': False, 'hits': 0, 'misses': 0}
+        totals = self.digs[difficulty]
+        totals['boards'] += dig['boards']
+        for why, n in dig['abandoned'].items():
+            totals['abandoned'][why] = totals['abandoned'].get(why, 0) + n
+        totals['swaps'] += dig['swaps']
+        totals['checks'][dig['checks']] = totals['checks'].get(dig['checks'], 0) + 1
+        totals['removed'][dig['removed']] = totals['removed'].get(dig['removed'], 0) + 1
+        if 'cache' in dig:
+            totals['cached'] = True
+            totals['hits'] += dig['cache']['hits']
+            totals['misses'] += dig['cache']['misses']
+
+    def report(self) -> dict:
+        by_difficulty = self.searched.to_record()
+        for difficulty, summary in by_difficulty.items():
+            summary['totals']['wall_ms'] = round(self.wall_ms[difficulty], 3)
+            totals = self.digs.get(difficulty)
+            if not totals:
+                continue
+            summary['dig'] = {
+                'boards': totals['boards'],
+                'abandoned': totals['abandoned'],
+                'swaps': totals['swaps'],
+                'checks_histogram': log2_histogram_of_counts(totals['checks']),
+                'removed_histogram': {str(n): totals['removed'][n] for n in sorted(totals['removed'])},
+            }
+            if totals['cached']:
+                lookups = totals['hits'] + totals['misses']
+                summary['dig']['cache'] = {
+                    'hits': totals['hits'],
+                    'misses': totals['misses'],
+                    'hit_rate': round(totals['hits'] / lookups, 4) if lookups else 0.0,
+                }
+        return {'instrumented_puzzles': len(self.searched), 'by_difficulty': by_difficulty}
+
+
+def write_search_report(ndjson_path: str, report_path: str):
+    """Aggregate the per-record search costs into per-difficulty totals and histograms.
+
+    Records are folded into running totals as the checkpoint is read, so the
+    report takes the same memory for any number of puzzles.
+    """
+    totals = _SearchReport()
+    for record in iter_ndjson(ndjson_path):
+        if 'search' in record:
+            totals.add(record)
+    report = totals.report()
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
 if __name__ == '__main__':
-    out = sys.argv[1] if len(sys.argv) > 1 else '../app/public/puzzles'
-    total = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
-    generate_many(out, total)
+    parser = argparse.ArgumentParser(description='Generate many puzzles into puzzles.json')
+    parser.add_argument('output_dir', nargs='?', default='../app/public/puzzles', help='Directory to write puzzles.json')
+    parser.add_argument('total_count', nargs='?', type=int, default=4000, help='Total number of puzzles')
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='bitmask', help='Solver backend for digging and uniqueness checks')
+    parser.add_argument('--workers', '-j', type=int, default=1, help='Number of worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='Master seed for reproducible output')
+    parser.add_argument('--resume', action='store_true', help='Continue from an existing puzzles.ndjson checkpoint')
+    parser.add_argument('--keep-ndjson', action='store_true', help='Keep puzzles.ndjson after compaction')
+    parser.add_argument('--format', choices=LAYOUTS, default='compact', help='Layout of puzzles.json')
+    parser.add_argument('--compress', action=argparse.BooleanOptionalAction, default=True,
+                        help='Also write precompressed puzzles.json.gz/.br')
+    parser.add_argument('--mode', choices=MODES, default='dig',
+                        help='dig every puzzle, or mint from a verified seed pool with transforms')
+    parser.add_argument('--seed-pool', type=int, default=20, help='Seed puzzles per difficulty in transform mode')
+    parser.add_argument('--bucket', choices=BUCKETS, default='removal',
+                        help='Assign difficulties by removal count or by technique rating')
+    parser.add_argument('--stats', action='store_true',
+                        help='Record per-puzzle search costs and write generate_report.json')
+    parser.add_argument('--profile', metavar='PATH', default=None, help='Dump cProfile output to PATH')
+    parser.add_argument('--dedupe', action=argparse.BooleanOptionalAction, default=True,
+                        help='Reject puzzles isomorphic to one already in the canonical index')
+    parser.add_argument('--index', default=None,
+                        help='Canonical index shared across runs (default: <output_dir>/canonical.idx, '
+                             'cleared by every run without --resume)')
+    parser.add_argument('--bank', default=None, metavar='PATH',
+                        help='Draw solution grids from this solution bank, a fixed pool that is reused '
+                             'and never refilled during the run (built or topped up first)')
+    parser.add_argument('--bank-size', type=int, default=2000,
+                        help=f'Fewest grids in --bank (also at least one per {BANK_PUZZLES_PER_GRID} puzzles)')
+    parser.add_argument('--shards', action=argparse.BooleanOptionalAction, default=True,
+                        help='Also write per-difficulty shards and puzzles.index.json for random access')
+    parser.add_argument('--catalogue', default=None, metavar='PATH',
+                        help='Also write a seed catalogue (id, seed, generator version) to PATH')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help='Transposition table entries for uniqueness checks (0 disables it)')
+    parser.add_argument('--box-size', type=int, choices=sorted(DIG_BANDS), default=3,
+                        help='Box size of the puzzles (3: 9x9, 4: 16x16, 5: 25x25)')
+    parser.add_argument('--traces', action=argparse.BooleanOptionalAction, default=True,
+                        help='Write solve traces for the app next to the shards (see solve_traces.py)')
+    parser.add_argument('--max-attempts', type=int, default=MAX_DIG_ATTEMPTS,
+                        help='Dig attempts per puzzle id before stopping with an error')
+    args = parser.parse_args()
+    run_args = (args.output_dir, args.total_count, args.solver, args.workers, args.seed,
+                args.resume, args.keep_ndjson, args.format, args.compress,
+                args.mode, args.seed_pool, args.bucket, args.stats, args.dedupe, args.index,
+                args.bank, args.bank_size, args.shards, args.catalogue, args.cache_size, args.box_size,
+                args.traces, args.max_attempts)
+    if args.profile:
+        profile_call(args.profile, generate_many, *run_args)
+    else:
+        generate_many(*run_args)
@@ -1,19 +1,49 @@
 """
 数独パズル生成器
 唯一解を保証する高品質なパズルを生成
+box_size で 16x16（4）・25x25（5）の盤面も作れる（帯とチェックの上限は digger.py）。
 """
+import argparse
 import json
 import random
 from typing import List, Tuple, Optional
 import os
 
+from digger import CHECK_NODE_LIMITS, DEFAULT_MAX_CHECKS, DIG_BANDS, LARGE_BOARD_SOLVER, AdaptiveDigger
+from grid_bank import SolutionBank
+from puzzle_codec import LAYOUTS, id_prefix, write_puzzles
+from puzzle_shards import write_shards
+from rater import TechniqueRater
+from search_stats import SearchStats
+from solvers import SOLVERS, get_solver
+from transposition import DEFAULT_MAX_ENTRIES, TranspositionTable
+
 
 class SudokuGenerator:
     """数独パズル生成クラス"""
     
-    def __init__(self):
-        self.size = 9
-        self.box_size = 3
+    def __init__(self, solver: str = 'backtrack', stats: SearchStats | None = None,
+                 max_checks: int | None = DEFAULT_MAX_CHECKS, deadline: float | None = None,
+                 bank: SolutionBank | None = None, cache_size: int = DEFAULT_MAX_ENTRIES,
+                 box_size: int = 3):
+        if box_size not in DIG_BANDS:
+            raise ValueError(f"Unsupported box size: {box_size} (choose from {sorted(DIG_BANDS)})")
+        if bank is not None and bank.box_size != box_size:
+            raise ValueError(f"Solution bank holds {bank.size}x{bank.size} grids")
+        self.size = box_size * box_size
+        self.box_size = box_size
+        self.solver_name = solver
+        self.engine = get_solver(solver, self.box_size)
+        # stats を渡すと解の数え上げ・求解・掘り試行の探索コストを加算する
+        self.engine.stats = stats
+        # bank を渡すと完成盤を解かずにバンクから受け取る（grid_bank.py）
+        self.bank = bank
+        # cache_size 件の置換表で1パズル分の一意性チェックの結果を使い回す（bitmask のみ、0 で無効）
+        cache = TranspositionTable(cache_size) if cache_size else None
+        self.digger = AdaptiveDigger(self.engine, self.size, max_checks, deadline, cache=cache,
+                                     max_nodes=CHECK_NODE_LIMITS[box_size])
+        self.last_dig = None
+        self.rater = TechniqueRater(self.box_size)
     
     def is_valid(self, board: List[List[int]], row: int, col: int, num: int) -> bool:
         """指定位置に数字を配置できるかチェック"""
@@ -37,43 +67,34 @@ class SudokuGenerator:
     
     def solve(self, board: List[List[int]], find_all: bool = False) -> int:
         """
-        バックトラッキングでパズルを解く
+        ソルバーバックエンドでパズルを解く
         find_all=True の場合、解の数を数える（2つ見つけたら打ち切り）
+        find_all=False の場合、盤面をその場で埋めて 1（解なしなら 0）を返す
         """
-        solutions = []
-        
-        def backtrack():
-            if len(solutions) > 1 and find_all:
-                return  # 複数解が見つかったので打ち切り
-            
-            # 空のセルを探す
-            for i in range(self.size):
-                for j in range(self.size):
-                    if board[i][j] == 0:
-                        # 1-9を試す
-                        for num in range(1, 10):
-                            if self.is_valid(board, i, j, num):
-                                board[i][j] = num
-                                backtrack()
-                                board[i][j] = 0
-                        return
-            
-            # すべて埋まった = 解が見つかった
-            if find_all:
-                solutions.append([row[:] for row in board])
-            else:
-                solutions.append(True)
+        if find_all:
+            return self.engine.count_solutions(board, limit=2)
         
-        backtrack()
-        return len(solutions) if find_all else (1 if solutions else 0)
+        solution = self.engine.solve(board)
+        if solution is None:
+            return 0
+        for i in range(self.size):
+            board[i][:] = solution[i]
+        return 1
     
     def generate_complete_board(self) -> List[List[int]]:
         """完成した数独盤面を生成"""
+        if self.bank is not None:
+            return self.bank.take(random)
+
         board = [[0] * self.size for _ in range(self.size)]
+        if self.box_size != 3:
+            # 16x16 以上は対角ブロックから乱択なしで解くと行き詰まりやすいので、空の盤面を乱択付きで解く。
+            # 乱択の求解もまれに行き詰まるので、打ち切ってやり直す random_grid を使う（bitmask のみ）
+            return self.engine.random_grid(random)
         
         # 対角線上の3x3ブロックを埋める（これらは独立している）
-        for box in range(3):
-            nums = list(range(1, 10))
+        for box in range(self.box_size):
+            nums = list(range(1, self.size + 1))
             random.shuffle(nums)
             for i in range(self.box_size):
                 for j in range(self.box_size):
@@ -83,16 +104,16 @@ class SudokuGenerator:
         self.solve(board)
         return board
     
-    def count_solutions(self, board: List[List[int]]) -> int:
-        """解の数を数える（2つ以上見つかったら打ち切り）"""
-        board_copy = [row[:] for row in board]
-        return self.solve(board_copy, find_all=True)
+    def count_solutions(self, board: List[List[int]], limit: int = 2) -> int:
+        """解の数を数える（limit 個見つかったら打ち切り）"""
+        return self.engine.count_solutions(board, limit=limit)
     
     def generate_puzzle(self, difficulty: str = 'medium') -> Tuple[List[List[int]], List[List[int]]]:
         """
         指定難易度のパズルを生成
         difficulty: 'easy', 'medium', 'hard', 'expert'
         """
+        cells = self.size * self.size
         # 難易度ごとのヒント数の範囲
         hints_range = {
             'easy': (36, 40),      # 41-45個削除
@@ -100,55 +121,28 @@ class SudokuGenerator:
             'hard': (25, 29),      # 52-56個削除
             'expert': (22, 24)     # 57-59個削除
         }
+        if self.box_size != 3:
+            # 大きい盤面は削除数の帯（digger.py）から求める
+            hints_range = {d: (cells - high, cells - low) for d, (low, high) in DIG_BANDS[self.box_size].items()}
         
-        min_hints, max_hints = hints_range.get(difficulty, (30, 35))
+        min_hints, max_hints = hints_range.get(difficulty, hints_range['medium'])
         target_hints = random.randint(min_hints, max_hints)
-        
-        max_attempts = 20
-        for attempt in range(max_attempts):
-            # 完成盤を生成
-            solution = self.generate_complete_board()
-            puzzle = [row[:] for row in solution]
-            
-            # セルのインデックスをランダムに並べる
-            cells = [(i, j) for i in range(self.size) for j in range(self.size)]
-            random.shuffle(cells)
-            
-            removed = 0
-            for row, col in cells:
-                if removed >= 81 - target_hints:
-                    break
-                
-                # 一時的に削除
-                temp = puzzle[row][col]
-                puzzle[row][col] = 0
-                
-                # 唯一解チェック
-                puzzle_copy = [row[:] for row in puzzle]
-                if self.count_solutions(puzzle_copy) == 1:
-                    removed += 1
-                else:
-                    # 複数解になる場合は戻す
-                    puzzle[row][col] = temp
-            
-            # 目標ヒント数に近い場合は成功
-            current_hints = sum(1 for i in range(self.size) for j in range(self.size) if puzzle[i][j] != 0)
-            if abs(current_hints - target_hints) <= 2:
-                return puzzle, solution
-        
-        # 最大試行回数に達した場合でも返す
-        return puzzle, solution
+
+        # 届かない盤面は早めに捨て、行き詰まったら削除をやり直す（digger.py）
+        result = self.digger.dig(self.generate_complete_board, cells - target_hints, cells - max_hints)
+        self.last_dig = result
+        return result.puzzle, result.solution
     
     def calculate_difficulty_score(self, puzzle: List[List[int]]) -> int:
-        """パズルの難易度スコアを計算（簡易版）"""
+        """パズルの難易度スコアを計算（簡易版。テクニックによる評価は self.rater）"""
         hints = sum(1 for i in range(self.size) for j in range(self.size) if puzzle[i][j] != 0)
         # ヒントが少ないほど高スコア
-        return 81 - hints
+        return self.size * self.size - hints
 
 
-def generate_puzzle_database(output_dir: str = '/output'):
-    """パズルデータベースを生成"""
-    generator = SudokuGenerator()
+def generate_puzzle_database(output_dir: str = '/output', solver: str = 'backtrack', layout: str = 'compact',
+                             box_sizes: tuple[int, ...] = (3,)):
+    """パズルデータベースを生成（box_sizes の盤面を1つのファイルにまとめる）"""
     
     # 各難易度のパズル数
     puzzle_counts = {
@@ -162,45 +156,63 @@ def generate_puzzle_database(output_dir: str = '/output'):
     
     print("パズル生成開始...")
     
-    for difficulty, count in puzzle_counts.items():
-        print(f"\n{difficulty.upper()} レベルのパズルを{count}個生成中...")
-        
-        for i in range(count):
-            puzzle, solution = generator.generate_puzzle(difficulty)
-            score = generator.calculate_difficulty_score(puzzle)
-            
-            puzzle_data = {
-                'id': f"{difficulty}_{i+1:03d}",
-                'difficulty': difficulty,
-                'score': score,
-                'puzzle': puzzle,
-                'solution': solution
-            }
-            
-            all_puzzles.append(puzzle_data)
-            
-            if (i + 1) % 10 == 0:
-                print(f"  {i+1}/{count} 完了")
+    for box_size in box_sizes:
+        # 16x16 以上はノード上限のあるソルバーでないと一部のチェックが終わらない
+        box_solver = solver if box_size == 3 else LARGE_BOARD_SOLVER
+        if box_solver != solver:
+            print(f"{box_size ** 2}x{box_size ** 2} は {box_solver} ソルバーで生成します（{solver} にはノード上限がありません）")
+        generator = SudokuGenerator(box_solver, box_size=box_size)
+        size = generator.size
+        for difficulty, count in puzzle_counts.items():
+            print(f"\n{size}x{size} {difficulty.upper()} レベルのパズルを{count}個生成中...")
+
+            for i in range(count):
+                puzzle, solution = generator.generate_puzzle(difficulty)
+                rating = generator.rater.rate(puzzle)
+
+                puzzle_data = {
+                    'id': f"{id_prefix(difficulty, size)}_{i+1:03d}",
+                    'difficulty': difficulty,
+                    'size': size,
+                    'score': generator.calculate_difficulty_score(puzzle),
+                    **rating.to_record(),
+                    'puzzle': puzzle,
+                    'solution': solution
+                }
+
+                all_puzzles.append(puzzle_data)
+
+                if (i + 1) % 10 == 0:
+                    print(f"  {i+1}/{count} 完了")
     
     # 出力ディレクトリを作成
     os.makedirs(output_dir, exist_ok=True)
     
     # 全パズルを保存
     output_path = os.path.join(output_dir, 'puzzles.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_puzzles, f, ensure_ascii=False, indent=2)
+    write_puzzles(output_path, all_puzzles, layout)
+    # 難易度ごとのシャードと目次（アプリは必要な1問だけを取りに行く。9x9 のみ）
+    write_shards(output_path, output_dir)
     
     print(f"\n✅ 合計 {len(all_puzzles)} 個のパズルを生成しました")
     print(f"📁 保存先: {output_path}")
     
     # 統計情報を表示
     print("\n=== 統計情報 ===")
-    for difficulty in ['easy', 'medium', 'hard', 'expert']:
-        count = sum(1 for p in all_puzzles if p['difficulty'] == difficulty)
-        if count > 0:
-            avg_score = sum(p['score'] for p in all_puzzles if p['difficulty'] == difficulty) / count
-            print(f"{difficulty.upper()}: {count}個, 平均スコア: {avg_score:.1f}")
+    for size in sorted({p['size'] for p in all_puzzles}):
+        for difficulty in ['easy', 'medium', 'hard', 'expert']:
+            puzzles = [p for p in all_puzzles if p['difficulty'] == difficulty and p['size'] == size]
+            if puzzles:
+                avg_score = sum(p['score'] for p in puzzles) / len(puzzles)
+                print(f"{size}x{size} {difficulty.upper()}: {len(puzzles)}個, 平均スコア: {avg_score:.1f}")
 
 
 if __name__ == '__main__':
-    generate_puzzle_database()
+    parser = argparse.ArgumentParser(description='Generate a puzzle database with unique solutions')
+    parser.add_argument('output_dir', nargs='?', default='/output', help='Directory to write puzzles.json')
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='backtrack', help='Solver backend')
+    parser.add_argument('--format', choices=LAYOUTS, default='compact', help='Layout of puzzles.json')
+    parser.add_argument('--box-sizes', type=int, nargs='+', choices=sorted(DIG_BANDS), default=[3],
+                        help='Box sizes to generate (3: 9x9, 4: 16x16, 5: 25x25; 4 and 5 always use the bitmask solver)')
+    args = parser.parse_args()
+    generate_puzzle_database(args.output_dir, args.solver, args.format, tuple(args.box_sizes))
@@ -0,0 +1,159 @@
+"""
+完成盤（解グリッド）のバンク
+穴掘りのたびに完成盤を解き直す代わりに、あらかじめ作っておいた完成盤を
+ランダムな対称変換（transforms.py）をかけて払い出す。
+
+  - 既定では take(rng) は古い順に1枚取り出す。残りが low_water を下回ると
+    バックグラウンドのスレッドが capacity まで補充する（空ならその場で1枚作る）。
+    補充は CPU を使う処理で GIL を取り合うので、掘りと同時に走っても速くは
+    ならない。プロセスが手すきの間（サービスでプールが満杯のときなど）に
+    作り溜めておくためのもの。
+  - reuse=True では取り出さずに rng でランダムに1枚選ぶ。バンクの中身が
+    同じなら rng だけで結果が決まる（generate_many の再現性のため）。
+
+完成盤は乱択付きの bitmask ソルバーで空の盤面を解いて作る。補充の乱数は
+seed から作った専用の Random で、生成は1枚ずつロックの中で行うので、
+スレッドで作ってもその場で作っても n 枚目の中身は同じになる。
+save() / path でディスクに保存し、次回の実行で再利用できる。
+
+Usage: python grid_bank.py <path> [--count N] [--seed S]   （バンクを作って保存）
+"""
+import argparse
+import json
+import os
+import random
+import threading
+from collections import deque
+
+from bitmask_solver import BitmaskSolver
+from puzzle_codec import decode_grid, encode_grid
+from transforms import SudokuTransform
+
+BANK_FORMAT = 1
+
+
+class SolutionBank:
+    """完成盤のバンク
+
+    transform=False のときは保存されている盤面をそのまま返す。
+    """
+
+    def __init__(self, box_size: int = 3, capacity: int = 1000, low_water: int = 200,
+                 path: str | None = None, seed: int | None = None, transform: bool = True,
+                 reuse: bool = False):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        self.capacity = capacity
+        self.low_water = low_water
+        self.path = path
+        self.transform = transform
+        self.reuse = reuse
+        self.grids: deque[str] = deque()
+        self.made = 0
+        self.taken = 0
+        self._engine = BitmaskSolver(box_size)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._refilling = None
+        self._closed = threading.Event()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self.grids)
+
+    def load(self, path: str) -> int:
+        """保存済みの盤面を末尾に追加し、その数を返す"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != BANK_FORMAT or data.get('box_size') != self.box_size:
+            raise ValueError(f"{path} is not a {self.size}x{self.size} solution bank")
+        grids = data.get('grids', [])
+        with self._lock:
+            self.grids.extend(grids)
+        return len(grids)
+
+    def save(self, path: str | None = None) -> int:
+        """残っている盤面を保存し、その数を返す"""
+        path = path or self.path
+        if not path:
+            return 0
+        with self._lock:
+            grids = list(self.grids)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': BANK_FORMAT, 'box_size': self.box_size, 'grids': grids}, f)
+        os.replace(tmp_path, path)
+        return len(grids)
+
+    def _make_grid(self) -> str:
+        """完成盤を1枚作る（ロックの中で呼ぶ）"""
+        self.made += 1
+        return encode_grid(self._engine.random_grid(self._rng))
+
+    def fill(self, count: int | None = None) -> int:
+        """その場で capacity（または count 枚）まで補充し、追加した数を返す"""
+        target = self.capacity if count is None else len(self.grids) + count
+        added = 0
+        while len(self.grids) < target and not self._closed.is_set():
+            with self._lock:
+                self.grids.append(self._make_grid())
+            added += 1
+        return added
+
+    def refill_if_low(self):
+        """low_water を下回っていればバックグラウンドで補充を始める"""
+        if len(self.grids) >= self.low_water or self._closed.is_set():
+            return
+        if self._refilling is not None and self._refilling.is_alive():
+            return
+        self._refilling = threading.Thread(target=self.fill, name='solution-bank-refill', daemon=True)
+        self._refilling.start()
+
+    def _hand_out(self, grid: str, rng) -> list[list[int]]:
+        board = decode_grid(grid)
+        if self.transform:
+            board = SudokuTransform.random(rng, self.box_size).apply(board)
+        return board
+
+    def take(self, rng=None) -> list[list[int]]:
+        """完成盤を1枚払い出す"""
+        rng = rng or random
+        if self.reuse:
+            if not self.grids:
+                self.fill()
+            self.taken += 1
+            return self._hand_out(self.grids[rng.randrange(len(self.grids))], rng)
+
+        with self._lock:
+            grid = self.grids.popleft() if self.grids else self._make_grid()
+            self.taken += 1
+        self.refill_if_low()
+        return self._hand_out(grid, rng)
+
+    def close(self):
+        """バックグラウンドの補充を止める"""
+        self._closed.set()
+        if self._refilling is not None:
+            self._refilling.join()
+
+    def metrics(self) -> dict:
+        return {
+            'size': len(self.grids),
+            'capacity': self.capacity,
+            'low_water': self.low_water,
+            'made': self.made,
+            'taken': self.taken,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build a solution-grid bank and save it to disk')
+    parser.add_argument('path', help='Bank file to create or top up')
+    parser.add_argument('--count', type=int, default=2000, help='Grids the bank should hold')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible grids')
+    args = parser.parse_args()
+    bank = SolutionBank(capacity=args.count, path=args.path, seed=args.seed)
+    added = bank.fill()
+    print(f"Added {added} grids; {bank.save()} grids in {args.path}")
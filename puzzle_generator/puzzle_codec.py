@@ -0,0 +1,149 @@
+"""Shared codec for the puzzle database layouts.
+
+nested  : puzzle/solution stored as size x size lists of ints (the original layout)
+compact : puzzle/solution stored as one string of size*size cell characters,
+          '0' for an empty cell, '1'-'9' then 'A'-'Z' for larger values,
+          written one record per line without indentation
+
+The app decodes the same layout in app/src/services/puzzleCodec.ts.
+"""
+import gzip
+import json
+import math
+import os
+
+try:
+    import brotli
+except ImportError:  # optional: only needed for .br artifacts
+    brotli = None
+
+CELL_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+GRID_FIELDS = ('puzzle', 'solution')
+LAYOUTS = ('compact', 'nested')
+# fields that live in their own files (solve traces, see solve_traces.py)
+# and are left out of puzzles.json and the shards
+SIDECAR_FIELDS = ('trace',)
+
+
+def encode_grid(grid: list[list[int]]) -> str:
+    """Encode a square grid as a string with one character per cell."""
+    return ''.join(CELL_CHARS[v] for row in grid for v in row)
+
+
+def decode_grid(value) -> list[list[int]]:
+    """Decode a grid string back to nested lists. Nested lists pass through."""
+    if not isinstance(value, str):
+        return value
+    size = math.isqrt(len(value))
+    if size * size != len(value):
+        raise ValueError(f"Grid string length {len(value)} is not a square")
+    cells = [CELL_CHARS.index(ch) for ch in value.upper()]
+    return [cells[r * size:(r + 1) * size] for r in range(size)]
+
+
+def box_size_of(record: dict) -> int:
+    """Box size of a record's grid: from its size tag, else from the puzzle itself.
+
+    Records written before 16x16 and 25x25 support carry no size and are 9x9.
+    """
+    size = record.get('size') or len(decode_grid(record['puzzle']))
+    box_size = math.isqrt(size)
+    if box_size * box_size != size:
+        raise ValueError(f"Grid size {size} is not a square")
+    return box_size
+
+
+def id_prefix(difficulty: str, size: int = 9) -> str:
+    """Id prefix of a record: the difficulty, tagged with the grid size unless 9x9."""
+    return difficulty if size == 9 else f"{difficulty}_{size}x{size}"
+
+
+def encode_record(record: dict) -> dict:
+    """Return a copy of record with its grids in the compact layout, without sidecar fields."""
+    out = {k: v for k, v in record.items() if k not in SIDECAR_FIELDS}
+    for field in GRID_FIELDS:
+        if field in out and not isinstance(out[field], str):
+            out[field] = encode_grid(out[field])
+    return out
+
+
+def decode_record(record: dict) -> dict:
+    """Return a copy of record with its grids in the nested layout, without sidecar fields."""
+    out = {k: v for k, v in record.items() if k not in SIDECAR_FIELDS}
+    for field in GRID_FIELDS:
+        if field in out:
+            out[field] = decode_grid(out[field])
+    return out
+
+
+class PuzzleFileWriter:
+    """Stream records into a puzzles.json array in the given layout.
+
+    The nested layout matches json.dump(records, f, ensure_ascii=False, indent=2).
+    """
+
+    def __init__(self, path: str, layout: str = 'compact'):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout: {layout}")
+        self.path = path
+        self.layout = layout
+        self.count = 0
+        self._tmp_path = path + '.tmp'
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        self._file.write('[')
+
+    def write(self, record: dict):
+        if self.layout == 'compact':
+            body = json.dumps(encode_record(record), ensure_ascii=False, separators=(',', ':'))
+            self._file.write((',\n' if self.count else '\n') + body)
+        else:
+            body = json.dumps(decode_record(record), ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            self._file.write((',\n  ' if self.count else '\n  ') + body)
+        self.count += 1
+
+    def close(self):
+        self._file.write('\n]' if self.count else ']')
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+
+def write_puzzles(path: str, records, layout: str = 'compact', compress: bool = True) -> int:
+    """Write records to path in the given layout, plus .gz/.br siblings. Returns count."""
+    with PuzzleFileWriter(path, layout) as writer:
+        for record in records:
+            writer.write(record)
+    if compress:
+        write_compressed(path)
+    return writer.count
+
+
+def load_puzzles(path: str) -> list[dict]:
+    """Load a puzzles.json in either layout and return nested records."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [decode_record(p) for p in json.load(f)]
+
+
+def write_compressed(path: str) -> list[str]:
+    """Write precompressed path.gz (and path.br if brotli is installed)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = []
+    with open(path + '.gz', 'wb') as f:
+        # mtime=0 keeps the artifact byte-identical across runs
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(path + '.gz')
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+        written.append(path + '.br')
+    return written
@@ -0,0 +1,151 @@
+"""Streaming puzzle storage helpers.
+
+Puzzles are checkpointed as NDJSON (one record per line) while they are
+generated, so a crash only loses the unflushed batch. compact_ndjson turns
+the checkpoint into the puzzles.json array the app loads, without holding
+the whole corpus in memory. iter_puzzle_file reads either format back one
+record at a time.
+"""
+import json
+import os
+
+from puzzle_codec import write_puzzles
+
+
+class NDJSONWriter:
+    """Append puzzle records to an NDJSON file, flushing every batch_size records."""
+
+    def __init__(self, path: str, batch_size: int = 100, append: bool = False):
+        self.path = path
+        self.batch_size = batch_size
+        self.written = 0
+        self._buffer = []
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: dict):
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.written += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def repair_ndjson(path: str) -> int:
+    """Drop a trailing partial line left by a crash. Returns bytes removed."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return 0
+        # walk back to the last newline
+        pos = size
+        block = 4096
+        while pos > 0:
+            step = min(block, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            idx = chunk.rfind(b'\n')
+            if idx != -1:
+                end = pos - step + idx + 1
+                break
+            pos -= step
+        else:
+            end = 0
+        if end < size:
+            f.truncate(end)
+        return size - end
+
+
+def iter_ndjson(path: str):
+    """Yield records from an NDJSON file, skipping blank lines."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_puzzle_file(path: str, block_size: int = 1 << 16):
+    """Yield records from a puzzles.json array or an NDJSON file without loading it whole.
+
+    The format is detected from the first non-blank character ('[' for an
+    array). Array elements are decoded one at a time from a sliding buffer.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(block_size).lstrip()
+        if not buf.startswith('['):
+            f.seek(0)
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+
+        pos = 1
+        eof = False
+        while True:
+            # skip separators between elements
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                if pos == len(buf):
+                    raise ValueError('buffer exhausted')
+                record, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # element cut off at the end of the buffer: read more
+                if eof:
+                    raise ValueError(f"Truncated JSON array in {path}")
+                more = f.read(block_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield record
+            pos = end
+
+
+def read_progress(path: str) -> dict:
+    """Return {difficulty: completed count} from an NDJSON checkpoint.
+
+    Records for each difficulty are written in id order, so the number of
+    records seen equals the index of the last completed id.
+    """
+    progress = {}
+    if not os.path.exists(path):
+        return progress
+    for record in iter_ndjson(path):
+        difficulty = record['difficulty']
+        progress[difficulty] = progress.get(difficulty, 0) + 1
+    return progress
+
+
+def compact_ndjson(ndjson_path: str, json_path: str, layout: str = 'compact',
+                   compress: bool = True) -> int:
+    """Stream an NDJSON checkpoint into a puzzles.json array. Returns record count.
+
+    See puzzle_codec for the available layouts. With compress, precompressed
+    .gz/.br siblings are written next to json_path.
+    """
+    return write_puzzles(json_path, iter_ndjson(ndjson_path), layout, compress)
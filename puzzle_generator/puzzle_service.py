@@ -0,0 +1,365 @@
+"""Asyncio HTTP service that hands out freshly generated puzzles.
+
+Usage: python puzzle_service.py [--host 0.0.0.0] [--port 8000] [--pool-size 50]
+                                [--workers N] [--solver dlx|backtrack|bitmask]
+                                [--dig-deadline SEC] [--bank PATH]
+
+Every difficulty keeps a bounded ready-queue of puzzles. A background task per
+difficulty tops the queue up by digging batches in a process pool, so
+requests are answered straight from the queue without any search.
+Each dig is capped by --dig-deadline seconds (see digger.py); puzzles that
+give up short of their difficulty's removal band are dropped and counted
+as gave_up in /metrics.
+
+Each worker takes its solution grids from a solution-grid bank (see
+grid_bank.py), loaded from --bank if given. The bank refills itself in a
+background thread. That thread shares the worker's CPU under the GIL, so
+it does not speed up a batch in progress. It pays off while the pools
+are full and the worker is otherwise idle: the grids it solves then are
+ready for the next batches.
+
+Endpoints (JSON, CORS enabled):
+  GET /puzzle?difficulty=expert            one puzzle (compact layout)
+  GET /puzzles?difficulty=easy&count=10    a batch of up to --max-batch puzzles (and no
+                                           more than --pool-size); add partial=1 to
+                                           accept fewer
+  GET /metrics                             queue depth, capacity, refill rate, ...
+  GET /health                              liveness probe
+
+When a queue cannot satisfy a request the service answers 503 with a
+Retry-After header estimated from the recent refill rate, instead of making
+the client wait on a search.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from generate_fast import FastSudokuGenerator
+from grid_bank import SolutionBank
+from puzzle_codec import encode_record
+from rater import TechniqueRater
+from solvers import SOLVERS
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+# refill rate is averaged over this many seconds
+RATE_WINDOW = 60.0
+MAX_REQUEST_BYTES = 16 * 1024
+# solution grids kept per worker, refilled in the background below the low-water mark
+BANK_CAPACITY = 500
+BANK_LOW_WATER = 100
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               503: 'Service Unavailable'}
+
+# per-process state of the pool workers, created by _init_worker
+_generator = None
+_rater = None
+
+
+def _init_worker(solver: str, deadline: float | None = None, bank_path: str | None = None):
+    global _generator, _rater
+    bank = SolutionBank(capacity=BANK_CAPACITY, low_water=BANK_LOW_WATER, path=bank_path)
+    if bank_path:
+        # workers load the same file; start each one at a different grid
+        bank.grids.rotate(random.SystemRandom().randrange(max(1, len(bank))))
+    bank.refill_if_low()
+    _generator = FastSudokuGenerator(solver, deadline=deadline, bank=bank)
+    _rater = TechniqueRater(_generator.box_size)
+
+
+def _dig_batch(difficulty: str, count: int, seed: int) -> tuple[list[dict], int]:
+    """Dig count puzzles in a pool worker.
+
+    Returns the compact records of the puzzles that reached their band and
+    the number of digs that gave up.
+    """
+    rng = random.Random(seed)
+    records = []
+    gave_up = 0
+    for _ in range(count):
+        puzzle, solution = _generator.generate_puzzle(difficulty, rng)
+        if not _generator.last_dig.in_band:
+            gave_up += 1
+            continue
+        hints = sum(1 for row in puzzle for cell in row if cell != 0)
+        records.append(encode_record({
+            'id': f"{difficulty}_{uuid.uuid4().hex[:12]}",
+            'difficulty': difficulty,
+            'size': _generator.size,
+            'hints': hints,
+            'score': _generator.size ** 2 - hints,
+            **_rater.rate(puzzle).to_record(),
+            'puzzle': puzzle,
+            'solution': solution
+        }))
+    return records, gave_up
+
+
+class PuzzlePool:
+    """Ready-queue of one difficulty plus its refill statistics."""
+
+    def __init__(self, difficulty: str, capacity: int):
+        self.difficulty = difficulty
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=capacity)
+        self.capacity = capacity
+        self.in_flight = 0
+        self.served = 0
+        self.refilled = 0
+        self.rejected = 0
+        self.errors = 0
+        self.gave_up = 0
+        self._refill_times: deque = deque()
+
+    def take(self, count: int) -> list[dict]:
+        records = [self.queue.get_nowait() for _ in range(min(count, self.queue.qsize()))]
+        self.served += len(records)
+        return records
+
+    def add(self, records: list[dict]):
+        now = time.monotonic()
+        for record in records:
+            if self.queue.full():
+                break
+            self.queue.put_nowait(record)
+            self.refilled += 1
+            self._refill_times.append(now)
+
+    def refill_rate(self) -> float:
+        """Puzzles per second added over the last RATE_WINDOW seconds."""
+        cutoff = time.monotonic() - RATE_WINDOW
+        while self._refill_times and self._refill_times[0] < cutoff:
+            self._refill_times.popleft()
+        if not self._refill_times:
+            return 0.0
+        span = max(1.0, time.monotonic() - self._refill_times[0])
+        return len(self._refill_times) / span
+
+    def retry_after(self, missing: int) -> int:
+        """Seconds until about `missing` puzzles should be ready again."""
+        rate = self.refill_rate()
+        return max(1, round(missing / rate)) if rate else 5
+
+    def metrics(self) -> dict:
+        return {
+            'depth': self.queue.qsize(),
+            'capacity': self.capacity,
+            'in_flight': self.in_flight,
+            'served': self.served,
+            'refilled': self.refilled,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'gave_up': self.gave_up,
+            'refill_rate_per_sec': round(self.refill_rate(), 3),
+        }
+
+
+class PuzzleService:
+    """Owns the pools, the refill tasks and the process pool."""
+
+    def __init__(self, pool_size: int = 50, workers: int | None = None, solver: str = 'bitmask',
+                 batch_size: int = 5, max_batch: int = 50, dig_deadline: float | None = 2.0,
+                 bank_path: str | None = None):
+        self.pool_size = pool_size
+        self.workers = workers or os.cpu_count() or 1
+        self.solver = solver
+        self.batch_size = batch_size
+        self.max_batch = max_batch
+        self.dig_deadline = dig_deadline
+        self.bank_path = bank_path
+        self.started = time.monotonic()
+        self.pools: dict[str, PuzzlePool] = {}
+        self._executor = None
+        self._tasks = []
+        self._rng = random.SystemRandom()
+
+    async def start(self):
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(self.solver, self.dig_deadline, self.bank_path))
+        for difficulty in DIFFICULTIES:
+            pool = PuzzlePool(difficulty, self.pool_size)
+            self.pools[difficulty] = pool
+            self._tasks.append(asyncio.create_task(self._refill(pool)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _refill(self, pool: PuzzlePool):
+        """Keep the pool full, with at most this pool's share of the workers busy."""
+        loop = asyncio.get_running_loop()
+        max_in_flight = max(1, self.workers // len(DIFFICULTIES))
+        pending = {}
+        while True:
+            room = pool.capacity - pool.queue.qsize() - pool.in_flight
+            while room > 0 and len(pending) < max_in_flight:
+                count = min(self.batch_size, room)
+                future = loop.run_in_executor(self._executor, _dig_batch, pool.difficulty, count,
+                                              self._rng.randrange(2 ** 63))
+                pending[asyncio.ensure_future(future)] = count
+                pool.in_flight += count
+                room -= count
+            if not pending:
+                # full: poll until requests drain the queue
+                await asyncio.sleep(0.05)
+                continue
+            done, _ = await asyncio.wait(pending, timeout=0.05, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pool.in_flight -= pending.pop(task)
+                try:
+                    records, gave_up = task.result()
+                except Exception as e:  # a crashed batch must not stop the refill loop
+                    pool.errors += 1
+                    print(f"Refill of {pool.difficulty} failed: {e}")
+                    continue
+                pool.gave_up += gave_up
+                pool.add(records)
+
+    def metrics(self) -> dict:
+        return {
+            'uptime_sec': round(time.monotonic() - self.started, 1),
+            'workers': self.workers,
+            'solver': self.solver,
+            'dig_deadline_sec': self.dig_deadline,
+            'pools': {d: pool.metrics() for d, pool in self.pools.items()},
+        }
+
+    def handle(self, method: str, target: str) -> tuple:
+        """Route a request. Returns (status, body, extra headers)."""
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if method != 'GET':
+            return 405, {'error': 'only GET is supported'}, {'Allow': 'GET'}
+        if url.path == '/health':
+            return 200, {'status': 'ok'}, {}
+        if url.path == '/metrics':
+            return 200, self.metrics(), {}
+        if url.path not in ('/puzzle', '/puzzles'):
+            return 404, {'error': f"unknown path {url.path}"}, {}
+
+        difficulty = query.get('difficulty', 'medium')
+        pool = self.pools.get(difficulty)
+        if pool is None:
+            return 400, {'error': f"difficulty must be one of {', '.join(DIFFICULTIES)}"}, {}
+        if url.path == '/puzzle':
+            count, partial = 1, False
+        else:
+            try:
+                count = int(query.get('count', '10'))
+            except ValueError:
+                return 400, {'error': 'count must be an integer'}, {}
+            # a full batch never fits into a smaller pool, so it would be refused forever
+            largest = min(self.max_batch, pool.capacity)
+            if not 1 <= count <= largest:
+                return 400, {'error': f"count must be between 1 and {largest}"}, {}
+            partial = query.get('partial', '0').lower() in ('1', 'true', 'yes')
+
+        available = pool.queue.qsize()
+        if available == 0 or (available < count and not partial):
+            pool.rejected += 1
+            retry = pool.retry_after(count - available)
+            return 503, {'error': f"{difficulty} pool is refilling", 'available': available,
+                         'retry_after': retry}, {'Retry-After': str(retry)}
+
+        records = pool.take(count)
+        if url.path == '/puzzle':
+            return 200, records[0], {}
+        return 200, {'difficulty': difficulty, 'count': len(records), 'puzzles': records}, {}
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 loop with keep-alive."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                if len(head) > MAX_REQUEST_BYTES:
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, {}, False)
+                    break
+                method, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                if method == 'OPTIONS':
+                    # CORS preflight
+                    status, body, extra = 200, {}, {'Access-Control-Allow-Methods': 'GET'}
+                else:
+                    status, body, extra = self.handle(method, target)
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                await self._respond(writer, status, body, extra, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status: int, body, extra: dict, keep_alive: bool):
+        payload = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        headers = {
+            'Content-Type': 'application/json; charset=utf-8',
+            'Content-Length': str(len(payload)),
+            'Cache-Control': 'no-store',
+            'Access-Control-Allow-Origin': '*',
+            'Connection': 'keep-alive' if keep_alive else 'close',
+            **extra,
+        }
+        head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        head += ''.join(f"{k}: {v}\r\n" for k, v in headers.items()) + '\r\n'
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+
+
+async def run_service(host: str, port: int, **options):
+    service = PuzzleService(**options)
+    await service.start()
+    server = await asyncio.start_server(service.serve_client, host, port)
+    print(f"Serving puzzles on http://{host}:{port} "
+          f"({service.workers} worker(s), {service.pool_size} per difficulty, solver {service.solver})")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # e.g. on Windows
+            pass
+    async with server:
+        await stop.wait()
+    await service.stop()
+    print("Stopped")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve freshly generated puzzles over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--pool-size', type=int, default=50, help='Ready puzzles kept per difficulty')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='Generator processes (default: CPU count)')
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='bitmask', help='Solver backend for digging')
+    parser.add_argument('--batch-size', type=int, default=5, help='Puzzles dug per worker task')
+    parser.add_argument('--max-batch', type=int, default=50, help='Largest count accepted by /puzzles (also capped at --pool-size)')
+    parser.add_argument('--dig-deadline', type=float, default=2.0,
+                        help='Seconds one dig may take before it gives up (0 for no deadline)')
+    parser.add_argument('--bank', default=None, metavar='PATH',
+                        help='Solution bank file to preload the workers from (see grid_bank.py)')
+    args = parser.parse_args()
+    asyncio.run(run_service(args.host, args.port, pool_size=args.pool_size, workers=args.workers,
+                            solver=args.solver, batch_size=args.batch_size, max_batch=args.max_batch,
+                            dig_deadline=args.dig_deadline or None, bank_path=args.bank))
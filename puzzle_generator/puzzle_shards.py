@@ -0,0 +1,180 @@
+"""Per-difficulty puzzle shards with a byte-offset manifest.
+
+Usage: python puzzle_shards.py [puzzles.json|puzzles.ndjson] [output_dir]
+
+Splits a puzzle file into one shard per difficulty, puzzles.<difficulty>.ndjson.
+Every record is stored in the compact layout on a line padded with spaces to
+a fixed size, so record i of a shard starts at offset + i * record_size.
+The manifest puzzles.index.json lists each shard's file, count, record size
+and offset:
+
+    {"format": 1, "layout": "compact", "total": 4000,
+     "shards": {"easy": {"file": "puzzles.easy.ndjson", "count": 1000,
+                         "record_size": 262, "offset": 0, "bytes": 262000}, ...}}
+
+The app loads only the manifest up front. It then fetches a single puzzle
+with an HTTP Range request, or a whole shard where Range is not supported,
+so the first puzzle does not get slower as the catalogue grows. Shards are
+not precompressed, since byte ranges must address the stored bytes.
+
+The app plays 9x9 only, so records of other sizes are left out of the shards.
+
+With traces (the default), each shard also gets a trace file,
+puzzles.<difficulty>.traces.ndjson, whose line i holds the solve trace of
+record i (see solve_traces.py) in the same fixed-record layout. Its entry
+sits under the shard's "traces" key, and the manifest lists the technique
+names the steps refer to. The app fetches a trace only when a hint asks
+for one, so the puzzle shards stay as small as before.
+"""
+import argparse
+import json
+import math
+import os
+
+from puzzle_codec import decode_grid, encode_record
+from puzzle_io import iter_puzzle_file
+from rater import TechniqueRater
+from solve_traces import TRACE_FIELD, TRACE_FORMAT, TRACE_TECHNIQUES, TraceEncoder, trace_name
+
+SHARD_FORMAT = 1
+MANIFEST_NAME = 'puzzles.index.json'
+# grid size the app plays; records without a size tag are 9x9
+SHARD_GRID_SIZE = 9
+
+
+def shard_name(difficulty: str) -> str:
+    return f"puzzles.{difficulty}.ndjson"
+
+
+def _encode(record: dict) -> bytes:
+    return json.dumps(encode_record(record), ensure_ascii=True, separators=(',', ':')).encode('ascii')
+
+
+def _encode_trace(record: dict, encoder: TraceEncoder) -> bytes:
+    """Trace line of a record: its precomputed trace, else one rated here."""
+    trace = record.get(TRACE_FIELD) or encoder.trace(decode_grid(record['puzzle']))
+    return json.dumps({'id': record['id'], **trace}, separators=(',', ':')).encode('ascii')
+
+
+def _pad_file(path: str, record_size: int):
+    """Replace path with the lines of path.raw, each padded to record_size bytes."""
+    with open(path + '.raw', 'rb') as src, open(path + '.tmp', 'wb') as dst:
+        for line in src:
+            dst.write(line.rstrip(b'\n').ljust(record_size - 1) + b'\n')
+    os.remove(path + '.raw')
+    os.replace(path + '.tmp', path)
+
+
+def write_shards(source_path: str, output_dir: str, traces: bool = True) -> dict:
+    """Write the shards, their trace files and the manifest for source_path. Returns the manifest.
+
+    The source is streamed twice (sizes first, then records), so memory
+    does not depend on its size. Trace lines are written unpadded during the
+    first pass and padded afterwards.
+    """
+    sizes: dict[str, int] = {}
+    counts: dict[str, int] = {}
+    trace_sizes: dict[str, int] = {}
+    trace_files = {}
+    encoder = TraceEncoder(TechniqueRater(math.isqrt(SHARD_GRID_SIZE))) if traces else None
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        for record in iter_puzzle_file(source_path):
+            if record.get('size', SHARD_GRID_SIZE) != SHARD_GRID_SIZE:
+                continue
+            difficulty = record['difficulty']
+            counts[difficulty] = counts.get(difficulty, 0) + 1
+            # +1 for the newline
+            sizes[difficulty] = max(sizes.get(difficulty, 0), len(_encode(record)) + 1)
+            if traces:
+                if difficulty not in trace_files:
+                    trace_files[difficulty] = open(os.path.join(output_dir, trace_name(difficulty) + '.raw'), 'wb')
+                line = _encode_trace(record, encoder)
+                trace_files[difficulty].write(line + b'\n')
+                trace_sizes[difficulty] = max(trace_sizes.get(difficulty, 0), len(line) + 1)
+    finally:
+        for f in trace_files.values():
+            f.close()
+    for difficulty in trace_files:
+        _pad_file(os.path.join(output_dir, trace_name(difficulty)), trace_sizes[difficulty])
+
+    files = {d: open(os.path.join(output_dir, shard_name(d) + '.tmp'), 'wb') for d in counts}
+    try:
+        for record in iter_puzzle_file(source_path):
+            if record.get('size', SHARD_GRID_SIZE) != SHARD_GRID_SIZE:
+                continue
+            difficulty = record['difficulty']
+            files[difficulty].write(_encode(record).ljust(sizes[difficulty] - 1) + b'\n')
+    finally:
+        for f in files.values():
+            f.close()
+    for difficulty in counts:
+        path = os.path.join(output_dir, shard_name(difficulty))
+        os.replace(path + '.tmp', path)
+
+    manifest = {
+        'format': SHARD_FORMAT,
+        'layout': 'compact',
+        'total': sum(counts.values()),
+        'shards': {
+            d: {
+                'file': shard_name(d),
+                'count': counts[d],
+                'record_size': sizes[d],
+                'offset': 0,
+                'bytes': counts[d] * sizes[d],
+            } for d in counts
+        },
+    }
+    if traces:
+        manifest['trace_format'] = TRACE_FORMAT
+        manifest['techniques'] = TRACE_TECHNIQUES
+        for d in counts:
+            manifest['shards'][d]['traces'] = {
+                'file': trace_name(d),
+                'record_size': trace_sizes[d],
+                'bytes': counts[d] * trace_sizes[d],
+            }
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+
+def read_shard_record(output_dir: str, manifest: dict, difficulty: str, index: int) -> dict:
+    """Read record index of a difficulty's shard by seeking to its offset."""
+    shard = manifest['shards'][difficulty]
+    if not 0 <= index < shard['count']:
+        raise IndexError(f"{difficulty} shard has {shard['count']} records")
+    with open(os.path.join(output_dir, shard['file']), 'rb') as f:
+        f.seek(shard['offset'] + index * shard['record_size'])
+        return json.loads(f.read(shard['record_size']))
+
+
+def read_trace_record(output_dir: str, manifest: dict, difficulty: str, index: int) -> dict:
+    """Read the trace of record index of a difficulty's shard."""
+    shard = manifest['shards'][difficulty]
+    if not 0 <= index < shard['count']:
+        raise IndexError(f"{difficulty} shard has {shard['count']} records")
+    traces = shard['traces']
+    with open(os.path.join(output_dir, traces['file']), 'rb') as f:
+        f.seek(index * traces['record_size'])
+        return json.loads(f.read(traces['record_size']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Split a puzzle file into per-difficulty shards')
+    parser.add_argument('input', nargs='?', default='../app/public/puzzles/puzzles.json',
+                        help='puzzles.json (either layout) or an NDJSON checkpoint')
+    parser.add_argument('output_dir', nargs='?', default=None, help='Directory for the shards (default: next to input)')
+    parser.add_argument('--traces', action=argparse.BooleanOptionalAction, default=True,
+                        help='Write a solve-trace file per shard (see solve_traces.py)')
+    args = parser.parse_args()
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.input))
+    manifest = write_shards(args.input, output_dir, args.traces)
+    for difficulty, shard in manifest['shards'].items():
+        print(f"{shard['file']}: {shard['count']} records of {shard['record_size']} bytes")
+        if 'traces' in shard:
+            print(f"{shard['traces']['file']}: {shard['count']} traces of {shard['traces']['record_size']} bytes")
+    print(f"Manifest written to: {os.path.join(output_dir, MANIFEST_NAME)}")
@@ -0,0 +1,458 @@
+"""
+人間向けテクニックによる難易度評価
+ビットマスク候補を使った論理ソルバーで、簡単なテクニックから順に
+適用して解き進め、必要だった最も難しいテクニックで難易度を決める。
+"""
+from itertools import combinations
+
+# (名前, レベル)。レベルが小さいほど易しい
+TECHNIQUES = [
+    ('hidden_single', 1),
+    ('naked_single', 2),
+    ('locked_candidates', 3),
+    ('naked_pair', 4),
+    ('hidden_pair', 5),
+    ('naked_triple', 6),
+    ('hidden_triple', 7),
+    ('x_wing', 8),
+    ('xy_wing', 9),
+    ('swordfish', 9),
+]
+TECHNIQUE_LEVELS = dict(TECHNIQUES)
+# 論理だけでは解けない（仮定が必要）
+GUESS = 'guess'
+GUESS_LEVEL = 10
+
+# 難易度ごとの最難テクニックのレベル範囲
+DIFFICULTY_BANDS = {
+    'easy': (1, 1),
+    'medium': (2, 3),
+    'hard': (4, 9),
+    'expert': (GUESS_LEVEL, GUESS_LEVEL),
+}
+
+
+class Step:
+    """1手分の推論（配置または候補の除去）"""
+
+    __slots__ = ('technique', 'placements', 'eliminations', 'cells')
+
+    def __init__(self, technique: str, placements: list, eliminations: list, cells: list):
+        self.technique = technique
+        # placements: [(cell, digit)], eliminations: [(cell, digit)]
+        self.placements = placements
+        self.eliminations = eliminations
+        # 推論の根拠となったセル
+        self.cells = cells
+
+
+class Rating:
+    """評価結果"""
+
+    def __init__(self, solved: bool, level: int, technique: str, technique_score: int,
+                 counts: dict, steps: list):
+        self.solved = solved
+        self.level = level
+        self.technique = technique
+        # 全手順のテクニックのレベルの合計（解けなかった空きセルは GUESS_LEVEL ずつ）
+        self.technique_score = technique_score
+        self.counts = counts
+        self.steps = steps
+
+    def difficulty(self) -> str:
+        """最難テクニックのレベルから難易度名を返す"""
+        for name, (low, high) in DIFFICULTY_BANDS.items():
+            if low <= self.level <= high:
+                return name
+        return 'easy'
+
+    def to_record(self) -> dict:
+        """出力レコードに埋め込む形式"""
+        return {
+            'rating': self.level,
+            'technique': self.technique,
+            'technique_score': self.technique_score,
+            'techniques': self.counts,
+        }
+
+
+class TechniqueRater:
+    """テクニック順に解き進めてパズルを評価するクラス
+
+    候補は評価中ずっと差分更新する。セルごとの候補マスクに加えて、
+    ユニットごと・数字ごとに「置ける位置」のマスク（ユニット内の添字のビット）を
+    持ち、single になったセル・ユニットを控えておく。singles は控えだけを、
+    重いテクニックはセルを見直さずにマスクを読む。
+    """
+
+    def __init__(self, box_size: int = 3):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        size = self.size
+        self.num_cells = size * size
+        self.full_mask = (1 << size) - 1
+
+        rows = [[r * size + c for c in range(size)] for r in range(size)]
+        cols = [[r * size + c for r in range(size)] for c in range(size)]
+        boxes = [[] for _ in range(size)]
+        self.box_of = []
+        for cell in range(self.num_cells):
+            r, c = divmod(cell, size)
+            b = (r // box_size) * box_size + c // box_size
+            self.box_of.append(b)
+            boxes[b].append(cell)
+        self.rows, self.cols, self.boxes = rows, cols, boxes
+        self.units = rows + cols + boxes
+        self.peers = []
+        for cell in range(self.num_cells):
+            r, c = divmod(cell, size)
+            peers = set(rows[r]) | set(cols[c]) | set(boxes[self.box_of[cell]])
+            peers.discard(cell)
+            self.peers.append(sorted(peers))
+        self.peer_sets = [set(p) for p in self.peers]
+        # セルが属する行・列・ブロックの self.units での番号
+        self.units_of = [(cell // size, size + cell % size, 2 * size + self.box_of[cell])
+                         for cell in range(self.num_cells)]
+        # セルが属する3ユニットの (位置マスクの先頭 = ユニット番号 * size, ユニット内の添字のビット, ユニット)
+        self.slots = [[] for _ in range(self.num_cells)]
+        for u, unit in enumerate(self.units):
+            for i, cell in enumerate(unit):
+                self.slots[cell].append((u * size, 1 << i, unit))
+
+        # ブロック内の添字で見た各行・各列の位置マスク。行（列）内の添字でも同じブロックの
+        # セルは box_size 個ずつ並ぶので、_box_rows がそのままブロックのマスクになる
+        band = (1 << box_size) - 1
+        self._box_rows = [band << (i * box_size) for i in range(box_size)]
+        self._box_cols = [sum(1 << (j * box_size + i) for j in range(box_size)) for i in range(box_size)]
+
+        # 評価中の状態（rate が作り直す）
+        # where[u * size + d]: ユニット u で数字 d + 1 を置けるセルの位置マスク
+        self._where: list[int] = []
+        # 前回の走査から single になった where の添字（hidden single）とセル（naked single）
+        self._hidden: set[int] = set()
+        self._naked: set[int] = set()
+        # 候補の尽きた空きセルができた（解なしの盤面）
+        self._broken = False
+
+        self._finders = [
+            ('hidden_single', self._hidden_singles),
+            ('naked_single', self._naked_singles),
+            ('locked_candidates', self._locked_candidates),
+            ('naked_pair', lambda g, cand: self._naked_subset(g, cand, 2)),
+            ('hidden_pair', lambda g, cand: self._hidden_subset(g, cand, 2)),
+            ('naked_triple', lambda g, cand: self._naked_subset(g, cand, 3)),
+            ('hidden_triple', lambda g, cand: self._hidden_subset(g, cand, 3)),
+            ('x_wing', lambda g, cand: self._fish(g, cand, 2)),
+            ('xy_wing', self._xy_wing),
+            ('swordfish', lambda g, cand: self._fish(g, cand, 3)),
+        ]
+
+    # ---- 評価本体 ----
+
+    def rate(self, board: list[list[int]], record_steps: bool = False) -> Rating:
+        """パズルを評価する。record_steps=True なら手順も記録する"""
+        size, units_of = self.size, self.units_of
+        grid = [v for row in board for v in row]
+        used = [0] * len(self.units)
+        for cell, v in enumerate(grid):
+            if v:
+                bit = 1 << (v - 1)
+                r, c, b = units_of[cell]
+                used[r] |= bit
+                used[c] |= bit
+                used[b] |= bit
+        cand = [0] * self.num_cells
+        self._naked = naked = set()
+        self._broken = False
+        empties = 0
+        for cell, v in enumerate(grid):
+            if not v:
+                empties += 1
+                r, c, b = units_of[cell]
+                m = cand[cell] = self.full_mask & ~(used[r] | used[c] | used[b])
+                if not m:
+                    self._broken = True
+                elif not m & (m - 1):
+                    naked.add(cell)
+        self._where = where = [0] * (len(self.units) * size)
+        self._hidden = hidden = set()
+        for u, unit in enumerate(self.units):
+            base = u * size
+            pos = 1
+            for cell in unit:
+                m = cand[cell]
+                while m:
+                    bit = m & -m
+                    m ^= bit
+                    where[base + bit.bit_length() - 1] |= pos
+                pos <<= 1
+            for k in range(base, base + size):
+                w = where[k]
+                if w and not w & (w - 1):
+                    hidden.add(k)
+
+        counts: dict[str, int] = {}
+        steps: list[Step] = []
+        level = 0
+        technique = None
+        technique_score = 0
+
+        while empties:
+            found = None
+            for _, finder in self._finders:
+                found = finder(grid, cand)
+                if found:
+                    break
+            if not found:
+                break
+
+            progress = False
+            for step in found:
+                applied = self._apply(step, grid, cand)
+                if not applied:
+                    continue
+                progress = True
+                empties -= len(step.placements)
+                counts[step.technique] = counts.get(step.technique, 0) + 1
+                step_level = TECHNIQUE_LEVELS[step.technique]
+                technique_score += step_level
+                if step_level > level:
+                    level, technique = step_level, step.technique
+                if record_steps:
+                    steps.append(step)
+            if not progress or self._broken:
+                # 矛盾（解なしの盤面）
+                break
+
+        solved = empties == 0
+        if not solved:
+            level, technique = GUESS_LEVEL, GUESS
+            technique_score += GUESS_LEVEL * empties
+        return Rating(solved, level, technique or 'hidden_single', technique_score, counts, steps)
+
+    def _apply(self, step: Step, grid: list[int], cand: list[int]) -> bool:
+        """推論を盤面に適用する。既に無効になっていれば False"""
+        applied = False
+        for cell, digit in step.placements:
+            bit = 1 << (digit - 1)
+            if grid[cell] or not cand[cell] & bit:
+                return applied
+            grid[cell] = digit
+            self._unplace(cell, cand[cell])
+            cand[cell] = 0
+            # digit を候補に持つ仲間のセルは3ユニットの位置マスクで分かる
+            for base, _, unit in self.slots[cell]:
+                w = self._where[base + digit - 1]
+                while w:
+                    pos = w & -w
+                    w ^= pos
+                    p = unit[pos.bit_length() - 1]
+                    if cand[p] & bit:
+                        self._eliminate(cand, p, bit)
+            applied = True
+        for cell, digit in step.eliminations:
+            bit = 1 << (digit - 1)
+            if cand[cell] & bit:
+                self._eliminate(cand, cell, bit)
+                applied = True
+        return applied
+
+    def _eliminate(self, cand: list[int], cell: int, bit: int):
+        """空きセルの候補 bit を消す（cand[cell] が bit を含むときに呼ぶ）"""
+        m = cand[cell] ^ bit
+        cand[cell] = m
+        if not m:
+            self._broken = True
+        elif not m & (m - 1):
+            self._naked.add(cell)
+        self._unplace(cell, bit)
+
+    def _unplace(self, cell: int, bits: int):
+        """cell を数字 bits の置き場所から外す"""
+        where, hidden = self._where, self._hidden
+        slots = self.slots[cell]
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            d = bit.bit_length() - 1
+            for base, pos, _ in slots:
+                k = base + d
+                w = where[k] ^ pos
+                where[k] = w
+                if w and not w & (w - 1):
+                    hidden.add(k)
+
+    def _cells_of(self, unit: list[int], positions: int) -> list[int]:
+        """位置マスクのセルをユニット内の順に返す"""
+        cells = []
+        while positions:
+            pos = positions & -positions
+            positions ^= pos
+            cells.append(unit[pos.bit_length() - 1])
+        return cells
+
+    # ---- テクニック ----
+    # 各関数は見つかった Step のリストを返す（見つからなければ空リスト）
+
+    def _hidden_singles(self, grid, cand):
+        # 見つけた single は適用されるか、同じパスの別の手でそのユニットの候補が
+        # 変わるので、前回の走査以降に single になったものだけ見ればよい
+        steps = []
+        taken = set()
+        where, units, size = self._where, self.units, self.size
+        for k in sorted(self._hidden):
+            w = where[k]
+            if not w or w & (w - 1):
+                continue
+            u, d = divmod(k, size)
+            cell = units[u][w.bit_length() - 1]
+            if cell in taken:
+                continue
+            taken.add(cell)
+            steps.append(Step('hidden_single', [(cell, d + 1)], [], units[u]))
+        self._hidden.clear()
+        return steps
+
+    def _naked_singles(self, grid, cand):
+        steps = []
+        for cell in sorted(self._naked):
+            m = cand[cell]
+            if m and not m & (m - 1):
+                steps.append(Step('naked_single', [(cell, m.bit_length())], [], [cell] + self.peers[cell]))
+        self._naked.clear()
+        return steps
+
+    def _locked_candidates(self, grid, cand):
+        size, box_size, where = self.size, self.box_size, self._where
+        box_rows, box_cols = self._box_rows, self._box_cols
+        # pointing: ブロック内の候補が1行（1列）に揃っている
+        for b, box in enumerate(self.boxes):
+            base = (2 * size + b) * size
+            for d in range(size):
+                w = where[base + d]
+                if not w & (w - 1):
+                    continue
+                first = (w & -w).bit_length() - 1
+                if not w & ~box_rows[first // box_size]:
+                    cells = self._cells_of(box, w)
+                    line = self.rows[cells[0] // size]
+                elif not w & ~box_cols[first % box_size]:
+                    cells = self._cells_of(box, w)
+                    line = self.cols[cells[0] % size]
+                else:
+                    continue
+                bit = 1 << d
+                elims = [(c, d + 1) for c in line if self.box_of[c] != b and cand[c] & bit]
+                if elims:
+                    return [Step('locked_candidates', [], elims, cells)]
+        # claiming: 行（列）内の候補が1ブロックに揃っている
+        for u, line in enumerate(self.rows + self.cols):
+            base = u * size
+            for d in range(size):
+                w = where[base + d]
+                if not w & (w - 1) or w & ~box_rows[((w & -w).bit_length() - 1) // box_size]:
+                    continue
+                bit = 1 << d
+                cells = self._cells_of(line, w)
+                b = self.box_of[cells[0]]
+                elims = [(c, d + 1) for c in self.boxes[b] if c not in line and cand[c] & bit]
+                if elims:
+                    return [Step('locked_candidates', [], elims, cells)]
+        return []
+
+    def _naked_subset(self, grid, cand, k):
+        name = 'naked_pair' if k == 2 else 'naked_triple'
+        for unit in self.units:
+            cells = [c for c in unit if cand[c] and cand[c].bit_count() <= k]
+            if len(cells) < k:
+                continue
+            for combo in combinations(cells, k):
+                union = 0
+                for c in combo:
+                    union |= cand[c]
+                if union.bit_count() != k:
+                    continue
+                elims = [(c, d + 1) for c in unit if c not in combo and cand[c] & union
+                         for d in range(self.size) if cand[c] & union & (1 << d)]
+                if elims:
+                    return [Step(name, [], elims, list(combo))]
+        return []
+
+    def _hidden_subset(self, grid, cand, k):
+        name = 'hidden_pair' if k == 2 else 'hidden_triple'
+        size, where = self.size, self._where
+        for u, unit in enumerate(self.units):
+            base = u * size
+            positions = {}
+            for d in range(size):
+                w = where[base + d]
+                if 2 <= w.bit_count() <= k:
+                    positions[d] = w
+            if len(positions) < k:
+                continue
+            for digits in combinations(positions, k):
+                union = 0
+                for d in digits:
+                    union |= positions[d]
+                if union.bit_count() != k:
+                    continue
+                keep = 0
+                for d in digits:
+                    keep |= 1 << d
+                cells = sorted(self._cells_of(unit, union))
+                elims = [(c, d + 1) for c in cells for d in range(size)
+                         if cand[c] & ~keep & (1 << d)]
+                if elims:
+                    return [Step(name, [], elims, cells)]
+        return []
+
+    def _fish(self, grid, cand, n):
+        name = 'x_wing' if n == 2 else 'swordfish'
+        size, where = self.size, self._where
+        for d in range(size):
+            bit = 1 << d
+            # 行の位置マスクは列の番号、列の位置マスクは行の番号のビット
+            for first, base, cover in ((0, self.rows, self.cols), (size, self.cols, self.rows)):
+                lines = {}
+                for i in range(size):
+                    mask = where[(first + i) * size + d]
+                    if 2 <= mask.bit_count() <= n:
+                        lines[i] = mask
+                if len(lines) < n:
+                    continue
+                for combo in combinations(lines, n):
+                    union = 0
+                    for i in combo:
+                        union |= lines[i]
+                    if union.bit_count() != n:
+                        continue
+                    elims = []
+                    for j in range(size):
+                        if union & (1 << j):
+                            for i, c in enumerate(cover[j]):
+                                if i not in combo and cand[c] & bit:
+                                    elims.append((c, d + 1))
+                    if elims:
+                        cells = [base[i][j] for i in combo for j in range(size) if lines[i] & (1 << j)]
+                        return [Step(name, [], elims, cells)]
+        return []
+
+    def _xy_wing(self, grid, cand):
+        bivalue = [c for c in range(self.num_cells) if cand[c] and cand[c].bit_count() == 2]
+        for pivot in bivalue:
+            pm = cand[pivot]
+            wings = [c for c in self.peers[pivot] if cand[c].bit_count() == 2
+                     and (cand[c] & pm).bit_count() == 1]
+            for a, b in combinations(wings, 2):
+                am, bm = cand[a], cand[b]
+                if am & pm == bm & pm:
+                    continue
+                z = am & bm & ~pm
+                if not z or z & (z - 1):
+                    continue
+                d = z.bit_length()
+                elims = [(c, d) for c in self.peer_sets[a] & self.peer_sets[b]
+                         if c != pivot and cand[c] & z]
+                if elims:
+                    return [Step('xy_wing', [], sorted(elims), [pivot, a, b])]
+        return []
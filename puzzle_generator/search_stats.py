@@ -0,0 +1,176 @@
+"""
+探索の計測
+ソルバーの stats 属性に SearchStats を設定すると、探索1回ごとに
+ノード数・バックトラック数・伝播による配置数・経過時間を加算する。
+stats が None（既定）のときは探索中のローカル変数を数えるだけで、
+集計や時刻取得は行わない。
+"""
+import math
+
+
+class SearchStats:
+    """探索コストの累計
+
+    nodes        探索木のノード数
+    backtracks   矛盾で行き止まりになったノード数
+    propagations 制約伝播（強制された手）で置いた数
+    seconds      探索の経過時間
+    calls        探索の回数（掘り試行1回 = 1回）
+    max_nodes    探索1回あたりの最大ノード数
+    """
+
+    __slots__ = ('nodes', 'backtracks', 'propagations', 'seconds', 'calls', 'max_nodes')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+        self.seconds = 0.0
+        self.calls = 0
+        self.max_nodes = 0
+
+    def record(self, nodes: int, backtracks: int, propagations: int, seconds: float) -> None:
+        """探索1回分を加算"""
+        self.nodes += nodes
+        self.backtracks += backtracks
+        self.propagations += propagations
+        self.seconds += seconds
+        self.calls += 1
+        if nodes > self.max_nodes:
+            self.max_nodes = nodes
+
+    def merge(self, other: 'SearchStats') -> None:
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.propagations += other.propagations
+        self.seconds += other.seconds
+        self.calls += other.calls
+        self.max_nodes = max(self.max_nodes, other.max_nodes)
+
+    def to_record(self) -> dict:
+        """出力レコードに埋め込む形式"""
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'propagations': self.propagations,
+            'ms': round(self.seconds * 1000, 3),
+            'calls': self.calls,
+            'max_nodes': self.max_nodes,
+        }
+
+
+def _log2_bound(v) -> int:
+    n = math.ceil(v)
+    return 1 << (n - 1).bit_length() if n > 1 else 1
+
+
+def _format_histogram(buckets: dict[int, int]) -> dict:
+    return {f"<={bound}": buckets[bound] for bound in sorted(buckets)}
+
+
+def log2_histogram(values) -> dict:
+    """値を 2 のべき乗の上限ごとに数える（{"<=1": n, "<=2": n, "<=4": n, ...}）"""
+    buckets: dict[int, int] = {}
+    for v in values:
+        bound = _log2_bound(v)
+        buckets[bound] = buckets.get(bound, 0) + 1
+    return _format_histogram(buckets)
+
+
+def log2_histogram_of_counts(counts: dict) -> dict:
+    """値ごとの度数 {値: 件数} から log2_histogram と同じ形式を作る"""
+    buckets: dict[int, int] = {}
+    for v, n in counts.items():
+        bound = _log2_bound(v)
+        buckets[bound] = buckets.get(bound, 0) + n
+    return _format_histogram(buckets)
+
+
+# 合計を取る項目と、ヒストグラムを作る項目
+SUMMARY_TOTALS = ('nodes', 'backtracks', 'propagations', 'ms', 'calls')
+SUMMARY_HISTOGRAMS = ('nodes', 'ms', 'max_nodes')
+
+
+class SearchSummary:
+    """難易度ごとの探索コストの合計とヒストグラムを逐次集計する
+
+    レコードを溜めずにパズル数・合計・ヒストグラムの度数だけを持つので、
+    件数が増えてもメモリは一定。merge() で別プロセスの集計を合わせられる。
+    """
+
+    def __init__(self):
+        self.groups: dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return sum(g['puzzles'] for g in self.groups.values())
+
+    def _group(self, difficulty: str) -> dict:
+        if difficulty not in self.groups:
+            self.groups[difficulty] = {
+                'puzzles': 0,
+                'totals': {key: 0 for key in SUMMARY_TOTALS},
+                'histograms': {key: {} for key in SUMMARY_HISTOGRAMS},
+            }
+        return self.groups[difficulty]
+
+    def add(self, difficulty: str | None, stats: dict) -> None:
+        """SearchStats.to_record() の値を1件加える"""
+        group = self._group(difficulty or 'unknown')
+        group['puzzles'] += 1
+        for key in SUMMARY_TOTALS:
+            group['totals'][key] += stats[key]
+        for key in SUMMARY_HISTOGRAMS:
+            buckets = group['histograms'][key]
+            bound = _log2_bound(stats[key])
+            buckets[bound] = buckets.get(bound, 0) + 1
+
+    def merge(self, other: 'SearchSummary') -> None:
+        for difficulty, theirs in other.groups.items():
+            group = self._group(difficulty)
+            group['puzzles'] += theirs['puzzles']
+            for key in SUMMARY_TOTALS:
+                group['totals'][key] += theirs['totals'][key]
+            for key in SUMMARY_HISTOGRAMS:
+                buckets = group['histograms'][key]
+                for bound, n in theirs['histograms'][key].items():
+                    buckets[bound] = buckets.get(bound, 0) + n
+
+    def to_record(self) -> dict:
+        return {
+            difficulty: {
+                'puzzles': group['puzzles'],
+                'totals': {key: round(v, 3) for key, v in group['totals'].items()},
+                **{f"{key}_histogram": _format_histogram(group['histograms'][key])
+                   for key in SUMMARY_HISTOGRAMS},
+            } for difficulty, group in self.groups.items()
+        }
+
+
+def summarize(records: list[dict], field: str = 'search') -> dict:
+    """難易度ごとに探索コストの合計とヒストグラムを集計する
+
+    records は field に SearchStats.to_record() の値を持つレコード。
+    """
+    summary = SearchSummary()
+    for record in records:
+        stats = record.get(field)
+        if stats:
+            summary.add(record.get('difficulty'), stats)
+    return summary.to_record()
+
+
+def profile_call(path: str, fn, *args, **kwargs):
+    """fn を cProfile 付きで実行し、結果を path に保存して上位を表示する"""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        print(f"\nProfile written to: {path} (open with python -m pstats)")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
@@ -0,0 +1,172 @@
+"""Seed-addressable puzzle catalogue.
+
+Usage: python seed_catalogue.py <catalogue.json> [id ...]
+
+FastSudokuGenerator draws every random choice from the rng it is given, so
+a puzzle is fully determined by its seed and the generator version (see
+FastSudokuGenerator.version, which also names the grid size unless 9x9). A catalogue therefore stores
+(id, seed, generator_version) per puzzle instead of two grids. The dig
+profile is added only when it differs from the id's difficulty, which
+happens with --bucket rating. Puzzles are rebuilt on demand, with an LRU
+cache of recently expanded records in front of the generator.
+
+generate_many.py --catalogue PATH writes one. Each dig attempt there is
+seeded with puzzle_seed(master seed, id, attempt), and the catalogue keeps
+the seed of the attempt that was accepted.
+
+With ids on the command line, prints the expanded records (useful to
+reproduce a reported puzzle exactly).
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+from collections import OrderedDict
+
+from digger import DIG_BANDS
+from generate_fast import GENERATOR_VERSION, FastSudokuGenerator
+from rater import TechniqueRater
+from solvers import SOLVERS
+
+CATALOGUE_FORMAT = 1
+
+
+def puzzle_seed(master_seed, puzzle_id: str, attempt: int = 0) -> int:
+    """Seed of one dig attempt for a puzzle id.
+
+    Kept to 53 bits so that the app's JSON.parse reads record seeds exactly.
+    """
+    digest = hashlib.sha256(f"{master_seed}:{puzzle_id}:{attempt}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') >> 11
+
+
+def difficulty_of(puzzle_id: str) -> str:
+    """Difficulty encoded in an id such as expert_0042 or expert_16x16_0042."""
+    return puzzle_id.split('_', 1)[0]
+
+
+def expand(generator: FastSudokuGenerator, rater: TechniqueRater, puzzle_id: str, seed: int,
+           profile: str | None = None) -> dict:
+    """Regenerate the record of puzzle_id from its seed."""
+    difficulty = difficulty_of(puzzle_id)
+    puzzle, solution = generator.generate_puzzle(profile or difficulty, random.Random(seed))
+    hints = sum(1 for row in puzzle for cell in row if cell != 0)
+    return {
+        'id': puzzle_id,
+        'difficulty': difficulty,
+        'size': generator.size,
+        'hints': hints,
+        'score': generator.size ** 2 - hints,
+        **rater.rate(puzzle).to_record(),
+        'puzzle': puzzle,
+        'solution': solution
+    }
+
+
+class SeedCatalogue:
+    """Catalogue entries keyed by id, expanded through an LRU cache."""
+
+    def __init__(self, path: str | None = None, cache_size: int = 256):
+        self.path = path
+        self.entries: dict[str, tuple] = {}
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._generators: dict[str, FastSudokuGenerator] = {}
+        self._raters: dict[int, TechniqueRater] = {}
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, puzzle_id: str) -> bool:
+        return puzzle_id in self.entries
+
+    def add(self, puzzle_id: str, seed: int, version: str, profile: str | None = None):
+        if profile == difficulty_of(puzzle_id):
+            profile = None
+        self.entries[puzzle_id] = (seed, version, profile)
+
+    def load(self, path: str) -> int:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != CATALOGUE_FORMAT:
+            raise ValueError(f"{path} is not a seed catalogue")
+        for entry in data['entries']:
+            puzzle_id, seed, version, *profile = entry
+            self.entries[puzzle_id] = (seed, version, profile[0] if profile else None)
+        return len(data['entries'])
+
+    def save(self, path: str | None = None) -> int:
+        path = path or self.path
+        entries = [[puzzle_id, seed, version] + ([profile] if profile else [])
+                   for puzzle_id, (seed, version, profile) in self.entries.items()]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('{"format":%d,"entries":[\n' % CATALOGUE_FORMAT)
+            f.write(',\n'.join(json.dumps(e, separators=(',', ':')) for e in entries))
+            f.write('\n]}\n')
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    def get(self, puzzle_id: str) -> dict:
+        """Expanded record of puzzle_id. Raises KeyError or ValueError (version mismatch)."""
+        record = self._cache.get(puzzle_id)
+        if record is not None:
+            self._cache.move_to_end(puzzle_id)
+            self.hits += 1
+            return record
+
+        self.misses += 1
+        seed, version, profile = self.entries[puzzle_id]
+        generator = self._generator(version)
+        if generator.box_size not in self._raters:
+            self._raters[generator.box_size] = TechniqueRater(generator.box_size)
+        record = expand(generator, self._raters[generator.box_size], puzzle_id, seed, profile)
+        self._cache[puzzle_id] = record
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return record
+
+    def _generator(self, version: str) -> FastSudokuGenerator:
+        """Generator that reproduces version (generator version, solver name and grid size)."""
+        if version not in self._generators:
+            parts = version.split(':')
+            solver = parts[1] if len(parts) > 1 else ''
+            box_size = math.isqrt(int(parts[2])) if len(parts) > 2 and parts[2].isdigit() else 3
+            # deadline=None and the default check budget keep generation reproducible
+            generator = None
+            if solver in SOLVERS and box_size in DIG_BANDS:
+                generator = FastSudokuGenerator(solver, box_size=box_size)
+            if generator is None or generator.version != version:
+                current = generator.version if generator else f"{GENERATOR_VERSION}:{solver}"
+                raise ValueError(f"Cannot regenerate version {version} (this generator is {current})")
+            self._generators[version] = generator
+        return self._generators[version]
+
+    def summary(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Expand puzzles from a seed catalogue')
+    parser.add_argument('catalogue', help='Catalogue written by generate_many.py --catalogue')
+    parser.add_argument('ids', nargs='*', help='Puzzle ids to expand (default: print a summary)')
+    args = parser.parse_args()
+    catalogue = SeedCatalogue(args.catalogue)
+    for puzzle_id in args.ids:
+        print(json.dumps(catalogue.get(puzzle_id), ensure_ascii=False, separators=(',', ':')))
+    if not args.ids:
+        print(json.dumps(catalogue.summary()))
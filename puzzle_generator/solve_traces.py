@@ -0,0 +1,145 @@
+"""Precomputed solve traces for the app's hints.
+
+Usage: python solve_traces.py <puzzles.json|puzzles.ndjson> [id ...]
+
+A trace is the ordered list of logical steps the technique rater
+(rater.py) takes to solve a puzzle, so the app can point at the next
+deduction without solving anything at play time. Each step is
+
+    [technique, placements, eliminations, cells]
+
+  technique     index into TRACE_TECHNIQUES
+  placements    cells filled by the step, as cell * size + digit - 1
+  eliminations  candidates removed by the step, in the same encoding
+  cells         the cells the deduction rests on: a unit index (rows
+                0-8, columns 9-17, boxes 18-26 on a 9x9 grid) when they
+                form one row, column or box, otherwise a list of cells.
+                Left empty for naked singles, whose witnesses are the
+                peers of the placed cell.
+
+Steps found in the same pass are all valid on the board the pass started
+from, so replaying them in order never needs a candidate the app has not
+seen yet. The eliminations double as the candidate snapshots between
+placements. A puzzle that needs guessing ("solved": false) has a trace
+that stops where logic runs out.
+
+generate_many.py keeps the steps of the rating it already computes for
+every record in a `trace` field of its checkpoint. The field never reaches
+puzzles.json: write_shards (puzzle_shards.py) moves it into one
+fixed-record trace file per difficulty, aligned line by line with the
+puzzle shard, and rates any record that arrives without one. With ids on
+the command line, prints their decoded traces.
+"""
+import argparse
+import json
+
+from puzzle_codec import box_size_of, decode_grid
+from puzzle_io import iter_puzzle_file
+from rater import TECHNIQUES, Rating, TechniqueRater
+
+TRACE_FORMAT = 1
+TRACE_FIELD = 'trace'
+# position in this list is the technique index stored in each step
+TRACE_TECHNIQUES = [name for name, _ in TECHNIQUES]
+_TECHNIQUE_INDEX = {name: i for i, name in enumerate(TRACE_TECHNIQUES)}
+
+
+def trace_name(difficulty: str) -> str:
+    return f"puzzles.{difficulty}.traces.ndjson"
+
+
+class TraceEncoder:
+    """Encode the steps of a Rating for one grid size."""
+
+    def __init__(self, rater: TechniqueRater):
+        self.rater = rater
+        self.size = rater.size
+        self._units = {frozenset(unit): i for i, unit in enumerate(rater.units)}
+
+    def encode(self, steps: list) -> list:
+        size = self.size
+        encoded = []
+        for step in steps:
+            if step.technique == 'naked_single':
+                cells = []
+            else:
+                unit = self._units.get(frozenset(step.cells))
+                cells = unit if unit is not None else sorted(step.cells)
+            encoded.append([
+                _TECHNIQUE_INDEX[step.technique],
+                [cell * size + digit - 1 for cell, digit in step.placements],
+                [cell * size + digit - 1 for cell, digit in step.eliminations],
+                cells,
+            ])
+        return encoded
+
+    def from_rating(self, rating: Rating) -> dict:
+        """Trace field of a rating made with record_steps=True."""
+        return {'solved': rating.solved, 'steps': self.encode(rating.steps)}
+
+    def trace(self, board: list[list[int]]) -> dict:
+        """Rate board and return its trace field."""
+        return self.from_rating(self.rater.rate(board, record_steps=True))
+
+
+def decode_step(step: list, size: int = 9) -> dict:
+    """Readable form of an encoded step: (row, col, digit) tuples, 0-based rows and columns."""
+    technique, placements, eliminations, cells = step
+
+    def cell_digits(values):
+        return [(v // size // size, v // size % size, v % size + 1) for v in values]
+
+    return {
+        'technique': TRACE_TECHNIQUES[technique],
+        'placements': cell_digits(placements),
+        'eliminations': cell_digits(eliminations),
+        'cells': cells if isinstance(cells, int) else [divmod(c, size) for c in cells],
+    }
+
+
+def check_trace(record: dict, trace: dict) -> list[str]:
+    """Problems found replaying trace against the record's solution (empty when consistent)."""
+    size = box_size_of(record) ** 2
+    puzzle = [v for row in decode_grid(record['puzzle']) for v in row]
+    solution = [v for row in decode_grid(record['solution']) for v in row]
+    problems = []
+    for n, step in enumerate(trace['steps']):
+        for value in step[1]:
+            cell, digit = divmod(value, size)
+            if puzzle[cell] or solution[cell] != digit + 1:
+                problems.append(f"step {n} places {digit + 1} at cell {cell}")
+            puzzle[cell] = digit + 1
+        for value in step[2]:
+            cell, digit = divmod(value, size)
+            if solution[cell] == digit + 1:
+                problems.append(f"step {n} eliminates the solution digit at cell {cell}")
+    if trace['solved'] and not all(puzzle):
+        problems.append("trace is marked solved but leaves empty cells")
+    return problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Print and check the solve traces of a puzzle file')
+    parser.add_argument('input', help='puzzles.json (either layout) or an NDJSON checkpoint')
+    parser.add_argument('ids', nargs='*', help='Puzzle ids to print (default: check every record)')
+    args = parser.parse_args()
+    encoders = {}
+    checked = bad = 0
+    for record in iter_puzzle_file(args.input):
+        if args.ids and record['id'] not in args.ids:
+            continue
+        box_size = box_size_of(record)
+        if box_size not in encoders:
+            encoders[box_size] = TraceEncoder(TechniqueRater(box_size))
+        trace = record.get(TRACE_FIELD) or encoders[box_size].trace(decode_grid(record['puzzle']))
+        problems = check_trace(record, trace)
+        checked += 1
+        bad += bool(problems)
+        if args.ids:
+            steps = [decode_step(s, box_size ** 2) for s in trace['steps']]
+            print(json.dumps({'id': record['id'], 'solved': trace['solved'], 'problems': problems,
+                              'steps': steps}, ensure_ascii=False))
+        elif problems:
+            print(f"{record['id']}: {'; '.join(problems)}")
+    if not args.ids:
+        print(f"Checked {checked} traces, {bad} inconsistent")
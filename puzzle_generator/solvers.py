@@ -0,0 +1,160 @@
+"""
+ソルバーバックエンドの共通窓口
+生成スクリプト・検証スクリプトから --solver で切り替えられるようにする。
+
+各バックエンドは次のメソッドを持つ:
+  count_solutions(board, limit) -> int   解の数（limit で打ち切り）
+  solve(board, rng=None) -> 盤面 | None   解を1つ（rng 指定でランダムな解）
+  has_other_solution(board, row, col, value) -> bool
+                                         (row, col) が value 以外になる解があるか
+また stats 属性に SearchStats を設定すると探索コストを計測する。
+"""
+import random
+import time
+
+from bitmask_solver import BitmaskSolver
+from dlx_solver import DLXSolver
+
+
+class BacktrackSolver:
+    """素朴なバックトラッキングによるソルバー（比較用）"""
+
+    # 探索の実装を変えたら上げる（検証キャッシュが無効になる）
+    VERSION = 2
+
+    def __init__(self, box_size: int = 3):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        # SearchStats を設定すると探索コストを計測する（search_stats.py）
+        self.stats = None
+
+    def is_valid(self, board: list[list[int]], row: int, col: int, num: int) -> bool:
+        """指定位置に数字を配置できるかチェック"""
+        if num in board[row]:
+            return False
+        if num in [board[i][col] for i in range(self.size)]:
+            return False
+        start_row = (row // self.box_size) * self.box_size
+        start_col = (col // self.box_size) * self.box_size
+        for i in range(start_row, start_row + self.box_size):
+            for j in range(start_col, start_col + self.box_size):
+                if board[i][j] == num:
+                    return False
+        return True
+
+    def _clues_valid(self, board: list[list[int]]) -> bool:
+        """与えられた数字どうしが行・列・ブロックで衝突していないか"""
+        work = [row[:] for row in board]
+        for i in range(self.size):
+            for j in range(self.size):
+                num = work[i][j]
+                if num:
+                    work[i][j] = 0
+                    if not 0 < num <= self.size or not self.is_valid(work, i, j, num):
+                        return False
+                    work[i][j] = num
+        return True
+
+    def count_solutions(self, board: list[list[int]], limit: int = 2) -> int:
+        """解の数を数える（MRV ヒューリスティック付き、limit で打ち切り）"""
+        if not self._clues_valid(board):
+            return 0
+        stats = self.stats
+        start = time.perf_counter() if stats is not None else 0.0
+        work = [row[:] for row in board]
+        count = 0
+        nodes = backtracks = propagations = 0
+
+        def find_least_candidates():
+            best_i = best_j = None
+            best_cands = None
+            for i in range(self.size):
+                for j in range(self.size):
+                    if work[i][j] == 0:
+                        cands = [num for num in range(1, self.size + 1) if self.is_valid(work, i, j, num)]
+                        if not cands:
+                            return i, j, []
+                        if best_cands is None or len(cands) < len(best_cands):
+                            best_i, best_j, best_cands = i, j, cands
+                            if len(best_cands) == 1:
+                                return best_i, best_j, best_cands
+            return best_i, best_j, best_cands
+
+        def backtrack():
+            nonlocal count, nodes, backtracks, propagations
+            if count >= limit:
+                return
+            nodes += 1
+            i, j, cands = find_least_candidates()
+            if i is None:
+                count += 1
+                return
+            if not cands:
+                backtracks += 1
+            elif len(cands) == 1:
+                propagations += 1
+            for num in cands:
+                work[i][j] = num
+                backtrack()
+                work[i][j] = 0
+                if count >= limit:
+                    return
+
+        backtrack()
+        if stats is not None:
+            stats.record(nodes, backtracks, propagations, time.perf_counter() - start)
+        return count
+
+    def has_other_solution(self, board: list[list[int]], row: int, col: int, value: int) -> bool:
+        """(row, col) が value 以外になる解が存在するか
+
+        value を入れた解が存在することを前提に、解が2つ以上あるかで判定する。
+        """
+        return self.count_solutions(board, limit=2) > 1
+
+    def solve(self, board: list[list[int]], rng: random.Random | None = None) -> list[list[int]] | None:
+        """左上から順に埋めて解を1つ返す（解なしなら None）"""
+        if not self._clues_valid(board):
+            return None
+        stats = self.stats
+        start = time.perf_counter() if stats is not None else 0.0
+        work = [row[:] for row in board]
+        nodes = backtracks = 0
+
+        def backtrack() -> bool:
+            nonlocal nodes, backtracks
+            nodes += 1
+            for i in range(self.size):
+                for j in range(self.size):
+                    if work[i][j] == 0:
+                        nums = list(range(1, self.size + 1))
+                        if rng is not None:
+                            rng.shuffle(nums)
+                        for num in nums:
+                            if self.is_valid(work, i, j, num):
+                                work[i][j] = num
+                                if backtrack():
+                                    return True
+                                work[i][j] = 0
+                        backtracks += 1
+                        return False
+            return True
+
+        solved = backtrack()
+        if stats is not None:
+            stats.record(nodes, backtracks, 0, time.perf_counter() - start)
+        return work if solved else None
+
+
+SOLVERS = {
+    'backtrack': BacktrackSolver,
+    'bitmask': BitmaskSolver,
+    'dlx': DLXSolver,
+}
+
+
+def get_solver(name: str = 'bitmask', box_size: int = 3):
+    """名前からソルバーバックエンドを生成する"""
+    if name not in SOLVERS:
+        raise ValueError(f"Unknown solver: {name} (choose from {', '.join(SOLVERS)})")
+    return SOLVERS[name](box_size)
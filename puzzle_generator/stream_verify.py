@@ -0,0 +1,293 @@
+"""Streaming, parallel verification for very large puzzle files.
+
+Used by verify_puzzles.py --stream. The input (a puzzles.json array in
+either layout, or NDJSON) is parsed one record at a time and cut into
+chunks. The chunks are verified in a process pool with at most two chunks
+queued per worker, so memory stays bounded by the chunk size rather than
+the corpus size.
+
+Each worker runs the vectorized stage (batch_verify.py) on its chunk and
+counts solutions for the puzzles it does not settle, giving each search at
+most --timeout seconds. Puzzles that hit the limit are listed as timed out
+instead of stalling the rest of the run. Chunk results are merged as they
+complete; with --stats, each chunk's search costs are folded into running
+per-difficulty totals and histograms rather than kept per puzzle.
+verify_report.json is rewritten every few seconds with
+"complete": false, and the live throughput is printed.
+
+Chunks may mix grid sizes; each worker keeps one generator per size and
+runs the vectorized stage per size.
+
+The duplicate report and the verify cache keep state for every puzzle in
+the corpus, so stream mode skips both.
+"""
+import contextlib
+import json
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from batch_verify import batch_verify
+from generate_fast import FastSudokuGenerator
+from puzzle_codec import box_size_of, decode_grid
+from puzzle_io import iter_puzzle_file
+from search_stats import SearchStats, SearchSummary
+
+# seconds between progress lines and partial report writes
+REPORT_INTERVAL = 2.0
+
+# per-process state, created by _init_worker
+_solver = 'bitmask'
+_generators = {}
+_stats = None
+_limit = 2
+_batch = True
+_timeout = None
+
+
+class PuzzleTimeout(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def _time_limit(seconds: float | None):
+    """Raise PuzzleTimeout after seconds (no-op where SIGALRM is unavailable)."""
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+
+    def handler(signum, frame):
+        raise PuzzleTimeout()
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _init_worker(solver: str, limit: int, batch: bool, timeout: float | None, stats: bool):
+    global _solver, _stats, _limit, _batch, _timeout
+    _solver = solver
+    _stats = SearchStats() if stats else None
+    _generators.clear()
+    _limit = limit
+    _batch = batch
+    _timeout = timeout
+
+
+def _generator(box_size: int) -> FastSudokuGenerator:
+    if box_size not in _generators:
+        _generators[box_size] = FastSudokuGenerator(_solver, _stats, box_size=box_size)
+    return _generators[box_size]
+
+
+def _verify_chunk(start: int, chunk: list[dict]) -> dict:
+    """Verify one chunk. Returns its counts and the ids of the puzzles that need attention.
+
+    Listed puzzles are tagged with their position in the input, so the
+    merged lists can be put back in input order.
+    """
+    boxes = [box_size_of(p) for p in chunk]
+    result = {
+        'size': len(chunk),
+        'sizes': {},
+        'counts': {0: 0, 1: 0, 2: 0},
+        'settled': 0,
+        'bad': [],
+        'timed_out': [],
+        'invalid_solutions': [],
+        'inconsistent': [],
+        'solution_mismatches': [],
+        'searched': SearchSummary(),
+    }
+    for box_size in boxes:
+        size = str(box_size * box_size)
+        result['sizes'][size] = result['sizes'].get(size, 0) + 1
+
+    pending = range(len(chunk))
+    if _batch:
+        pending = []
+        for box_size in sorted(set(boxes)):
+            group = [j for j in range(len(chunk)) if boxes[j] == box_size]
+            checks = batch_verify([chunk[j]['puzzle'] for j in group], [chunk[j]['solution'] for j in group],
+                                  box_size)
+            for k, j in enumerate(group):
+                p = chunk[j]
+                if not checks['solution_valid'][k]:
+                    result['invalid_solutions'].append((start + j, p.get('id')))
+                if not checks['consistent'][k]:
+                    result['inconsistent'].append((start + j, p.get('id')))
+                if checks['settled'][k]:
+                    result['settled'] += 1
+                    result['counts'][1] += 1
+                    if not checks['matches_solution'][k]:
+                        result['solution_mismatches'].append((start + j, p.get('id')))
+                else:
+                    pending.append(j)
+        pending.sort()
+
+    for j in pending:
+        p = chunk[j]
+        if _stats is not None:
+            _stats.reset()
+        try:
+            with _time_limit(_timeout):
+                sols = _generator(boxes[j]).count_solutions(decode_grid(p['puzzle']), limit=_limit)
+        except PuzzleTimeout:
+            result['timed_out'].append((start + j, p.get('id')))
+            continue
+        cost = _stats.to_record() if _stats is not None else None
+        if cost is not None:
+            result['searched'].add(p.get('difficulty'), cost)
+        result['counts'][min(sols, 2)] += 1
+        if sols != 1:
+            result['bad'].append((start + j, {
+                'id': p.get('id'),
+                'difficulty': p.get('difficulty'),
+                'hints': p.get('hints'),
+                'solutions_found': sols,
+                **({'search': cost} if cost is not None else {})
+            }))
+    return result
+
+
+def _chunks(path: str, chunk_size: int):
+    """Yield (index of the first record, records) from the input file."""
+    chunk = []
+    start = 0
+    for record in iter_puzzle_file(path):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield start, chunk
+            start += len(chunk)
+            chunk = []
+    if chunk:
+        yield start, chunk
+
+
+class _Merged:
+    """Running totals of the chunk results."""
+
+    LISTS = ('bad', 'timed_out', 'invalid_solutions', 'inconsistent', 'solution_mismatches')
+
+    def __init__(self):
+        self.checked = 0
+        self.sizes = {}
+        self.counts = {0: 0, 1: 0, 2: 0}
+        self.settled = 0
+        self.lists = {name: [] for name in self.LISTS}
+        self.searched = SearchSummary()
+
+    def add(self, result: dict):
+        self.checked += result['size']
+        for size, n in result['sizes'].items():
+            self.sizes[size] = self.sizes.get(size, 0) + n
+        for k, v in result['counts'].items():
+            self.counts[k] += v
+        self.settled += result['settled']
+        for name in self.LISTS:
+            self.lists[name].extend(result[name])
+        self.searched.merge(result['searched'])
+
+    def report(self, batch: bool, stats: bool) -> dict:
+        lists = {name: [item for _, item in sorted(items, key=lambda x: x[0])]
+                 for name, items in self.lists.items()}
+        report = {
+            'total_checked': self.checked,
+            'sizes': dict(sorted(self.sizes.items(), key=lambda x: int(x[0]))),
+            'counts': self.counts,
+            'bad_count': len(lists['bad']),
+            'bad_puzzles': lists['bad'],
+            'timed_out_count': len(lists['timed_out']),
+            'timed_out': lists['timed_out'],
+        }
+        if batch:
+            report.update({
+                'settled_by_propagation': self.settled,
+                'invalid_solution_count': len(lists['invalid_solutions']),
+                'invalid_solutions': lists['invalid_solutions'],
+                'inconsistent_count': len(lists['inconsistent']),
+                'inconsistent_puzzles': lists['inconsistent'],
+                'solution_mismatch_count': len(lists['solution_mismatches']),
+                'solution_mismatches': lists['solution_mismatches']
+            })
+        if stats:
+            report['search'] = {
+                'searched_puzzles': len(self.searched),
+                'by_difficulty': self.searched.to_record(),
+            }
+        return report
+
+
+def _write_report(path: str, report: dict):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def verify_stream(input_path: str, output_path: str, limit: int = 2, solver: str = 'bitmask',
+                  batch: bool = True, stats: bool = False, workers: int | None = None,
+                  chunk_size: int = 500, timeout: float | None = 10.0) -> dict:
+    """Verify input_path in parallel chunks and write the report. Returns the report."""
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    workers = workers or os.cpu_count() or 1
+    print(f"Streaming {input_path} with {workers} worker(s), {chunk_size} puzzles per chunk "
+          f"(solver: {solver}, timeout: {timeout or 'none'})...")
+
+    merged = _Merged()
+    started = time.perf_counter()
+    last_report = started
+
+    def progress(final: bool = False) -> dict:
+        elapsed = time.perf_counter() - started
+        report = merged.report(batch, stats)
+        report.update({
+            'complete': final,
+            'workers': workers,
+            'elapsed_sec': round(elapsed, 3),
+            'puzzles_per_sec': round(merged.checked / elapsed, 1) if elapsed else 0.0,
+        })
+        return report
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(solver, limit, batch, timeout, stats)) as executor:
+        pending = set()
+        chunks = _chunks(input_path, chunk_size)
+        exhausted = False
+        while pending or not exhausted:
+            # keep every worker busy with one chunk queued behind it
+            while not exhausted and len(pending) < 2 * workers:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(_verify_chunk, *chunk))
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=REPORT_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                merged.add(future.result())
+
+            now = time.perf_counter()
+            if now - last_report >= REPORT_INTERVAL:
+                last_report = now
+                report = progress()
+                _write_report(output_path, report)
+                print(f"  Checked {merged.checked} ({report['puzzles_per_sec']}/s), "
+                      f"bad {report['bad_count']}, timed out {report['timed_out_count']}")
+
+    report = progress(final=True)
+    _write_report(output_path, report)
+    print("\nDone.")
+    print(json.dumps({'total': merged.checked, 'unique': merged.counts[1], 'bad': report['bad_count'],
+                      'timed_out': report['timed_out_count'], 'puzzles_per_sec': report['puzzles_per_sec']},
+                     ensure_ascii=False))
+    print(f"Report written to: {output_path}")
+    return report
@@ -0,0 +1,31 @@
+"""Shared fixtures for the puzzle generator tests.
+
+The generator modules import each other by bare name, as when run from
+puzzle_generator/, so that directory goes on sys.path first.
+"""
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+
+from generate_many import generate_many  # noqa: E402
+
+RUN_SEED = 7
+RUN_COUNT = 12
+
+
+@pytest.fixture(scope='session')
+def corpus_path() -> str:
+    return os.path.join(PACKAGE_DIR, 'benchmarks', 'corpus.json')
+
+
+@pytest.fixture(scope='session')
+def generated_run(tmp_path_factory) -> str:
+    """Output directory of a small seeded run, with its checkpoint and seed catalogue kept."""
+    output_dir = str(tmp_path_factory.mktemp('run'))
+    generate_many(output_dir, RUN_COUNT, seed=RUN_SEED, keep_ndjson=True,
+                  catalogue_path=os.path.join(output_dir, 'catalogue.json'))
+    return output_dir
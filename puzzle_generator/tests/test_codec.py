@@ -0,0 +1,61 @@
+"""Grid and record encodings must round-trip in every layout."""
+import gzip
+import json
+import random
+
+import pytest
+
+from bitmask_solver import BitmaskSolver
+from puzzle_codec import (decode_grid, decode_record, encode_grid, encode_record, load_puzzles,
+                          write_puzzles)
+
+
+@pytest.mark.parametrize('box_size', [3, 4, 5])
+def test_grid_round_trip(box_size):
+    grid = BitmaskSolver(box_size).random_grid(random.Random(box_size))
+    grid[0][0] = 0
+    encoded = encode_grid(grid)
+    assert len(encoded) == (box_size * box_size) ** 2
+    assert decode_grid(encoded) == grid
+    assert decode_grid(encoded.lower()) == grid
+    assert decode_grid(grid) is grid
+
+
+def test_decode_rejects_non_square():
+    with pytest.raises(ValueError):
+        decode_grid('0' * 80)
+
+
+def test_record_round_trip():
+    solution = BitmaskSolver(3).random_grid(random.Random(1))
+    puzzle = [[v if (r + c) % 2 else 0 for c, v in enumerate(row)] for r, row in enumerate(solution)]
+    record = {'id': 'easy_0001', 'difficulty': 'easy', 'puzzle': puzzle, 'solution': solution,
+              'trace': {'solved': True, 'steps': []}}
+    compact = encode_record(record)
+    assert compact['puzzle'] == encode_grid(puzzle)
+    assert 'trace' not in compact
+    nested = decode_record(compact)
+    assert nested == {k: v for k, v in record.items() if k != 'trace'}
+    assert decode_record(nested) == nested
+
+
+@pytest.mark.parametrize('layout', ['compact', 'nested'])
+@pytest.mark.parametrize('compress', [False, True])
+def test_file_round_trip(tmp_path, layout, compress):
+    rng = random.Random(2)
+    records = []
+    for i in range(5):
+        solution = BitmaskSolver(3).random_grid(rng)
+        puzzle = [[v if rng.random() < 0.4 else 0 for v in row] for row in solution]
+        records.append({'id': f"medium_{i + 1:04d}", 'difficulty': 'medium',
+                        'puzzle': puzzle, 'solution': solution})
+    path = str(tmp_path / 'puzzles.json')
+    assert write_puzzles(path, records, layout, compress) == len(records)
+    assert load_puzzles(path) == records
+    with open(path, 'rb') as f:
+        data = f.read()
+    if layout == 'nested':
+        assert data == json.dumps(records, ensure_ascii=False, indent=2).encode('utf-8')
+    if compress:
+        with open(path + '.gz', 'rb') as f:
+            assert gzip.decompress(f.read()) == data
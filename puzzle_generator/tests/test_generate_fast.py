@@ -0,0 +1,26 @@
+"""FastSudokuGenerator keeps its dig state to itself: last_dig for the outcome, the digger for its table."""
+import random
+
+from generate_fast import FastSudokuGenerator
+
+
+def test_missed_band_is_reported_without_printing(capsys):
+    # a one-check budget never digs an expert puzzle into its band
+    generator = FastSudokuGenerator('bitmask', max_checks=1)
+    generator.generate_puzzle('expert', random.Random(0))
+    assert not generator.last_dig.in_band
+    assert generator.last_dig.reason
+    assert capsys.readouterr().out == ''
+
+
+def test_transposition_table_is_scoped_to_one_dig():
+    generator = FastSudokuGenerator('bitmask')
+    table = generator.digger.cache
+    puzzle, _ = generator.generate_puzzle('hard', random.Random(1))
+    assert generator.last_dig.cache['misses'] > 0
+    # detached from the shared engine and emptied once the dig is over
+    assert generator.engine.cache is None
+    assert len(table) == 0
+    lookups = table.hits + table.misses
+    assert generator.count_solutions(puzzle) == 1
+    assert table.hits + table.misses == lookups
@@ -0,0 +1,155 @@
+"""Seeded runs must be reproducible across worker counts, resumes and the seed catalogue."""
+import filecmp
+import json
+import os
+import shutil
+
+import pytest
+
+import generate_many as gm
+from conftest import RUN_COUNT, RUN_SEED
+from generate_fast import FastSudokuGenerator
+from generate_many import generate_many, write_search_report
+from puzzle_codec import decode_grid
+from puzzle_io import NDJSONWriter, iter_ndjson
+from puzzle_shards import MANIFEST_NAME, read_shard_record, read_trace_record
+from seed_catalogue import SeedCatalogue
+from solve_traces import TRACE_FIELD, check_trace
+
+# written by every run, compared byte for byte
+OUTPUTS = ['puzzles.json', 'puzzles.json.gz', MANIFEST_NAME] + [
+    f"puzzles.{d}{suffix}" for d in ('easy', 'medium', 'hard', 'expert')
+    for suffix in ('.ndjson', '.traces.ndjson')]
+
+
+def _same_outputs(a: str, b: str):
+    match, mismatch, errors = filecmp.cmpfiles(a, b, OUTPUTS, shallow=False)
+    assert (mismatch, errors) == ([], [])
+
+
+def test_workers_give_identical_output(generated_run, tmp_path):
+    output_dir = str(tmp_path / 'parallel')
+    generate_many(output_dir, RUN_COUNT, seed=RUN_SEED, workers=2)
+    _same_outputs(generated_run, output_dir)
+
+
+def test_resume_after_truncated_write(generated_run, tmp_path):
+    output_dir = tmp_path / 'resumed'
+    output_dir.mkdir()
+    with open(os.path.join(generated_run, 'puzzles.ndjson'), 'rb') as f:
+        lines = f.readlines()
+    # five complete records, then the sixth cut off mid-line as by a crash
+    (output_dir / 'puzzles.ndjson').write_bytes(b''.join(lines[:5]) + lines[5][:40])
+    generate_many(str(output_dir), RUN_COUNT, seed=RUN_SEED, resume=True)
+    _same_outputs(generated_run, str(output_dir))
+
+
+def test_resume_of_a_finished_checkpoint(generated_run, tmp_path):
+    output_dir = str(tmp_path / 'finished')
+    os.makedirs(output_dir)
+    shutil.copy(os.path.join(generated_run, 'puzzles.ndjson'), output_dir)
+    generate_many(output_dir, RUN_COUNT, seed=RUN_SEED, resume=True)
+    _same_outputs(generated_run, output_dir)
+
+
+def test_catalogue_regenerates_records(generated_run):
+    catalogue = SeedCatalogue(os.path.join(generated_run, 'catalogue.json'))
+    records = list(iter_ndjson(os.path.join(generated_run, 'puzzles.ndjson')))
+    assert len(catalogue) == len(records) == RUN_COUNT
+    for record in records:
+        expanded = catalogue.get(record['id'])
+        assert expanded == {k: v for k, v in record.items() if k in expanded}, record['id']
+    assert catalogue.summary()['misses'] == RUN_COUNT
+
+
+def test_shard_and_trace_offsets_line_up(generated_run):
+    with open(os.path.join(generated_run, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    records = list(iter_ndjson(os.path.join(generated_run, 'puzzles.ndjson')))
+    assert manifest['total'] == len(records)
+    for difficulty, shard in manifest['shards'].items():
+        expected = [r for r in records if r['difficulty'] == difficulty]
+        assert shard['count'] == len(expected)
+        for index, record in enumerate(expected):
+            stored = read_shard_record(generated_run, manifest, difficulty, index)
+            assert stored['id'] == record['id']
+            assert decode_grid(stored['puzzle']) == record['puzzle']
+            trace = read_trace_record(generated_run, manifest, difficulty, index)
+            assert trace == {'id': record['id'], **record[TRACE_FIELD]}
+            assert check_trace(stored, trace) == []
+
+
+def test_rating_bucket_gives_up_after_max_attempts(tmp_path, capsys):
+    # with seed 7, medium_0002 is the first id whose first attempt rates outside its bucket
+    output_dir = str(tmp_path / 'capped')
+    generate_many(output_dir, 8, seed=RUN_SEED, bucket='rating', max_attempts=1)
+    out = capsys.readouterr().out
+    assert "Gave up on medium_0002 after 1 dig attempts (1 rated outside medium, 0 duplicates)" in out
+    assert not os.path.exists(os.path.join(output_dir, 'puzzles.json'))
+    checkpointed = [r['id'] for r in iter_ndjson(os.path.join(output_dir, 'puzzles.ndjson'))]
+    assert checkpointed == ['easy_0001', 'easy_0002', 'medium_0001']
+
+
+def test_removal_band_gives_up_after_max_attempts():
+    gm._init_worker('bitmask', master_seed=RUN_SEED, max_attempts=3)
+    # a one-check budget never digs an expert puzzle into its band
+    gm._generator = FastSudokuGenerator('bitmask', max_checks=1)
+    with pytest.raises(gm._AttemptsExhausted, match="after 3 dig attempts \\(3 short of the expert removal band"):
+        next(gm._candidates('expert', 'expert_0001'))
+    record, key, error = gm._dig_checked('expert', 0, None)
+    assert record is None and error.startswith("Gave up on expert_0001")
+
+
+def test_rerun_into_same_directory_is_identical(generated_run, tmp_path):
+    output_dir = str(tmp_path / 'rerun')
+    shutil.copytree(generated_run, output_dir)
+    # the default index of the previous run must not reject its own puzzles
+    generate_many(output_dir, RUN_COUNT, seed=RUN_SEED)
+    _same_outputs(generated_run, output_dir)
+    with open(os.path.join(output_dir, 'canonical.idx'), 'r', encoding='ascii') as f:
+        assert len(f.read().split()) == RUN_COUNT
+
+
+def test_explicit_index_dedupes_across_runs(generated_run, tmp_path, capsys):
+    index_path = str(tmp_path / 'shared.idx')
+    shutil.copy(os.path.join(generated_run, 'canonical.idx'), index_path)
+    output_dir = str(tmp_path / 'second')
+    generate_many(output_dir, RUN_COUNT, seed=RUN_SEED, keep_ndjson=True, index_path=index_path)
+    assert "Cleared" not in capsys.readouterr().out
+    # the same seed digs the same puzzles first, so every one of them is re-dug
+    first, second = ({str(r['puzzle']) for r in iter_ndjson(os.path.join(d, 'puzzles.ndjson'))}
+                     for d in (generated_run, output_dir))
+    assert not first & second
+    with open(index_path, 'r', encoding='ascii') as f:
+        assert len(f.read().split()) == 2 * RUN_COUNT
+
+
+def _instrumented(difficulty: str, nodes: int, dig: dict | None) -> dict:
+    search = {'nodes': nodes, 'backtracks': 1, 'propagations': 2, 'ms': 0.5, 'calls': 3, 'max_nodes': nodes,
+              'wall_ms': 1.25}
+    return {'id': f"{difficulty}_{nodes:04d}", 'difficulty': difficulty, 'search': search, 'dig': dig}
+
+
+def test_search_report_folds_records(tmp_path):
+    ndjson_path = str(tmp_path / 'puzzles.ndjson')
+    dig = {'boards': 1, 'abandoned': {}, 'swaps': 0, 'checks': 40, 'removed': 45}
+    with NDJSONWriter(ndjson_path) as writer:
+        writer.write(_instrumented('hard', 5, {**dig, 'cache': {'hits': 3, 'misses': 1}}))
+        writer.write(_instrumented('hard', 70, {**dig, 'abandoned': {'band': 2}, 'checks': 100, 'removed': 50}))
+        writer.write(_instrumented('easy', 9, None))
+        writer.write({'id': 'easy_0002', 'difficulty': 'easy'})
+    report_path = str(tmp_path / 'generate_report.json')
+    write_search_report(ndjson_path, report_path)
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['instrumented_puzzles'] == 3
+    hard, easy = report['by_difficulty']['hard'], report['by_difficulty']['easy']
+    assert hard['totals']['nodes'] == 75 and hard['totals']['wall_ms'] == 2.5
+    assert hard['nodes_histogram'] == {'<=8': 1, '<=128': 1}
+    assert hard['dig'] == {
+        'boards': 2, 'abandoned': {'band': 2}, 'swaps': 0,
+        'checks_histogram': {'<=64': 1, '<=128': 1},
+        'removed_histogram': {'45': 1, '50': 1},
+        'cache': {'hits': 3, 'misses': 1, 'hit_rate': 0.75},
+    }
+    assert easy['puzzles'] == 1 and 'dig' not in easy
@@ -0,0 +1,47 @@
+"""Complete grids of every size must come back valid and without stalling."""
+import random
+
+import pytest
+
+from bitmask_solver import BitmaskSolver
+from generate_fast import FastSudokuGenerator
+from generate_puzzles import SudokuGenerator
+
+
+def _assert_complete(grid: list[list[int]], box_size: int):
+    size = box_size * box_size
+    digits = list(range(1, size + 1))
+    assert len(grid) == size
+    for r in range(size):
+        assert sorted(grid[r]) == digits
+        assert sorted(grid[c][r] for c in range(size)) == digits
+    for br in range(0, size, box_size):
+        for bc in range(0, size, box_size):
+            box = [grid[r][c] for r in range(br, br + box_size) for c in range(bc, bc + box_size)]
+            assert sorted(box) == digits
+
+
+@pytest.mark.parametrize('box_size', [4, 5])
+def test_sudoku_generator_large_grid(box_size):
+    generator = SudokuGenerator('bitmask', box_size=box_size)
+    for seed in range(3):
+        random.seed(seed)
+        _assert_complete(generator.generate_complete_board(), box_size)
+
+
+def test_fast_generator_large_grid():
+    generator = FastSudokuGenerator('bitmask', box_size=5)
+    _assert_complete(generator.generate_complete_board(random.Random(18)), 5)
+
+
+def test_random_grid_restarts_and_restores_limits(monkeypatch):
+    solver = BitmaskSolver(5)
+    solver.node_limit, solver.capped = 30, 4
+    attempts = []
+    solve = solver.solve
+    monkeypatch.setattr(solver, 'solve', lambda *args, **kwargs: attempts.append(1) or solve(*args, **kwargs))
+    # seed 8 overruns a 700-node budget once; the retry must not leak into the capped count
+    grid = solver.random_grid(random.Random(8), restart_nodes=700)
+    _assert_complete(grid, 5)
+    assert len(attempts) == 2
+    assert (solver.node_limit, solver.capped) == (30, 4)
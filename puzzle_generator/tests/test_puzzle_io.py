@@ -0,0 +1,64 @@
+"""NDJSON checkpoints must survive a write cut off mid-record."""
+import json
+
+from puzzle_io import NDJSONWriter, compact_ndjson, iter_ndjson, iter_puzzle_file, read_progress, repair_ndjson
+
+
+def _records(n: int) -> list:
+    return [{'id': f"{d}_{i + 1:04d}", 'difficulty': d, 'hints': 30 + i}
+            for d in ('easy', 'hard') for i in range(n)]
+
+
+def test_repair_drops_partial_line(tmp_path):
+    path = str(tmp_path / 'puzzles.ndjson')
+    records = _records(3)
+    with NDJSONWriter(path, batch_size=2) as writer:
+        for record in records:
+            writer.write(record)
+    with open(path, 'rb') as f:
+        intact = f.read()
+    partial = json.dumps({'id': 'easy_0004', 'difficulty': 'easy'}).encode('utf-8')[:17]
+    with open(path, 'ab') as f:
+        f.write(partial)
+
+    assert repair_ndjson(path) == len(partial)
+    with open(path, 'rb') as f:
+        assert f.read() == intact
+    assert list(iter_ndjson(path)) == records
+    assert read_progress(path) == {'easy': 3, 'hard': 3}
+    assert repair_ndjson(path) == 0
+
+
+def test_repair_of_a_single_partial_line(tmp_path):
+    path = tmp_path / 'puzzles.ndjson'
+    path.write_bytes(b'{"id": "easy_0')
+    assert repair_ndjson(str(path)) == 14
+    assert path.read_bytes() == b''
+    assert read_progress(str(path)) == {}
+
+
+def test_append_after_repair(tmp_path):
+    path = str(tmp_path / 'puzzles.ndjson')
+    records = _records(2)
+    with NDJSONWriter(path) as writer:
+        writer.write(records[0])
+    with open(path, 'ab') as f:
+        f.write(b'{"id":"ea')
+    repair_ndjson(path)
+    with NDJSONWriter(path, append=True) as writer:
+        for record in records[1:]:
+            writer.write(record)
+    assert list(iter_ndjson(path)) == records
+
+
+def test_compact_and_read_back(tmp_path):
+    ndjson_path = str(tmp_path / 'puzzles.ndjson')
+    json_path = str(tmp_path / 'puzzles.json')
+    records = _records(4)
+    with NDJSONWriter(ndjson_path) as writer:
+        for record in records:
+            writer.write(record)
+    assert compact_ndjson(ndjson_path, json_path, compress=False) == len(records)
+    # small blocks make every record straddle a buffer boundary
+    assert list(iter_puzzle_file(json_path, block_size=16)) == records
+    assert list(iter_puzzle_file(ndjson_path)) == records
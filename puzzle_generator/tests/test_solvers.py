@@ -0,0 +1,70 @@
+"""The bitmask, DLX and backtracking backends must agree on solution counts."""
+import json
+
+import pytest
+
+from puzzle_codec import decode_grid
+from solvers import SOLVERS, get_solver
+
+# the backtracking solver takes seconds to minutes on the harder corpus groups
+BACKTRACK_GROUPS = ('easy', 'medium')
+
+
+def _load(corpus_path: str, groups=None) -> list:
+    with open(corpus_path, 'r', encoding='utf-8') as f:
+        puzzles = json.load(f)['puzzles']
+    return [(p['id'], decode_grid(p['puzzle'])) for p in puzzles if groups is None or p['group'] in groups]
+
+
+def _variants(grid: list[list[int]]) -> list:
+    """The puzzle, one with its first eight clues removed, and one with a clashing clue."""
+    loose = [row[:] for row in grid]
+    clues = [(r, c) for r in range(9) for c in range(9) if grid[r][c]]
+    for r, c in clues[:8]:
+        loose[r][c] = 0
+    clash = [row[:] for row in grid]
+    r, c = clues[0]
+    empty = next(col for col in range(9) if not clash[r][col])
+    clash[r][empty] = clash[r][c]
+    return [grid, loose, clash]
+
+
+def test_backends_agree_on_counts(corpus_path):
+    solvers = {name: get_solver(name) for name in SOLVERS}
+    for puzzle_id, grid in _load(corpus_path, BACKTRACK_GROUPS):
+        for board in _variants(grid):
+            counts = {name: solver.count_solutions(board, limit=2) for name, solver in solvers.items()}
+            assert len(set(counts.values())) == 1, (puzzle_id, counts)
+
+
+def test_corpus_is_unique(corpus_path):
+    solvers = [get_solver('bitmask'), get_solver('dlx')]
+    for puzzle_id, grid in _load(corpus_path):
+        assert [solver.count_solutions(grid) for solver in solvers] == [1, 1], puzzle_id
+
+
+@pytest.mark.parametrize('name', sorted(SOLVERS))
+def test_solution_is_consistent(corpus_path, name):
+    solver = get_solver(name)
+    for puzzle_id, grid in _load(corpus_path, BACKTRACK_GROUPS):
+        solution = solver.solve(grid)
+        assert solution is not None, puzzle_id
+        assert all(v == solution[r][c] for r, row in enumerate(grid) for c, v in enumerate(row) if v)
+        units = ([[(r, c) for c in range(9)] for r in range(9)]
+                 + [[(r, c) for r in range(9)] for c in range(9)]
+                 + [[(r, c) for r in range(br, br + 3) for c in range(bc, bc + 3)]
+                    for br in range(0, 9, 3) for bc in range(0, 9, 3)])
+        for unit in units:
+            assert sorted(solution[r][c] for r, c in unit) == list(range(1, 10)), puzzle_id
+
+
+def test_backends_agree_on_other_solutions(corpus_path):
+    # as in the digger: remove one clue of a unique puzzle and ask about that cell
+    solvers = {name: get_solver(name) for name in SOLVERS}
+    for puzzle_id, grid in _load(corpus_path, BACKTRACK_GROUPS)[:4]:
+        for r, c in [(r, c) for r in range(9) for c in range(9) if grid[r][c]][:10]:
+            board = [row[:] for row in grid]
+            board[r][c] = 0
+            answers = {name: solver.has_other_solution(board, r, c, grid[r][c])
+                       for name, solver in solvers.items()}
+            assert len(set(answers.values())) == 1, (puzzle_id, r, c, answers)
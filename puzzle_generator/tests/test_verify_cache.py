@@ -0,0 +1,60 @@
+"""Verify-cache entries must be dropped when the versions they depend on change."""
+from verify_cache import VerifyCache, content_key
+
+PUZZLE = '0' * 81
+SOLUTION = '123456789' * 9
+
+
+def _saved(path, solver='1', checks='1', canonical='1') -> str:
+    cache = VerifyCache(path, solver, checks, canonical)
+    cache.put(content_key(PUZZLE, SOLUTION), {'solutions': 1, 'canonical': 'abc'})
+    cache.put(content_key(PUZZLE, '0' * 81), {'solutions': 0})
+    cache.save()
+    return path
+
+
+def test_content_key_is_layout_independent():
+    nested = [[int(ch) for ch in SOLUTION[r * 9:(r + 1) * 9]] for r in range(9)]
+    assert content_key(PUZZLE, SOLUTION) == content_key(PUZZLE.lower(), nested)
+    assert content_key(PUZZLE, SOLUTION) != content_key(PUZZLE, '0' * 81)
+
+
+def test_same_versions_hit(tmp_path):
+    path = _saved(str(tmp_path / 'verify_cache.json'))
+    cache = VerifyCache(path, '1', '1', '1')
+    assert cache.invalidated is None
+    assert cache.get(content_key(PUZZLE, SOLUTION), ('solutions', 'canonical')) is not None
+    assert cache.get(content_key(PUZZLE, SOLUTION), ('missing',)) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_solver_or_check_change_drops_everything(tmp_path):
+    path = _saved(str(tmp_path / 'verify_cache.json'))
+    for versions in (('2', '1', '1'), ('1', '2', '1')):
+        cache = VerifyCache(path, *versions)
+        assert cache.entries == {}
+        assert cache.invalidated
+
+
+def test_canonical_change_drops_only_keys(tmp_path):
+    path = _saved(str(tmp_path / 'verify_cache.json'))
+    cache = VerifyCache(path, '1', '1', '2')
+    assert cache.invalidated == 'canonical form changed'
+    entry = cache.get(content_key(PUZZLE, SOLUTION), ('solutions',))
+    assert entry == {'solutions': 1}
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / 'verify_cache.json'
+    path.write_text('{"versions": ', encoding='utf-8')
+    cache = VerifyCache(str(path), '1', '1', '1')
+    assert cache.entries == {}
+    assert cache.invalidated == 'unreadable cache file'
+
+
+def test_save_keeps_only_current_corpus(tmp_path):
+    path = _saved(str(tmp_path / 'verify_cache.json'))
+    keep = {content_key(PUZZLE, SOLUTION)}
+    cache = VerifyCache(path, '1', '1', '1')
+    cache.save(keep)
+    assert set(VerifyCache(path, '1', '1', '1').entries) == keep
@@ -0,0 +1,82 @@
+"""
+数独の対称変換エンジン
+数字の置換・バンド内の行入れ替え・バンドの入れ替え・
+スタック内の列入れ替え・スタックの入れ替え・転置を組み合わせる。
+これらの変換で解の一意性とヒント数は変わらないため、
+検証済みのシードパズルから再求解なしで別のパズルを作れる。
+"""
+import random
+
+from puzzle_codec import encode_grid
+
+
+class SudokuTransform:
+    """盤面変換（転置 → 行・列の並べ替え → 数字の置換 の順に適用）"""
+
+    def __init__(self, digit_map: list[int], row_order: list[int], col_order: list[int],
+                 transpose: bool = False):
+        # digit_map[d] は数字 d の変換先（digit_map[0] は 0 固定）
+        self.digit_map = digit_map
+        self.row_order = row_order
+        self.col_order = col_order
+        self.transpose = transpose
+
+    @staticmethod
+    def _random_order(rng: random.Random, box_size: int) -> list[int]:
+        """バンド（スタック）の順序とその中の行（列）の順序をランダムに決める"""
+        bands = list(range(box_size))
+        rng.shuffle(bands)
+        order = []
+        for band in bands:
+            lines = list(range(box_size))
+            rng.shuffle(lines)
+            order.extend(band * box_size + line for line in lines)
+        return order
+
+    @classmethod
+    def random(cls, rng: random.Random | None = None, box_size: int = 3) -> 'SudokuTransform':
+        """ランダムな変換を生成"""
+        rng = rng or random
+        size = box_size * box_size
+        digits = list(range(1, size + 1))
+        rng.shuffle(digits)
+        return cls(
+            [0] + digits,
+            cls._random_order(rng, box_size),
+            cls._random_order(rng, box_size),
+            rng.random() < 0.5,
+        )
+
+    @classmethod
+    def identity(cls, box_size: int = 3) -> 'SudokuTransform':
+        """恒等変換"""
+        size = box_size * box_size
+        return cls(list(range(size + 1)), list(range(size)), list(range(size)))
+
+    def apply(self, grid: list[list[int]]) -> list[list[int]]:
+        """盤面に変換を適用した新しい盤面を返す（0 は空きセルのまま）"""
+        if self.transpose:
+            grid = [list(col) for col in zip(*grid)]
+        digit_map = self.digit_map
+        return [[digit_map[grid[r][c]] for c in self.col_order] for r in self.row_order]
+
+
+def mint_puzzles(seed_pool: list[tuple], count: int, rng: random.Random | None = None,
+                 box_size: int = 3, seen: set | None = None):
+    """シードパズル (puzzle, solution) のプールから count 個の異なるパズルを作る
+
+    seen に既出パズルの文字列を渡すと、それらとの重複も避ける。
+    """
+    rng = rng or random
+    seen = set() if seen is None else seen
+    minted = 0
+    while minted < count:
+        puzzle, solution = rng.choice(seed_pool)
+        transform = SudokuTransform.random(rng, box_size)
+        new_puzzle = transform.apply(puzzle)
+        key = encode_grid(new_puzzle)
+        if key in seen:
+            continue
+        seen.add(key)
+        minted += 1
+        yield new_puzzle, transform.apply(solution)
@@ -0,0 +1,100 @@
+"""
+探索の置換表（トランスポジションテーブル）
+穴掘りでは1セルずつ消した盤面を何度も一意性チェックするので、
+制約伝播の後に同じ部分盤面へたどり着くことが多い。その部分木の
+解の数（0 / ちょうど1 / 1以上 / 2以上）を Zobrist ハッシュで引けるようにする。
+
+  - キーは置かれている (セル, 数字) ごとの乱数の XOR。配置・取り消しの
+    たびに差分更新する。禁止された候補（has_other_solution）がまだ空きの
+    セルに残っているときは、その分の乱数も XOR する。
+  - 件数は max_entries までで、溢れたら最も古く使われたものから捨てる（LRU）。
+  - 部分木の解の数は盤面だけで決まるので、パズルをまたいで使っても結果は
+    変わらない。ただ再利用はほぼ1パズルの掘り試行の間に限られるので、
+    生成器はパズルごとに clear() する。
+
+解そのものは覚えないので、最初の解が必要な solve() では使わない。
+"""
+import random
+from collections import OrderedDict
+
+# 部分木の解の数（NONE / ONE は探索しきった結果、AT_LEAST_ONE は1つ見つけて打ち切った結果）
+NONE = 0
+ONE = 1
+AT_LEAST_ONE = -1
+MANY = 2
+# キーのビット数（衝突で一意性判定を誤らないよう 64 より長くする）
+KEY_BITS = 96
+# Zobrist 乱数の種（キーは実行ごとに同じになる）
+KEY_SEED = 0x5D0C
+# 既定の件数上限（expert 1問の掘り試行で数千件）
+DEFAULT_MAX_ENTRIES = 20000
+
+
+class TranspositionTable:
+    """Zobrist ハッシュをキーにした LRU の置換表"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, int] = OrderedDict()
+        self._keys: dict[tuple[int, int], tuple[list, list]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.clears = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys_for(self, num_cells: int, size: int) -> tuple[list[dict[int, int]], list[dict[int, int]]]:
+        """盤面の大きさごとの乱数表 (配置用, 禁止用) を返す
+
+        どちらも [セル][数字のビット] -> 乱数。
+        """
+        shape = (num_cells, size)
+        if shape not in self._keys:
+            rnd = random.Random(KEY_SEED + num_cells)
+            placed = [{1 << d: rnd.getrandbits(KEY_BITS) for d in range(size)} for _ in range(num_cells)]
+            banned = [{1 << d: rnd.getrandbits(KEY_BITS) for d in range(size)} for _ in range(num_cells)]
+            self._keys[shape] = (placed, banned)
+        return self._keys[shape]
+
+    def get(self, key: int) -> int | None:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: int, value: int) -> None:
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+        entries[key] = value
+        self.stores += 1
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """中身を捨てる（カウンタは残す）"""
+        self._entries.clear()
+        self.clears += 1
+
+    def reset(self) -> None:
+        """中身とカウンタを捨てる"""
+        self._entries.clear()
+        self.hits = self.misses = self.stores = self.evictions = self.clears = 0
+
+    def to_record(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
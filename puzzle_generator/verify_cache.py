@@ -0,0 +1,92 @@
+"""Sidecar cache for verify_puzzles.py.
+
+Maps a content hash of each puzzle (clues and stored solution) to what
+verification found for it: the solution count, the vectorized-stage flags
+and the canonical key used by the duplicate report. The file records the
+versions it was computed with. A solver or check version change drops every
+entry, and a canonical version change drops only the canonical keys.
+"""
+import hashlib
+import json
+import os
+
+from puzzle_codec import encode_grid
+
+CACHE_FORMAT = 1
+
+
+def content_key(puzzle, solution) -> str:
+    """Hash of a puzzle's clues and stored solution, in either layout."""
+    p = puzzle if isinstance(puzzle, str) else encode_grid(puzzle)
+    s = solution if isinstance(solution, str) else encode_grid(solution or [])
+    return hashlib.blake2b(f"{p.upper()}:{s.upper()}".encode('ascii'), digest_size=16).hexdigest()
+
+
+class VerifyCache:
+    """Verification results keyed by content_key, with hit/miss counters."""
+
+    def __init__(self, path: str | None, solver_version: str, check_version: str, canonical_version: str):
+        self.path = path
+        self.versions = {
+            'format': CACHE_FORMAT,
+            'solver': solver_version,
+            'checks': check_version,
+            'canonical': canonical_version,
+        }
+        self.entries: dict[str, dict] = {}
+        self.invalidated = None
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.invalidated = 'unreadable cache file'
+            return
+        versions = data.get('versions', {})
+        for field in ('format', 'solver', 'checks'):
+            if versions.get(field) != self.versions[field]:
+                self.invalidated = f"{field} changed: {versions.get(field)} -> {self.versions[field]}"
+                return
+        self.entries = data.get('entries', {})
+        if versions.get('canonical') != self.versions['canonical']:
+            self.invalidated = 'canonical form changed'
+            for entry in self.entries.values():
+                entry.pop('canonical', None)
+
+    def get(self, key: str, required: tuple = ()) -> dict | None:
+        """Cached entry for key if it has every required field, else None (a miss)."""
+        entry = self.entries.get(key)
+        if entry is not None and all(field in entry for field in required):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, entry: dict):
+        self.entries[key] = entry
+
+    def summary(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'invalidated': self.invalidated,
+        }
+
+    def save(self, keep: set | None = None):
+        """Write the cache, keeping only the keys in keep (the current corpus) if given."""
+        if not self.path:
+            return
+        entries = self.entries if keep is None else {k: v for k, v in self.entries.items() if k in keep}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'versions': self.versions, 'entries': entries}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
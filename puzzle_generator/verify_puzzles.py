@@ -1,17 +1,61 @@
 """Verify generated puzzles for uniqueness.
 
-Loads a puzzles.json file (default ../app/public/puzzles/puzzles.json),
+Loads a puzzles.json file in either layout (default ../app/public/puzzles/puzzles.json),
 then for each puzzle counts solutions (early exit at 2). Produces a
 report JSON with puzzles that have solution count != 1.
+
+By default a vectorized NumPy stage (batch_verify.py) first checks every
+stored solution and its agreement with the clues, and settles the puzzles
+that singles propagation alone solves. Only the leftovers are searched.
+
+--stats records the search cost of every searched puzzle (see
+search_stats.py) and adds per-difficulty totals and histograms to the
+report; --profile dumps cProfile output for the run.
+
+The report also lists groups of duplicate puzzles: puzzles that are equal
+up to relabeling, row/column permutation or transposition share a
+canonical form (see canonical.py). Disable with --no-duplicates.
+
+Results are cached per puzzle in a sidecar verify_cache.json next to the
+report (see verify_cache.py), so later runs only verify new or changed
+puzzles. The cache resets itself when the solver or the checks change;
+--no-cache ignores it.
+
+Files may mix grid sizes (9x9, 16x16, 25x25). Each record's size comes
+from its `size` field, or from the puzzle grid for untagged records. The
+vectorized stage runs per size, and the report counts puzzles per size.
+25x25 puzzles are left out of the duplicate report, because they are too
+large to canonicalize.
+
+For very large files, --stream parses the input (array JSON or NDJSON)
+record by record and verifies chunks in a process pool (--workers,
+--chunk-size) with a per-puzzle --timeout, writing the report as chunks
+complete (see stream_verify.py).
 """
 import json
 import os
 import argparse
 from generate_fast import FastSudokuGenerator
+from batch_verify import BATCH_VERSION, batch_verify
+from canonical import CANONICAL_VERSION, MAX_CANONICAL_BOX_SIZE, canonical_key
+from puzzle_codec import box_size_of, decode_grid
+from search_stats import SearchStats, profile_call, summarize
+from solvers import SOLVERS
+from stream_verify import verify_stream
+from verify_cache import VerifyCache, content_key
+
 
+def verify_puzzles(input_path: str, output_path: str, limit: int = 2, solver: str = 'bitmask',
+                   batch: bool = True, stats: bool = False, duplicates: bool = True,
+                   cache_path: str | None = None, use_cache: bool = True):
+    search_stats = SearchStats() if stats else None
+    generators = {}
+    searched = []
 
-def verify_puzzles(input_path: str, output_path: str, limit: int = 2):
-    gen = FastSudokuGenerator()
+    def generator_for(box_size: int) -> FastSudokuGenerator:
+        if box_size not in generators:
+            generators[box_size] = FastSudokuGenerator(solver, search_stats, box_size=box_size)
+        return generators[box_size]
 
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
@@ -20,14 +64,80 @@ def verify_puzzles(input_path: str, output_path: str, limit: int = 2):
         puzzles = json.load(f)
 
     total = len(puzzles)
-    print(f"Checking {total} puzzles from {input_path}...")
+    boxes = [box_size_of(p) for p in puzzles]
+    sizes = {}
+    for box_size in boxes:
+        size = str(box_size * box_size)
+        sizes[size] = sizes.get(size, 0) + 1
+    print(f"Checking {total} puzzles from {input_path} (solver: {solver}, sizes: {sizes})...")
+
+    cache = None
+    if use_cache:
+        cache_path = cache_path or os.path.join(os.path.dirname(output_path), 'verify_cache.json')
+        cache = VerifyCache(cache_path, f"{solver}:{SOLVERS[solver].VERSION}:limit={limit}",
+                            f"batch:{BATCH_VERSION}", str(CANONICAL_VERSION))
+        if cache.invalidated:
+            print(f"  Cache invalidated ({cache.invalidated})")
+
+    # entries[i] holds everything verification knows about puzzle i
+    keys = [content_key(p.get('puzzle'), p.get('solution')) for p in puzzles]
+    required = ('solutions', 'valid', 'consistent', 'settled', 'match') if batch else ('solutions',)
+    entries = [None] * total
+    if cache is not None:
+        for i, key in enumerate(keys):
+            cached = cache.get(key, required)
+            if cached is not None:
+                entries[i] = cached
+    misses = [i for i in range(total) if entries[i] is None]
+    for i in misses:
+        entries[i] = {}
+    if cache is not None:
+        print(f"  Cache: {cache.hits} hits, {cache.misses} misses")
+
+    pending = misses
+    if batch and misses:
+        pending = []
+        # the vectorized stage works on grids of one size at a time
+        for box_size in sorted({boxes[i] for i in misses}):
+            group = [i for i in misses if boxes[i] == box_size]
+            result = batch_verify([puzzles[i]['puzzle'] for i in group],
+                                  [puzzles[i]['solution'] for i in group], box_size)
+            for j, i in enumerate(group):
+                entry = entries[i]
+                entry['valid'] = bool(result['solution_valid'][j])
+                entry['consistent'] = bool(result['consistent'][j])
+                entry['settled'] = bool(result['settled'][j])
+                entry['match'] = bool(result['matches_solution'][j])
+                if entry['settled']:
+                    entry['solutions'] = 1
+                else:
+                    pending.append(i)
+        pending.sort()
+        print(f"  Vectorized stage: {len(misses) - len(pending)} settled by singles, "
+              f"{len(pending)} left for search")
+
+    costs = {}
+    for idx, i in enumerate(pending, start=1):
+        p = puzzles[i]
+        puzzle_grid = decode_grid(p.get('puzzle'))
+        if search_stats is not None:
+            search_stats.reset()
+        entries[i]['solutions'] = generator_for(boxes[i]).count_solutions(puzzle_grid, limit=limit)
+        if search_stats is not None:
+            costs[i] = search_stats.to_record()
+            searched.append({'difficulty': p.get('difficulty'), 'search': costs[i]})
+
+        if idx % 100 == 0:
+            print(f"  Checked {idx}/{len(pending)}")
 
     bad = []
     counts = {0: 0, 1: 0, 2: 0}
-
-    for idx, p in enumerate(puzzles, start=1):
-        puzzle_grid = p.get('puzzle')
-        sols = gen.count_solutions(puzzle_grid, limit=limit)
+    invalid_solutions = []
+    inconsistent = []
+    solution_mismatch = []
+    for i, p in enumerate(puzzles):
+        entry = entries[i]
+        sols = entry['solutions']
         if sols not in counts:
             counts[2] += 1
         else:
@@ -38,18 +148,69 @@ def verify_puzzles(input_path: str, output_path: str, limit: int = 2):
                 'id': p.get('id'),
                 'difficulty': p.get('difficulty'),
                 'hints': p.get('hints'),
-                'solutions_found': sols
+                'solutions_found': sols,
+                **({'search': costs[i]} if i in costs else {})
             })
-
-        if idx % 100 == 0:
-            print(f"  Checked {idx}/{total} (bad so far: {len(bad)})")
+        if batch:
+            if not entry['valid']:
+                invalid_solutions.append(p.get('id'))
+            if not entry['consistent']:
+                inconsistent.append(p.get('id'))
+            if entry['settled'] and not entry['match']:
+                solution_mismatch.append(p.get('id'))
 
     report = {
         'total_checked': total,
+        'sizes': sizes,
         'counts': counts,
         'bad_count': len(bad),
         'bad_puzzles': bad
     }
+    if batch:
+        print(f"  Invalid solutions: {len(invalid_solutions)}, clue/solution mismatches: {len(inconsistent)}")
+        report.update({
+            'settled_by_propagation': sum(1 for entry in entries if entry['settled']),
+            'invalid_solution_count': len(invalid_solutions),
+            'invalid_solutions': invalid_solutions,
+            'inconsistent_count': len(inconsistent),
+            'inconsistent_puzzles': inconsistent,
+            'solution_mismatch_count': len(solution_mismatch),
+            'solution_mismatches': solution_mismatch
+        })
+
+    if duplicates:
+        todo = [i for i in range(total)
+                if 'canonical' not in entries[i] and boxes[i] <= MAX_CANONICAL_BOX_SIZE]
+        print(f"  Canonicalizing {len(todo)} puzzles for the duplicate report...")
+        for idx, i in enumerate(todo, start=1):
+            entries[i]['canonical'] = canonical_key(decode_grid(puzzles[i].get('puzzle')), boxes[i])
+            if idx % 1000 == 0:
+                print(f"  Canonicalized {idx}/{len(todo)}")
+        groups = {}
+        for i, p in enumerate(puzzles):
+            if 'canonical' in entries[i]:
+                groups.setdefault(entries[i]['canonical'], []).append(p.get('id'))
+        duplicate_groups = [ids for ids in groups.values() if len(ids) > 1]
+        report.update({
+            'duplicate_group_count': len(duplicate_groups),
+            'duplicate_puzzle_count': sum(len(ids) - 1 for ids in duplicate_groups),
+            'duplicate_groups': duplicate_groups,
+            'duplicate_skipped': sum(1 for box_size in boxes if box_size > MAX_CANONICAL_BOX_SIZE)
+        })
+        print(f"  Duplicates: {report['duplicate_puzzle_count']} puzzles in {len(duplicate_groups)} groups")
+
+    if stats:
+        report['search'] = {
+            'searched_puzzles': len(searched),
+            'by_difficulty': summarize(searched),
+        }
+
+    if cache is not None:
+        for key, entry in zip(keys, entries):
+            cache.put(key, entry)
+        # drop entries of puzzles that are no longer in the corpus
+        cache.save(set(keys))
+        report['cache'] = cache.summary()
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -64,5 +225,32 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Verify puzzles.json for uniqueness')
     parser.add_argument('input', nargs='?', default='../app/public/puzzles/puzzles.json', help='Path to puzzles.json')
     parser.add_argument('--out', '-o', default='../app/public/puzzles/verify_report.json', help='Path to write report')
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='bitmask', help='Solver backend for counting solutions')
+    parser.add_argument('--batch', action=argparse.BooleanOptionalAction, default=True,
+                        help='Run the vectorized NumPy stage before the per-puzzle search')
+    parser.add_argument('--stats', action='store_true', help='Record per-puzzle search costs in the report')
+    parser.add_argument('--duplicates', action=argparse.BooleanOptionalAction, default=True,
+                        help='Report puzzles that are isomorphic to each other')
+    parser.add_argument('--cache', action=argparse.BooleanOptionalAction, default=True,
+                        help='Reuse results of unchanged puzzles from the verify cache')
+    parser.add_argument('--cache-path', default=None, help='Cache file (default: verify_cache.json next to the report)')
+    parser.add_argument('--profile', metavar='PATH', default=None, help='Dump cProfile output to PATH')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream-parse the input and verify chunks in parallel (no duplicates or cache)')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='Worker processes for --stream (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Puzzles per worker task for --stream')
+    parser.add_argument('--timeout', type=float, default=10.0,
+                        help='Seconds one puzzle may search in --stream before it is reported as timed out (0 for none)')
     args = parser.parse_args()
-    verify_puzzles(args.input, args.out)
+    if args.stream:
+        run = verify_stream
+        run_kwargs = dict(solver=args.solver, batch=args.batch, stats=args.stats, workers=args.workers,
+                          chunk_size=args.chunk_size, timeout=args.timeout or None)
+    else:
+        run = verify_puzzles
+        run_kwargs = dict(solver=args.solver, batch=args.batch, stats=args.stats, duplicates=args.duplicates,
+                          cache_path=args.cache_path, use_cache=args.cache)
+    if args.profile:
+        profile_call(args.profile, run, args.input, args.out, **run_kwargs)
+    else:
+        run(args.input, args.out, **run_kwargs)